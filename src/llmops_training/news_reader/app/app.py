@@ -21,6 +21,8 @@ def init_session_state():
         st.session_state["results"] = []
     if "trace_ids" not in st.session_state:
         st.session_state["trace_ids"] = []
+    if "pending" not in st.session_state:
+        st.session_state["pending"] = set()
 
 
 st.set_page_config(
@@ -1,7 +1,7 @@
 """Defines the components of the Streamlit app defined in the `app` module."""
 
 import os
-from typing import Optional
+from typing import Optional, Union
 
 import dotenv
 import streamlit as st
@@ -12,7 +12,10 @@ from streamlit.delta_generator import DeltaGenerator
 from llmops_training.news_reader.logs import configure_tracer
 from llmops_training.news_reader.app import utils
 from llmops_training.news_reader.extraction import (
+    ArticleInfo,
+    PartialArticleInfo,
     mock_extract_info_from_articles,
+    stream_article_info,
 )
 
 dotenv.load_dotenv()
@@ -48,8 +51,15 @@ def article_upload_form(position: DeltaGenerator) -> None:
             # Create a structured log entry for the number of articles added
             # ... # TODO(11-monitor-functional-metrics): Fill me in! Add log statement
 
-            # Exract structured information using the `mock_extract_info_from_articles` function
-            results, _ = ([None] * len(articles), ...)  # TODO(03-running-the-app/04-modularizing-the-solution): Replace me!
+            if os.getenv("STREAM_RESULTS", "false").lower() == "true":
+                # Results are streamed by `display_results` when an article is selected
+                st.session_state["pending"] = set(range(len(articles)))
+                results = [None] * len(articles)
+            else:
+                st.session_state["pending"] = set()
+                # Exract structured information using the `mock_extract_info_from_articles` function
+                # TODO(03-running-the-app/04-modularizing-the-solution): Replace me!
+                results, _ = ([None] * len(articles), ...)
 
             # TODO(13-feedback-with-trace): Make sure trace IDs from `extract_info_from_articles`
             # are returned and stored in the session state `st.session_state["trace_ids"]`
@@ -97,8 +107,43 @@ def display_article(position: DeltaGenerator, doc_index: Optional[int]):
         st.markdown(st.session_state["articles"][doc_index], unsafe_allow_html=True)
 
 
+def write_article_info(article_info: Union[PartialArticleInfo, ArticleInfo]) -> None:
+    """Writes the fields of article info that are known so far, without feedback buttons."""
+    for key, value in article_info.model_dump().items():
+        if key == "business_info":
+            if len(value) > 0:
+                st.markdown(f"`{key}`:")
+            for value_dict in value:
+                st.write(value_dict)
+        elif value is None:
+            st.write(f"`{key}`: _..._")
+        else:
+            if isinstance(value, bool):
+                value = ":green[TRUE]" if value else ":red[FALSE]"
+            st.write(f"`{key}`: {value}")
+
+
+def stream_results(position: DeltaGenerator, doc_index: int) -> None:
+    """Extracts info from a pending article, showing each field as soon as it is generated."""
+    placeholder = position.empty()
+    try:
+        for article_info in stream_article_info(st.session_state["articles"][doc_index]):
+            with placeholder.container():
+                write_article_info(article_info)
+    except Exception as e:
+        article_info = None
+        print(f"Exception in article {doc_index}: {e}")
+    placeholder.empty()
+
+    st.session_state["results"][doc_index] = article_info
+    st.session_state["pending"].discard(doc_index)
+
+
 def display_results(position: DeltaGenerator, doc_index: Optional[int]):
-    """Displays the extracted structured information for the selected article."""
+    """Displays the extracted structured information for the selected article.
+
+    Results of pending articles are streamed first, see `stream_results`.
+    """
     with position.container(border=True):
         st.write("🗂️ **Structured Output**")
 
@@ -106,6 +151,9 @@ def display_results(position: DeltaGenerator, doc_index: Optional[int]):
             st.write("_No results available yet._")
             return
 
+        if doc_index in st.session_state["pending"]:
+            stream_results(st, doc_index)
+
         if st.session_state["results"][doc_index] is None:
             st.write("_An error occurred while processing this article._")
             return
@@ -0,0 +1,345 @@
+"""Offline batch extraction of structured information from many articles.
+
+Instead of one online call per extraction step, all steps of a wave are written to a JSONL
+file in the format of the Azure OpenAI Batch API, submitted in one go, and the results are
+ingested once the batch completes. Steps that depend on earlier results go out as follow-up
+waves:
+
+1. general info and business category of every article
+2. businesses involved in every business article
+3. business specific info for every business we care about
+
+Batches are processed by a pluggable backend. `LocalBatchBackend` is a file-based stand-in
+that runs the flow offline, `AzureOpenAIBatchBackend` submits to Azure OpenAI.
+"""
+
+import argparse
+import json
+import shutil
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Protocol
+
+from instructor.function_calls import openai_schema
+from instructor.process_response import handle_response_model
+from openai.types.chat import ChatCompletion
+from pydantic import BaseModel
+
+from llmops_training.news_reader.extraction import (
+    ArticleInfo,
+    BusinessCategory,
+    BusinessesInvolved,
+    BusinessSpecificInfo,
+    GeneralInfo,
+    format_messages,
+    get_business_category_prompt_template,
+    get_business_specific_prompt_template,
+    get_businesses_involved_prompt_template,
+    get_general_info_prompt_template,
+    is_business_we_care_about,
+)
+from llmops_training.news_reader.generation import (
+    Prompt,
+    get_azure_client,
+    get_generation_config,
+    get_instructor_mode,
+    make_messages,
+)
+
+FINAL_BATCH_STATUSES = ("completed", "failed", "expired", "cancelled")
+
+
+class BatchBackend(Protocol):
+    """Backend that processes a JSONL file of batch requests."""
+
+    def submit(self, requests_path: Path) -> str:
+        """Submit a file of batch requests and return the batch ID."""
+        ...
+
+    def status(self, batch_id: str) -> str:
+        """Return the status of a batch, e.g. "in_progress", "completed" or "failed"."""
+        ...
+
+    def download_results(self, batch_id: str, results_path: Path) -> Path:
+        """Write the JSONL results of a completed batch to the given path."""
+        ...
+
+
+class LocalBatchBackend:
+    """File-based stand-in for a batch API, for testing the batch flow offline.
+
+    Each request body is answered by `responder`, which returns a chat completion as a dict.
+    """
+
+    def __init__(self, work_dir: Path, responder: Callable[[Dict[str, Any]], Dict[str, Any]]):
+        self.work_dir = Path(work_dir)
+        self.responder = responder
+
+    def submit(self, requests_path: Path) -> str:
+        batch_id = f"batch_{uuid.uuid4().hex}"
+        batch_dir = self.work_dir / batch_id
+        batch_dir.mkdir(parents=True)
+        shutil.copy(requests_path, batch_dir / "input.jsonl")
+        return batch_id
+
+    def status(self, batch_id: str) -> str:
+        batch_dir = self.work_dir / batch_id
+        if not (batch_dir / "output.jsonl").exists():
+            self._process(batch_dir)
+        return "completed"
+
+    def _process(self, batch_dir: Path) -> None:
+        with open(batch_dir / "input.jsonl", "r", encoding="utf-8") as input_file:
+            requests = [json.loads(line) for line in input_file if line.strip()]
+
+        with open(batch_dir / "output.jsonl", "w", encoding="utf-8") as output_file:
+            for request in requests:
+                result: Dict[str, Any] = {"id": uuid.uuid4().hex, "custom_id": request["custom_id"]}
+                try:
+                    body = self.responder(request["body"])
+                    result.update(response={"status_code": 200, "body": body}, error=None)
+                except Exception as e:
+                    result.update(response=None, error={"message": str(e)})
+                output_file.write(json.dumps(result) + "\n")
+
+    def download_results(self, batch_id: str, results_path: Path) -> Path:
+        shutil.copy(self.work_dir / batch_id / "output.jsonl", results_path)
+        return results_path
+
+
+class AzureOpenAIBatchBackend:
+    """Submits batches to the Azure OpenAI Batch API.
+
+    The model name of the requests should be a deployment of type "Global-Batch".
+    """
+
+    def submit(self, requests_path: Path) -> str:
+        client = get_azure_client()
+        with open(requests_path, "rb") as requests_file:
+            input_file = client.files.create(file=requests_file, purpose="batch")
+        batch = client.batches.create(
+            input_file_id=input_file.id,
+            endpoint="/chat/completions",
+            completion_window="24h",
+        )
+        return batch.id
+
+    def status(self, batch_id: str) -> str:
+        return get_azure_client().batches.retrieve(batch_id).status
+
+    def download_results(self, batch_id: str, results_path: Path) -> Path:
+        """Write the results of both the succeeded and the failed requests.
+
+        Failed requests are in a separate error file, and there is no output file at all if
+        every request failed. Their results carry the error, so they fail like invalid outputs.
+        """
+        client = get_azure_client()
+        batch = client.batches.retrieve(batch_id)
+        contents = [
+            client.files.content(file_id).text.strip()
+            for file_id in (batch.output_file_id, batch.error_file_id)
+            if file_id is not None
+        ]
+        results_path.write_text(
+            "".join(content + "\n" for content in contents if content), encoding="utf-8"
+        )
+        return results_path
+
+
+def make_batch_request(
+    custom_id: str,
+    prompt: Prompt,
+    response_model: type[BaseModel],
+    model_name: str = "o3-mini",
+    **kwargs,
+) -> Dict[str, Any]:
+    """Return a batch request line equivalent to calling `generate_object` with the prompt.
+
+    The response schema is sent as in the Instructor mode of the generation module.
+    """
+    _, instructor_kwargs = handle_response_model(
+        response_model, mode=get_instructor_mode(), messages=make_messages(prompt)
+    )
+    return {
+        "custom_id": custom_id,
+        "method": "POST",
+        "url": "/chat/completions",
+        "body": {
+            "model": model_name,
+            **get_generation_config(**kwargs),
+            **instructor_kwargs,
+        },
+    }
+
+
+def parse_batch_result(
+    result: Dict[str, Any], response_model: type[BaseModel]
+) -> Optional[BaseModel]:
+    """Return the structured output of a batch result line, or None if the request failed."""
+    response = result.get("response")
+    if result.get("error") or response is None or response.get("status_code") != 200:
+        return None
+    try:
+        completion = ChatCompletion.model_validate(response["body"])
+        output = openai_schema(response_model).from_response(completion, mode=get_instructor_mode())
+        return response_model.model_validate(output.model_dump())
+    except Exception as e:
+        print(f"Exception in batch result {result.get('custom_id')}: {e}")
+        return None
+
+
+def run_batch(
+    requests: List[Dict[str, Any]],
+    backend: BatchBackend,
+    work_dir: Path,
+    poll_interval: float = 60,
+    timeout: float = 24 * 60 * 60,
+) -> Dict[str, Dict[str, Any]]:
+    """Submit batch requests, wait until the batch is done, and return results by custom ID."""
+    if not requests:
+        return {}
+
+    work_dir.mkdir(parents=True, exist_ok=True)
+    requests_path = work_dir / f"requests_{uuid.uuid4().hex}.jsonl"
+    with open(requests_path, "w", encoding="utf-8") as requests_file:
+        for request in requests:
+            requests_file.write(json.dumps(request) + "\n")
+
+    batch_id = backend.submit(requests_path)
+    deadline = time.monotonic() + timeout
+    while (status := backend.status(batch_id)) not in FINAL_BATCH_STATUSES:
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"Batch {batch_id} did not complete within {timeout} seconds")
+        time.sleep(poll_interval)
+    if status != "completed":
+        raise RuntimeError(f"Batch {batch_id} ended with status '{status}'")
+
+    results_path = backend.download_results(batch_id, work_dir / f"results_{batch_id}.jsonl")
+    with open(results_path, "r", encoding="utf-8") as results_file:
+        results = [json.loads(line) for line in results_file if line.strip()]
+    return {result["custom_id"]: result for result in results}
+
+
+def extract_info_from_articles_batch(
+    articles: List[str],
+    backend: BatchBackend,
+    work_dir: Path,
+    poll_interval: float = 60,
+    **kwargs,
+) -> List[Optional[ArticleInfo]]:
+    """Return structured information from a list of articles, using batch requests.
+
+    If any step fails for an article, the output for that article will be None.
+    """
+
+    def wave(requests: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        return run_batch(requests, backend, work_dir, poll_interval=poll_interval)
+
+    # Wave 1: general info and business category of every article
+    requests = []
+    for i, article in enumerate(articles):
+        prompt = format_messages(get_general_info_prompt_template(), article)
+        requests.append(make_batch_request(f"{i}:general_info", prompt, GeneralInfo, **kwargs))
+        prompt = format_messages(get_business_category_prompt_template(), article)
+        requests.append(
+            make_batch_request(f"{i}:business_category", prompt, BusinessCategory, **kwargs)
+        )
+    results = wave(requests)
+    general_infos = {
+        i: parse_batch_result(results.get(f"{i}:general_info", {}), GeneralInfo)
+        for i in range(len(articles))
+    }
+    business_categories = {
+        i: parse_batch_result(results.get(f"{i}:business_category", {}), BusinessCategory)
+        for i in range(len(articles))
+    }
+
+    # Wave 2: businesses involved in every business article
+    business_articles = [
+        i
+        for i, category in business_categories.items()
+        if category is not None and category.is_about_business and general_infos[i] is not None
+    ]
+    requests = [
+        make_batch_request(
+            f"{i}:businesses_involved",
+            format_messages(get_businesses_involved_prompt_template(), articles[i]),
+            BusinessesInvolved,
+            **kwargs,
+        )
+        for i in business_articles
+    ]
+    results = wave(requests)
+    businesses_involved = {
+        i: parse_batch_result(results.get(f"{i}:businesses_involved", {}), BusinessesInvolved)
+        for i in business_articles
+    }
+
+    # Wave 3: business specific info for every business we care about
+    business_keys: Dict[int, List[str]] = {}
+    requests = []
+    for i, involved in businesses_involved.items():
+        if involved is None:
+            continue
+        business_keys[i] = []
+        for j, business in enumerate(involved.businesses):
+            if not is_business_we_care_about(business):
+                continue
+            custom_id = f"{i}:business_specific_info:{j}"
+            business_keys[i].append(custom_id)
+            prompt = format_messages(get_business_specific_prompt_template(), articles[i], business)
+            requests.append(make_batch_request(custom_id, prompt, BusinessSpecificInfo, **kwargs))
+    results = wave(requests)
+
+    article_infos: List[Optional[ArticleInfo]] = []
+    for i in range(len(articles)):
+        general_info, business_category = general_infos[i], business_categories[i]
+        if general_info is None or business_category is None:
+            article_infos.append(None)
+            continue
+
+        business_info: Optional[List[BusinessSpecificInfo]] = []
+        if business_category.is_about_business:
+            if i not in business_keys:
+                article_infos.append(None)
+                continue
+            outputs = [
+                parse_batch_result(results.get(custom_id, {}), BusinessSpecificInfo)
+                for custom_id in business_keys[i]
+            ]
+            business_info = None if any(output is None for output in outputs) else outputs
+
+        article_infos.append(
+            None
+            if business_info is None
+            else ArticleInfo(
+                title=general_info.title,
+                summary=general_info.summary,
+                is_about_business=business_category.is_about_business,
+                business_info=business_info,
+            )
+        )
+
+    return article_infos
+
+
+if __name__ == "__main__":
+    from llmops_training.news_reader.data import get_bbc_news_sample
+
+    parser = argparse.ArgumentParser(description="Extract info from a month of BBC news in batch")
+    parser.add_argument("--year-month", help="Month of BBC news to process (YYYY-MM)")
+    parser.add_argument("--model-name", default="o3-mini", help="Global-Batch deployment name")
+    parser.add_argument("--work-dir", default="batch", help="Directory for batch files")
+    args = parser.parse_args()
+
+    data = get_bbc_news_sample(args.year_month)
+    article_infos = extract_info_from_articles_batch(
+        data["article"].to_list(),
+        AzureOpenAIBatchBackend(),
+        Path(args.work_dir),
+        model_name=args.model_name,
+    )
+    with open(Path(args.work_dir) / "article_infos.jsonl", "w", encoding="utf-8") as output_file:
+        for article_info in article_infos:
+            output_file.write((article_info.model_dump_json() if article_info else "null") + "\n")
@@ -0,0 +1,275 @@
+"""Content-addressed cache for LLM responses.
+
+Responses are keyed by a hash of everything that determines them: model, prompt, response
+schema and generation config. Entries live in an in-memory LRU tier and, optionally, in an
+on-disk SQLite tier that survives restarts. Identical requests that are still in flight are
+coalesced with `SingleFlight`.
+"""
+
+import asyncio
+import concurrent.futures
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, TypeVar
+
+import dotenv
+
+dotenv.load_dotenv()
+
+T = TypeVar("T")
+
+
+def make_cache_key(
+    model_name: str,
+    prompt: str,
+    response_schema: Optional[Dict[str, Any]] = None,
+    generation_config: Optional[Dict[str, Any]] = None,
+) -> str:
+    """Return a stable hash identifying an LLM request."""
+    payload = {
+        "model_name": model_name,
+        "prompt": prompt,
+        "response_schema": response_schema,
+        "generation_config": generation_config or {},
+    }
+    serialized = json.dumps(payload, sort_keys=True, default=str)
+    return hashlib.sha256(serialized.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """Two-tier LRU cache of serialized LLM responses, with TTL and size-based eviction.
+
+    Values are strings (raw text or Pydantic JSON), so that the caller can rehydrate them
+    into the right type. Safe to share between threads.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        max_memory_entries: int = 1024,
+        max_disk_entries: int = 100_000,
+        ttl_seconds: Optional[float] = None,
+    ):
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_entries = max_disk_entries
+        self.ttl_seconds = ttl_seconds
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._memory: OrderedDict[str, Tuple[float, str]] = OrderedDict()
+        self._connection: Optional[sqlite3.Connection] = None
+        if path:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            # Wait for, rather than fail on, writes of other processes sharing the cache, and
+            # let them read while one writes (write-ahead logging)
+            self._connection = sqlite3.connect(path, check_same_thread=False, timeout=30)
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS responses "
+                "(key TEXT PRIMARY KEY, value TEXT, created_at REAL, accessed_at REAL)"
+            )
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at)"
+            )
+            self._connection.commit()
+
+    def _is_expired(self, created_at: float) -> bool:
+        return self.ttl_seconds is not None and time.time() - created_at > self.ttl_seconds
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached value for a key, or None if it is missing or expired."""
+        with self._lock:
+            if key in self._memory:
+                created_at, value = self._memory[key]
+                if not self._is_expired(created_at):
+                    self._memory.move_to_end(key)
+                    self.memory_hits += 1
+                    return value
+                del self._memory[key]
+
+            if self._connection is not None:
+                row = self._connection.execute(
+                    "SELECT value, created_at FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None and not self._is_expired(row[1]):
+                    self._connection.execute(
+                        "UPDATE responses SET accessed_at = ? WHERE key = ?", (time.time(), key)
+                    )
+                    self._connection.commit()
+                    self._set_in_memory(key, row[0], created_at=row[1])
+                    self.disk_hits += 1
+                    return row[0]
+                if row is not None:
+                    self._connection.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    self._connection.commit()
+
+            self.misses += 1
+            return None
+
+    def set(self, key: str, value: str) -> None:
+        """Store a value in both tiers, evicting the least recently used entries if full."""
+        now = time.time()
+        with self._lock:
+            self._set_in_memory(key, value, created_at=now)
+            if self._connection is not None:
+                self._connection.execute(
+                    "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?)", (key, value, now, now)
+                )
+                self._connection.execute(
+                    "DELETE FROM responses WHERE key IN "
+                    "(SELECT key FROM responses ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                    (self.max_disk_entries,),
+                )
+                self._connection.commit()
+
+    def _set_in_memory(self, key: str, value: str, created_at: float) -> None:
+        self._memory[key] = (created_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def clear(self) -> None:
+        """Remove all entries from both tiers and reset the counters."""
+        with self._lock:
+            self._memory.clear()
+            if self._connection is not None:
+                self._connection.execute("DELETE FROM responses")
+                self._connection.commit()
+            self.memory_hits = self.disk_hits = self.misses = 0
+
+    def stats(self) -> Dict[str, float]:
+        """Return hit and miss counters of the cache."""
+        hits = self.memory_hits + self.disk_hits
+        lookups = hits + self.misses
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": hits / lookups if lookups else 0.0,
+        }
+
+    def close(self) -> None:
+        """Close the connection to the on-disk tier."""
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+
+def get_default_cache() -> ResponseCache:
+    """Return a cache configured from the environment.
+
+    The cache is kept in memory only, unless `LLM_CACHE_PATH` is set to a SQLite file.
+    """
+    ttl_seconds = os.getenv("LLM_CACHE_TTL_SECONDS", str(7 * 24 * 60 * 60))
+    return ResponseCache(
+        path=os.getenv("LLM_CACHE_PATH"),
+        max_memory_entries=int(os.getenv("LLM_CACHE_MAX_MEMORY_ENTRIES", "1024")),
+        max_disk_entries=int(os.getenv("LLM_CACHE_MAX_DISK_ENTRIES", "100000")),
+        ttl_seconds=float(ttl_seconds) if ttl_seconds else None,
+    )
+
+
+class _LeaderCancelled(Exception):
+    """The caller running a coalesced call was cancelled, so a follower should run it."""
+
+
+class SingleFlight:
+    """Coalesces concurrent calls with the same key into a single call.
+
+    The first caller for a key runs the call, and callers arriving while it is in flight wait
+    for and share its result or exception. Works across threads and event loops: async
+    callers await the same future as threaded callers. If the caller running the call is
+    cancelled, a waiting caller takes over and runs it instead.
+    """
+
+    def __init__(self):
+        self.n_calls = 0
+        self.n_deduplicated = 0
+        self._lock = threading.Lock()
+        self._in_flight: Dict[str, concurrent.futures.Future] = {}
+
+    def _join(self, key: str, is_retry: bool = False) -> Tuple[concurrent.futures.Future, bool]:
+        """Return the future for a key, and whether the caller should run the call.
+
+        A retry is a caller whose leader was cancelled, and that was counted as deduplicated.
+        """
+        with self._lock:
+            if key in self._in_flight:
+                self.n_deduplicated += not is_retry
+                return self._in_flight[key], False
+            future: concurrent.futures.Future = concurrent.futures.Future()
+            self._in_flight[key] = future
+            self.n_calls += 1
+            self.n_deduplicated -= is_retry
+            return future, True
+
+    def _finish(self, key: str) -> None:
+        # Called before the future is resolved, so that callers arriving afterwards make a new
+        # call rather than share a stale result or error
+        with self._lock:
+            del self._in_flight[key]
+
+    def _cancel(self, key: str, future: concurrent.futures.Future) -> None:
+        # Release the key first, so that the followers woken up elect a new leader
+        self._finish(key)
+        future.set_exception(_LeaderCancelled())
+
+    def do(self, key: str, func: Callable[[], T]) -> T:
+        """Run `func`, unless a call with the same key is in flight; then share its result."""
+        future, is_leader = self._join(key)
+        while not is_leader:
+            try:
+                return future.result()
+            except _LeaderCancelled:
+                future, is_leader = self._join(key, is_retry=True)
+        try:
+            result = func()
+        except Exception as e:
+            self._finish(key)
+            future.set_exception(e)
+            raise
+        except BaseException:
+            self._cancel(key, future)
+            raise
+        self._finish(key)
+        future.set_result(result)
+        return result
+
+    async def do_async(self, key: str, func: Callable[[], Awaitable[T]]) -> T:
+        """Asynchronous version of `do`."""
+        future, is_leader = self._join(key)
+        while not is_leader:
+            try:
+                # Shielded, so that a cancelled follower does not cancel the shared future
+                return await asyncio.shield(asyncio.wrap_future(future))
+            except _LeaderCancelled:
+                future, is_leader = self._join(key, is_retry=True)
+        try:
+            result = await func()
+        except Exception as e:
+            self._finish(key)
+            future.set_exception(e)
+            raise
+        except BaseException:
+            self._cancel(key, future)
+            raise
+        self._finish(key)
+        future.set_result(result)
+        return result
+
+    def stats(self) -> Dict[str, float]:
+        """Return how many calls were made and how many were deduplicated."""
+        total = self.n_calls + self.n_deduplicated
+        return {
+            "calls": self.n_calls,
+            "deduplicated": self.n_deduplicated,
+            "deduplication_rate": self.n_deduplicated / total if total else 0.0,
+        }
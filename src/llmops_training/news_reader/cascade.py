@@ -0,0 +1,213 @@
+"""Model cascades: try a cheap, fast model first and escalate to a stronger one when needed.
+
+A cascade profile lists tiers of models for an extraction step, from cheapest to strongest.
+A tier's output is accepted unless it fails validation, the model reports a confidence below
+the tier's `min_confidence`, or repeated samples of the tier disagree. In that case the
+request escalates to the next tier. The last tier's output is always accepted.
+
+Profiles are loaded from the JSON file in `LLM_CASCADE_PROFILES_FILE`, mapping step names to
+profiles, e.g.:
+
+    {"business_category": {"tiers": [
+        {"model_name": "gpt-4o-mini", "generation_kwargs": {"max_completion_tokens": 64},
+         "min_confidence": 0.8},
+        {"model_name": "o3-mini"}
+    ]}}
+"""
+
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import cache
+from json import JSONDecodeError
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Type, TypeVar
+
+import dotenv
+from pydantic import BaseModel, Field, ValidationError, create_model
+
+from llmops_training.news_reader.generation import Prompt, generate_object
+from llmops_training.news_reader.rate_limit import unwrap_exception
+
+dotenv.load_dotenv()
+
+T = TypeVar("T", bound=BaseModel)
+
+CONFIDENCE_DESCRIPTION = (
+    "How confident you are that the extracted information is correct, from 0 to 1"
+)
+
+
+class ModelTier(BaseModel):
+    model_name: str = Field(..., description="Model (or deployment) name of the tier")
+    generation_kwargs: Dict[str, Any] = Field(
+        default_factory=dict, description="Generation config of the tier, e.g. a smaller budget"
+    )
+    min_confidence: Optional[float] = Field(
+        None, description="Escalate if the self-reported confidence is lower"
+    )
+    n_samples: int = Field(1, description="Escalate if this many samples do not all agree")
+
+
+class CascadeProfile(BaseModel):
+    tiers: List[ModelTier] = Field(..., min_length=1)
+
+
+class CascadeStats:
+    """Thread-safe counters of requests, escalations and latency per step and tier."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[Tuple[str, str], Dict[str, float]] = {}
+
+    def record(
+        self, step: str, model_name: str, latency: float, escalation: Optional[str] = None
+    ) -> None:
+        """Record a request to a tier, and the reason it was escalated, if it was."""
+        with self._lock:
+            counters = self._counters.setdefault(
+                (step, model_name), {"requests": 0, "escalations": 0, "total_latency": 0.0}
+            )
+            counters["requests"] += 1
+            counters["total_latency"] += latency
+            if escalation is not None:
+                counters["escalations"] += 1
+                counters[f"escalations_{escalation}"] = (
+                    counters.get(f"escalations_{escalation}", 0) + 1
+                )
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """Return counters, escalation rate and mean latency per step and tier."""
+        with self._lock:
+            return [
+                {
+                    "step": step,
+                    "model_name": model_name,
+                    **counters,
+                    "escalation_rate": counters["escalations"] / counters["requests"],
+                    "mean_latency": counters["total_latency"] / counters["requests"],
+                }
+                for (step, model_name), counters in self._counters.items()
+            ]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+
+
+def load_cascade_profiles(path: str | Path) -> Dict[str, CascadeProfile]:
+    """Load cascade profiles from a JSON file mapping step names to profiles."""
+    with open(path, "r", encoding="utf-8") as file:
+        return {
+            step: CascadeProfile.model_validate(profile)
+            for step, profile in json.load(file).items()
+        }
+
+
+_profiles: Dict[str, CascadeProfile] = (
+    load_cascade_profiles(os.environ["LLM_CASCADE_PROFILES_FILE"])
+    if os.getenv("LLM_CASCADE_PROFILES_FILE")
+    else {}
+)
+_stats = CascadeStats()
+
+
+def configure_cascade_profiles(profiles: Dict[str, CascadeProfile]) -> None:
+    """Replaces the cascade profiles per step. Steps without a profile are not cascaded."""
+    global _profiles
+    _profiles = profiles
+
+
+def get_cascade_profiles() -> Dict[str, CascadeProfile]:
+    """Returns the cascade profiles per step."""
+    return _profiles
+
+
+def get_cascade_stats() -> CascadeStats:
+    """Returns the shared escalation and latency statistics."""
+    return _stats
+
+
+@cache
+def with_confidence(response_model: Type[T]) -> Type[T]:
+    """Returns a subclass of the response model with a self-reported `confidence` field."""
+    return create_model(
+        response_model.__name__,
+        __base__=response_model,
+        confidence=(float, Field(..., ge=0, le=1, description=CONFIDENCE_DESCRIPTION)),
+    )
+
+
+def is_validation_error(exception: BaseException) -> bool:
+    return isinstance(unwrap_exception(exception), (ValidationError, JSONDecodeError))
+
+
+def _generate_tier_object(
+    prompt: Prompt, response_model: Type[T], tier: ModelTier, is_last: bool, **kwargs
+) -> Tuple[Optional[T], Optional[str]]:
+    """Generates an object with a tier, returning it and the reason to escalate, if any."""
+    kwargs = {**kwargs, **tier.generation_kwargs}
+    use_cache = kwargs.pop("use_cache", True)
+    ask_confidence = tier.min_confidence is not None and not is_last
+    tier_response_model = with_confidence(response_model) if ask_confidence else response_model
+
+    def generate(is_first_sample: bool = True) -> BaseModel:
+        return generate_object(
+            prompt,
+            tier_response_model,
+            model_name=tier.model_name,
+            use_cache=use_cache and is_first_sample,
+            **kwargs,
+        )
+
+    try:
+        if tier.n_samples > 1 and not is_last:
+            # Only the first sample may come from the cache, the others must be new samples
+            with ThreadPoolExecutor(max_workers=tier.n_samples) as executor:
+                futures = [executor.submit(generate, i == 0) for i in range(tier.n_samples)]
+                samples = [future.result() for future in futures]
+        else:
+            samples = [generate()]
+    except Exception as e:
+        if is_last or not is_validation_error(e):
+            raise
+        return None, "validation"
+
+    output = response_model.model_validate(samples[0].model_dump(exclude={"confidence"}))
+    if ask_confidence and min(sample.confidence for sample in samples) < tier.min_confidence:
+        return output, "low_confidence"
+    answers = [sample.model_dump(exclude={"confidence"}) for sample in samples]
+    if any(answer != answers[0] for answer in answers[1:]):
+        return output, "disagreement"
+    return output, None
+
+
+def generate_object_cascade(
+    prompt: Prompt,
+    response_model: Type[T],
+    profile: CascadeProfile,
+    step: str = "default",
+    **kwargs,
+) -> T:
+    """Generates a structured object, escalating through the tiers of a cascade profile."""
+    for i, tier in enumerate(profile.tiers):
+        is_last = i == len(profile.tiers) - 1
+        start = time.monotonic()
+        output, escalation = _generate_tier_object(prompt, response_model, tier, is_last, **kwargs)
+        _stats.record(step, tier.model_name, time.monotonic() - start, escalation)
+        if escalation is None:
+            return output
+    raise AssertionError("unreachable")
+
+
+def generate_step_object(step: str, prompt: Prompt, response_model: Type[T], **kwargs) -> T:
+    """Generates a structured object for an extraction step, using its cascade profile if any.
+
+    If the caller chooses a `model_name`, the cascade is skipped.
+    """
+    profile = _profiles.get(step)
+    if profile is None or "model_name" in kwargs:
+        return generate_object(prompt, response_model, **kwargs)
+    return generate_object_cascade(prompt, response_model, profile, step=step, **kwargs)
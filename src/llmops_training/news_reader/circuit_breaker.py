@@ -0,0 +1,150 @@
+"""Circuit breaker that fails fast while the LLM service is throttling or down.
+
+The breaker is closed while requests succeed. After `failure_threshold` consecutive failed
+requests it opens, and requests fail immediately with `CircuitOpenError` instead of waiting
+through retries and timeouts. After `recovery_timeout` seconds it is half-open: a limited
+number of trial requests are let through, and it closes again once they succeed.
+"""
+
+import threading
+import time
+from typing import Awaitable, Callable, Dict, List, Literal, Optional, Tuple, TypeVar
+
+from llmops_training.news_reader.rate_limit import RETRYABLE_ERRORS, unwrap_exception
+
+T = TypeVar("T")
+
+CircuitState = Literal["closed", "open", "half_open"]
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of sending a request while the circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """Thread-safe circuit breaker around calls to the LLM service.
+
+    Only API errors count as failures. Other errors, such as output that failed validation,
+    neither count as failures nor reset them. `on_state_change` is called with the old state,
+    the new state and the number of consecutive failures.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        recovery_timeout: float = 30.0,
+        half_open_max_calls: int = 1,
+        on_state_change: Optional[Callable[[CircuitState, CircuitState, int], None]] = None,
+    ):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self.on_state_change = on_state_change
+        self._lock = threading.Lock()
+        self._state: CircuitState = "closed"
+        self._opened_at = 0.0
+        self._consecutive_failures = 0
+        self._half_open_calls = 0
+        self.n_rejected = 0
+
+    @property
+    def state(self) -> CircuitState:
+        with self._lock:
+            transitions = self._update_state()
+        self._notify(transitions)
+        return self._state
+
+    def _update_state(self) -> List[Tuple[CircuitState, CircuitState]]:
+        """Move from open to half-open once the recovery timeout passed. Call with the lock."""
+        if self._state == "open" and time.monotonic() - self._opened_at >= self.recovery_timeout:
+            return self._transition("half_open")
+        return []
+
+    def _transition(self, state: CircuitState) -> List[Tuple[CircuitState, CircuitState]]:
+        old_state, self._state = self._state, state
+        if state == "open":
+            self._opened_at = time.monotonic()
+        self._half_open_calls = 0
+        return [(old_state, state)]
+
+    def _notify(self, transitions: List[Tuple[CircuitState, CircuitState]]) -> None:
+        if self.on_state_change is not None:
+            for old_state, new_state in transitions:
+                self.on_state_change(old_state, new_state, self._consecutive_failures)
+
+    def before_call(self) -> None:
+        """Raise `CircuitOpenError` if a call is not allowed now."""
+        with self._lock:
+            transitions = self._update_state()
+            allowed = self._state == "closed" or (
+                self._state == "half_open" and self._half_open_calls < self.half_open_max_calls
+            )
+            if allowed and self._state == "half_open":
+                self._half_open_calls += 1
+            if not allowed:
+                self.n_rejected += 1
+        self._notify(transitions)
+        if not allowed:
+            raise CircuitOpenError("The LLM service is unavailable, the circuit breaker is open")
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._consecutive_failures = 0
+            transitions = self._transition("closed") if self._state != "closed" else []
+        self._notify(transitions)
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._consecutive_failures += 1
+            transitions = []
+            if self._state == "half_open" or (
+                self._state == "closed" and self._consecutive_failures >= self.failure_threshold
+            ):
+                transitions = self._transition("open")
+        self._notify(transitions)
+
+    def _release_trial(self) -> None:
+        with self._lock:
+            if self._state == "half_open":
+                self._half_open_calls = max(self._half_open_calls - 1, 0)
+
+    def _record(self, exception: BaseException) -> None:
+        if isinstance(unwrap_exception(exception), RETRYABLE_ERRORS):
+            self.record_failure()
+        else:
+            self._release_trial()
+
+    def call(self, func: Callable[[], T]) -> T:
+        """Call `func` unless the breaker is open, and record whether the service responded."""
+        self.before_call()
+        try:
+            output = func()
+        except Exception as e:
+            self._record(e)
+            raise
+        except BaseException:
+            self._release_trial()  # E.g. a cancelled call, which says nothing about the service
+            raise
+        self.record_success()
+        return output
+
+    async def call_async(self, func: Callable[[], Awaitable[T]]) -> T:
+        """Asynchronous version of `call`."""
+        self.before_call()
+        try:
+            output = await func()
+        except Exception as e:
+            self._record(e)
+            raise
+        except BaseException:
+            self._release_trial()  # E.g. a cancelled call, which says nothing about the service
+            raise
+        self.record_success()
+        return output
+
+    def stats(self) -> Dict[str, int | str]:
+        return {
+            "state": self.state,
+            "consecutive_failures": self._consecutive_failures,
+            "rejected": self.n_rejected,
+        }
@@ -0,0 +1,224 @@
+"""Local pre-classifier that skips the business category LLM call for obvious articles.
+
+A linear model (logistic regression) over hashed bag-of-words features, trained on the labelled
+BBC news sample (`is_business`). It is small and fast enough to run for every article. Only
+articles in the uncertain band between the `lower` and `upper` thresholds are sent to the LLM.
+
+Train it with `python -m llmops_training.news_reader.classifier --output <path>`, and set
+`BUSINESS_CLASSIFIER_PATH` to the saved artifact to enable it.
+"""
+
+import argparse
+import hashlib
+import math
+import os
+import re
+import threading
+import zlib
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import dotenv
+import numpy as np
+
+dotenv.load_dotenv()
+
+ARTIFACT_VERSION = 1
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def hash_features(text: str, n_features: int) -> Dict[int, float]:
+    """Return the hashed, log-scaled and L2-normalized counts of the words and word pairs.
+
+    Hashes are stable across processes (unlike `hash`), so that saved models stay valid.
+    """
+    words = TOKEN_PATTERN.findall(text.lower())
+    tokens = Counter(words + [f"{a} {b}" for a, b in zip(words, words[1:])])
+    features: Dict[int, float] = {}
+    for token, count in tokens.items():
+        index = zlib.crc32(token.encode("utf-8")) % n_features
+        features[index] = features.get(index, 0.0) + 1.0 + math.log(count)
+    norm = math.sqrt(sum(value * value for value in features.values())) or 1.0
+    return {index: value / norm for index, value in features.items()}
+
+
+class HashedBagOfWordsClassifier:
+    """Logistic regression over hashed bag-of-words features, trained with SGD."""
+
+    def __init__(self, n_features: int = 2**18, l2: float = 1e-6):
+        self.n_features = n_features
+        self.l2 = l2
+        self.weights = np.zeros(n_features)
+        self.bias = 0.0
+
+    def _vectorize(self, text: str) -> tuple[np.ndarray, np.ndarray]:
+        features = hash_features(text, self.n_features)
+        return np.fromiter(features.keys(), dtype=np.int64), np.fromiter(features.values(), float)
+
+    def fit(
+        self,
+        texts: Sequence[str],
+        labels: Sequence[bool],
+        epochs: int = 10,
+        learning_rate: float = 0.5,
+        seed: int = 42,
+    ) -> "HashedBagOfWordsClassifier":
+        vectors = [self._vectorize(text) for text in texts]
+        rng = np.random.default_rng(seed)
+        for epoch in range(epochs):
+            step = learning_rate / math.sqrt(1 + epoch)
+            for i in rng.permutation(len(vectors)):
+                indices, values = vectors[i]
+                probability = 1 / (1 + math.exp(-(self.weights[indices] @ values + self.bias)))
+                gradient = probability - float(labels[i])
+                self.weights[indices] -= step * (
+                    gradient * values + self.l2 * self.weights[indices]
+                )
+                self.bias -= step * gradient
+        return self
+
+    def predict_proba(self, text: str) -> float:
+        """Return the probability that the text is about business."""
+        indices, values = self._vectorize(text)
+        return 1 / (1 + math.exp(-(self.weights[indices] @ values + self.bias)))
+
+    def fingerprint(self) -> str:
+        """Return a hash of the parameters, which changes whenever the saved artifact does."""
+        digest = hashlib.sha256(self.weights.tobytes())
+        digest.update(np.float64(self.bias).tobytes())
+        return digest.hexdigest()
+
+    def save(self, path: str | Path) -> None:
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "wb") as file:
+            np.savez_compressed(
+                file,
+                version=ARTIFACT_VERSION,
+                weights=self.weights,
+                bias=self.bias,
+                l2=self.l2,
+            )
+
+    @classmethod
+    def load(cls, path: str | Path) -> "HashedBagOfWordsClassifier":
+        with np.load(path) as artifact:
+            if int(artifact["version"]) != ARTIFACT_VERSION:
+                raise ValueError(
+                    f"Classifier artifact {path} has version {int(artifact['version'])}, "
+                    + f"expected {ARTIFACT_VERSION}. Train it again."
+                )
+            classifier = cls(n_features=len(artifact["weights"]), l2=float(artifact["l2"]))
+            classifier.weights = artifact["weights"]
+            classifier.bias = float(artifact["bias"])
+        return classifier
+
+
+class BusinessPreClassifier:
+    """Decides the business category locally when the classifier is confident.
+
+    Thread-safe counters keep track of how many LLM calls were saved.
+    """
+
+    def __init__(
+        self, classifier: HashedBagOfWordsClassifier, lower: float = 0.1, upper: float = 0.9
+    ):
+        self.classifier = classifier
+        self.lower = lower
+        self.upper = upper
+        self._lock = threading.Lock()
+        self.n_articles = 0
+        self.n_decided = 0
+
+    def decide(self, probability: float) -> Optional[bool]:
+        """Return whether an article is about business, or None if it is uncertain."""
+        if probability <= self.lower:
+            return False
+        if probability >= self.upper:
+            return True
+        return None
+
+    def classify(self, article: str) -> Optional[bool]:
+        """Return whether the article is about business, or None if the LLM should decide."""
+        decision = self.decide(self.classifier.predict_proba(article))
+        with self._lock:
+            self.n_articles += 1
+            self.n_decided += decision is not None
+        return decision
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            n_articles, n_decided = self.n_articles, self.n_decided
+        return {
+            "articles": n_articles,
+            "llm_calls_saved": n_decided,
+            "call_savings": n_decided / n_articles if n_articles else 0.0,
+        }
+
+
+def evaluate_pre_classifier(
+    pre_classifier: BusinessPreClassifier, articles: Sequence[str], labels: Sequence[bool]
+) -> Dict[str, float]:
+    """Return precision and recall of the confident decisions, and the share of LLM calls saved.
+
+    Decisions are counted without touching the pre-classifier's counters.
+    """
+    decisions = [
+        pre_classifier.decide(pre_classifier.classifier.predict_proba(article))
+        for article in articles
+    ]
+    decided = [(d, bool(label)) for d, label in zip(decisions, labels) if d is not None]
+    true_positives = sum(d and label for d, label in decided)
+    predicted_positives = sum(d for d, _ in decided)
+    positives = sum(label for _, label in decided)
+    return {
+        "precision": true_positives / predicted_positives if predicted_positives else 1.0,
+        "recall": true_positives / positives if positives else 1.0,
+        "call_savings": len(decided) / len(articles) if articles else 0.0,
+    }
+
+
+def train_business_classifier(
+    articles: List[str], is_business: List[bool], **kwargs
+) -> HashedBagOfWordsClassifier:
+    """Train the business classifier on labelled articles, e.g. from `get_bbc_news_sample`."""
+    return HashedBagOfWordsClassifier().fit(articles, is_business, **kwargs)
+
+
+def _load_default_pre_classifier() -> Optional[BusinessPreClassifier]:
+    path = os.getenv("BUSINESS_CLASSIFIER_PATH")
+    if not path:
+        return None
+    return BusinessPreClassifier(
+        HashedBagOfWordsClassifier.load(path),
+        lower=float(os.getenv("BUSINESS_CLASSIFIER_LOWER", "0.1")),
+        upper=float(os.getenv("BUSINESS_CLASSIFIER_UPPER", "0.9")),
+    )
+
+
+_pre_classifier = _load_default_pre_classifier()
+
+
+def configure_pre_classifier(pre_classifier: Optional[BusinessPreClassifier]) -> None:
+    """Replaces the business pre-classifier. Pass None to always ask the LLM."""
+    global _pre_classifier
+    _pre_classifier = pre_classifier
+
+
+def get_pre_classifier() -> Optional[BusinessPreClassifier]:
+    """Returns the business pre-classifier, if there is one."""
+    return _pre_classifier
+
+
+if __name__ == "__main__":
+    from llmops_training.news_reader.data import get_bbc_news_sample
+
+    parser = argparse.ArgumentParser(description="Train the local business pre-classifier")
+    parser.add_argument("--year-month", help="Month of BBC news to train on (YYYY-MM)")
+    parser.add_argument("--output", default="models/business_classifier.npz", help="Artifact")
+    args = parser.parse_args()
+
+    data = get_bbc_news_sample(args.year_month)
+    classifier = train_business_classifier(data["article"].to_list(), data["is_business"].to_list())
+    classifier.save(args.output)
+    print(f"Saved business classifier to {args.output}")
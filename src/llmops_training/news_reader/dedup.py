@@ -0,0 +1,146 @@
+"""Near-duplicate detection of articles with MinHash and locality-sensitive hashing (LSH).
+
+News feeds carry the same story in many lightly edited versions. Articles are compared on
+their sets of word shingles (runs of `shingle_size` words): two articles are near-duplicates
+if the Jaccard similarity of their shingles is at least `threshold`. MinHash signatures and
+LSH bands find candidate duplicates without comparing every pair of articles, and candidates
+are confirmed with their exact Jaccard similarity.
+
+Articles are clustered greedily in order: an article joins the cluster of the first earlier
+article it is a near-duplicate of, or starts a new cluster. Only the first article of each
+cluster, its representative, needs to be extracted.
+"""
+
+import re
+import zlib
+from typing import Dict, List, Sequence, Set, Tuple
+
+import numpy as np
+
+WORD_PATTERN = re.compile(r"[^\W_]+")
+# Mersenne prime larger than the 32-bit shingle hashes, small enough to hash in 64 bits
+PRIME = (1 << 31) - 1
+
+
+def get_shingles(text: str, shingle_size: int = 5) -> Set[int]:
+    """Return the hashes of the runs of `shingle_size` words in the text, ignoring case."""
+    words = WORD_PATTERN.findall(text.casefold())
+    n_shingles = max(len(words) - shingle_size + 1, 1)
+    return {
+        zlib.crc32(" ".join(words[i : i + shingle_size]).encode("utf-8")) for i in range(n_shingles)
+    }
+
+
+def jaccard(a: Set[int], b: Set[int]) -> float:
+    return len(a & b) / len(a | b) if a or b else 1.0
+
+
+def choose_bands(threshold: float, num_perm: int, min_recall: float = 0.99) -> Tuple[int, int]:
+    """Return the number of LSH bands and rows per band for the threshold.
+
+    Two articles with Jaccard similarity s become candidates with probability
+    1 - (1 - s^rows)^bands. The chosen layout makes articles at the threshold candidates with
+    at least `min_recall` probability, with as many rows as possible to keep out dissimilar ones.
+    """
+    layouts = [(num_perm // rows, rows) for rows in range(1, num_perm + 1) if num_perm % rows == 0]
+
+    def recall(layout: Tuple[int, int]) -> float:
+        bands, rows = layout
+        return 1 - (1 - threshold**rows) ** bands
+
+    good_layouts = [layout for layout in layouts if recall(layout) >= min_recall]
+    if not good_layouts:
+        return max(layouts, key=recall)
+    return max(good_layouts, key=lambda layout: layout[1])
+
+
+class NearDuplicateIndex:
+    """LSH index of the MinHash signatures of articles, to look up near-duplicates."""
+
+    def __init__(
+        self,
+        threshold: float = 0.8,
+        num_perm: int = 128,
+        shingle_size: int = 5,
+        seed: int = 42,
+    ):
+        self.threshold = threshold
+        self.shingle_size = shingle_size
+        self.bands, self.rows = choose_bands(threshold, num_perm)
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, PRIME, size=(num_perm, 1), dtype=np.uint64)
+        self._b = rng.integers(0, PRIME, size=(num_perm, 1), dtype=np.uint64)
+        self._buckets: List[Dict[bytes, List[int]]] = [{} for _ in range(self.bands)]
+        self._shingles: List[Set[int]] = []
+
+    def signature(self, shingles: Set[int]) -> np.ndarray:
+        """Return the MinHash signature of a set of shingle hashes."""
+        hashes = np.fromiter(shingles, dtype=np.uint64, count=len(shingles)) % PRIME
+        return ((self._a * hashes + self._b) % PRIME).min(axis=1)
+
+    def _band_keys(self, signature: np.ndarray) -> List[bytes]:
+        return [
+            signature[band * self.rows : (band + 1) * self.rows].tobytes()
+            for band in range(self.bands)
+        ]
+
+    def add(self, text: str) -> Tuple[int, bool]:
+        """Add an article to the index, unless it is a near-duplicate of an earlier one.
+
+        Returns the ID of the earlier article it duplicates and True, or else its new ID and False.
+        """
+        shingles = get_shingles(text, self.shingle_size)
+        band_keys = self._band_keys(self.signature(shingles))
+        candidates = {
+            candidate
+            for buckets, key in zip(self._buckets, band_keys)
+            for candidate in buckets.get(key, [])
+        }
+        for candidate in sorted(candidates):
+            if jaccard(shingles, self._shingles[candidate]) >= self.threshold:
+                return candidate, True
+
+        article_id = len(self._shingles)
+        self._shingles.append(shingles)
+        for buckets, key in zip(self._buckets, band_keys):
+            buckets.setdefault(key, []).append(article_id)
+        return article_id, False
+
+
+class Deduplication:
+    """Clusters of near-duplicate articles in a batch."""
+
+    def __init__(self, representatives: List[int]):
+        # Index of the article that represents the cluster of each article
+        self.representatives = representatives
+
+    @property
+    def unique_indices(self) -> List[int]:
+        """Indices of the articles to extract, one per cluster."""
+        return sorted(set(self.representatives))
+
+    @property
+    def dedup_ratio(self) -> float:
+        """Share of the articles that are near-duplicates, and need not be extracted."""
+        n_articles = len(self.representatives)
+        return 1 - len(self.unique_indices) / n_articles if n_articles else 0.0
+
+    def fan_out(self, unique_results: Sequence) -> List:
+        """Return the result of each article, given the results of `unique_indices`."""
+        results = dict(zip(self.unique_indices, unique_results))
+        return [results[representative] for representative in self.representatives]
+
+
+def deduplicate_articles(
+    articles: Sequence[str], threshold: float = 0.8, **kwargs
+) -> Deduplication:
+    """Cluster near-duplicate articles, with Jaccard similarity at least `threshold`."""
+    index = NearDuplicateIndex(threshold, **kwargs)
+    indices: List[int] = []  # Index of the article with each ID in the index
+    representatives = []
+    for i, article in enumerate(articles):
+        article_id, is_duplicate = index.add(article)
+        if not is_duplicate:
+            indices.append(i)
+        representatives.append(indices[article_id])
+    return Deduplication(representatives)
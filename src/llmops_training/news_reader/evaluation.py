@@ -1,4 +1,5 @@
-from typing import Dict, List, Optional
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
 
 import dotenv
 import nltk
@@ -7,9 +8,14 @@ import structlog
 from nltk.tokenize import word_tokenize
 from rouge import Rouge
 
+from llmops_training.news_reader.classifier import evaluate_pre_classifier, get_pre_classifier
 from llmops_training.news_reader.data import get_evaluation_data
 from llmops_training.news_reader.extraction import (
+    ArticleInfo,
+    BusinessCategory,
+    ExtractionMode,
     GeneralInfo,
+    extract_article_info,
     extract_business_category_from_articles,
     extract_general_info_from_articles,
     get_business_category_prompt_template,
@@ -101,22 +107,64 @@ def evaluate_summarization(general_info_list, data) -> Dict[str, float]:
     return avg_scores
 
 
-def run_evaluation(data: pd.DataFrame) -> Dict[str, float]:
-    """Run evaluation functions on given data set and log and return metrics"""
+def extract_article_info_with_latency(
+    articles: List[str], mode: ExtractionMode
+) -> Tuple[List[Optional[ArticleInfo]], List[float]]:
+    """Extract article info with the given mode, and return it with the latency per article.
+
+    If an error occurs during extraction, the output will be None. The response cache and
+    article info store are bypassed, so that every article is actually extracted.
+    """
+    article_infos = []
+    latencies = []
+    for i, article in enumerate(articles):
+        start = time.perf_counter()
+        try:
+            article_info, _ = extract_article_info(
+                article, mode=mode, use_cache=False, use_store=False
+            )
+        except Exception as e:
+            article_info = None
+            print(f"Exception in article {i}: {e}")
+        latencies.append(time.perf_counter() - start)
+        article_infos.append(article_info)
+    return article_infos, latencies
+
+
+def run_evaluation(data: pd.DataFrame, mode: Optional[ExtractionMode] = None) -> Dict[str, float]:
+    """Run evaluation functions on given data set and log and return metrics
+
+    If a `mode` is given, the info is extracted with `extract_article_info` in that mode, and
+    its latency is measured as well.
+    """
     assert "article" in data.columns
     assert "is_business" in data.columns
     assert "description" in data.columns
     assert "title" in data.columns
 
-    general_info_prompt_template = get_general_info_prompt_template()
-    general_info_list = extract_general_info_from_articles(
-        general_info_prompt_template, data["article"].to_list()
-    )
-
-    business_category_prompt_template = get_business_category_prompt_template()
-    business_category_list = extract_business_category_from_articles(
-        business_category_prompt_template, data["article"].to_list()
-    )
+    latencies: List[float] = []
+    if mode is None:
+        general_info_prompt_template = get_general_info_prompt_template()
+        general_info_list = extract_general_info_from_articles(
+            general_info_prompt_template, data["article"].to_list()
+        )
+
+        business_category_prompt_template = get_business_category_prompt_template()
+        business_category_list = extract_business_category_from_articles(
+            business_category_prompt_template, data["article"].to_list()
+        )
+    else:
+        article_infos, latencies = extract_article_info_with_latency(
+            data["article"].to_list(), mode
+        )
+        general_info_list = [
+            GeneralInfo(title=info.title, summary=info.summary) if info else None
+            for info in article_infos
+        ]
+        business_category_list = [
+            BusinessCategory(is_about_business=info.is_about_business) if info else None
+            for info in article_infos
+        ]
 
     success_rate = evaluate_extract_general_info_success_rate(general_info_list)
     title_accuracy = evaluate_title(general_info_list, data)
@@ -134,12 +182,35 @@ def run_evaluation(data: pd.DataFrame) -> Dict[str, float]:
         "summarization_rouge_2": summarization_scores["rouge-2"],
         "summarization_rouge_l": summarization_scores["rouge-l"],
     }
+    if latencies:
+        metrics["mean_latency_seconds"] = sum(latencies) / len(latencies)
+        metrics["max_latency_seconds"] = max(latencies)
+
+    pre_classifier = get_pre_classifier()
+    if pre_classifier is not None:
+        pre_classifier_metrics = evaluate_pre_classifier(
+            pre_classifier, data["article"].to_list(), data["is_business"].to_list()
+        )
+        metrics["pre_classifier_precision"] = pre_classifier_metrics["precision"]
+        metrics["pre_classifier_recall"] = pre_classifier_metrics["recall"]
+        metrics["pre_classifier_call_savings"] = pre_classifier_metrics["call_savings"]
 
     print("evaluation", metrics)  # TODO(11-bonus): Convert this to a structured log (use **metrics)
 
     return metrics
 
 
+def compare_extraction_modes(
+    data: pd.DataFrame, modes: Sequence[ExtractionMode] = ("modular", "fused", "hybrid")
+) -> pd.DataFrame:
+    """Run the evaluation for each extraction mode, and return the metrics per mode.
+
+    E.g. compare "chunked" with "modular" to benchmark the chunking of long articles, with
+    `configure_max_chunk_tokens` to set which articles count as long.
+    """
+    return pd.DataFrame({mode: run_evaluation(data, mode=mode) for mode in modes}).T
+
+
 if __name__ == "__main__":
     configure_structlog()
     configure_tracer()
@@ -1,11 +1,51 @@
-from typing import List, Literal, Optional, Tuple
+import asyncio
+import contextvars
+import hashlib
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import (
+    Any,
+    AsyncIterable,
+    AsyncIterator,
+    Callable,
+    Coroutine,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Literal,
+    Optional,
+    Set,
+    Tuple,
+    TypeVar,
+)
 
 import dotenv
 import structlog
+from instructor.dsl.partial import PartialLiteralMixin
 from opentelemetry import trace
-from pydantic import BaseModel, Field
-
-from llmops_training.news_reader.generation import generate_object
+from pydantic import BaseModel, Field, ValidationError, field_validator
+
+from llmops_training.news_reader.cascade import (
+    generate_step_object,
+    get_cascade_profiles,
+    is_validation_error,
+)
+from llmops_training.news_reader.circuit_breaker import CircuitOpenError
+from llmops_training.news_reader.classifier import get_pre_classifier
+from llmops_training.news_reader.dedup import Deduplication, deduplicate_articles
+from llmops_training.news_reader.generation import (
+    DEFAULT_MODEL_NAME,
+    get_instructor_mode,
+    get_router,
+    stream_object,
+)
+from llmops_training.news_reader.rate_limit import estimate_tokens
+from llmops_training.news_reader.scheduler import DagScheduler, Step
+from llmops_training.news_reader.store import get_article_hash, get_article_info_store
+from llmops_training.news_reader.watchlist import get_watchlist
 #from llmops_training.news_reader.logs import log_extraction_step, log_with_trace
 
 tracer = trace.get_tracer(__name__)
@@ -13,6 +53,8 @@ tracer = trace.get_tracer(__name__)
 
 dotenv.load_dotenv()
 
+T = TypeVar("T")
+
 
 class GeneralInfo(BaseModel):
     title: str = Field(..., description="The title of the article")
@@ -29,7 +71,7 @@ class BusinessesInvolved(BaseModel):
     )
 
 
-class BusinessSpecificInfo(BaseModel):
+class BusinessSpecificInfo(BaseModel, PartialLiteralMixin):
     business: str = Field(..., description="The business or company involved")
     stock_price_change: Literal["increase", "decrease", "none"] = Field(
         ...,
@@ -48,6 +90,26 @@ class BusinessSpecificInfo(BaseModel):
     )
 
 
+class BusinessesSpecificInfo(BaseModel):
+    business_info: List[BusinessSpecificInfo] = Field(
+        ..., description="Specific information for each of the businesses, one entry per business"
+    )
+
+    @field_validator("business_info", mode="before")
+    @classmethod
+    def drop_invalid_business_info(cls, value: Any) -> Any:
+        """Drop entries that fail validation, so that the valid ones are kept."""
+        if not isinstance(value, list):
+            return value
+        business_info = []
+        for info in value:
+            try:
+                business_info.append(BusinessSpecificInfo.model_validate(info))
+            except ValidationError:
+                pass
+        return business_info
+
+
 class ArticleInfo(BaseModel):
     title: str = Field(..., description="The title of the article")
     summary: str = Field(..., description="A single sentence summary of the article")
@@ -55,25 +117,94 @@ class ArticleInfo(BaseModel):
     business_info: List[BusinessSpecificInfo]
 
 
+class ArticleOverview(BaseModel):
+    title: str = Field(..., description="The title of the article")
+    summary: str = Field(..., description="A single sentence summary of the article")
+    is_about_business: bool = Field(..., description="Whether the article is about business")
+    businesses: List[str] = Field(
+        ...,
+        description="Which main businesses or companies are involved in the article, "
+        + "if it is about business",
+    )
+
+
+# "modular" makes a call per step, "fused" a single call for the whole ArticleInfo,
+# "hybrid" a single call for the overview plus a call per business, and "chunked" extracts
+# long articles chunk by chunk and merges the results
+ExtractionMode = Literal["modular", "fused", "hybrid", "chunked"]
+
+
+class DegradedArticleInfo(ArticleInfo):
+    """Placeholder article info, returned while the LLM service is unavailable."""
+
+    degraded: bool = Field(True, description="Whether the info is a placeholder")
+
+
+class IncompleteArticleInfo(ArticleInfo):
+    """Article info of which some steps failed, even after retries.
+
+    Fields that could not be extracted have placeholder values. `errors` has the error of
+    each of them, by field name, e.g. "title", or "business_info.Acme" for one business.
+    """
+
+    errors: Dict[str, str] = Field(..., description="Error of each field that failed")
+
+
+class PartialArticleInfo(BaseModel):
+    """Article info that is still being extracted, with only the fields known so far."""
+
+    title: Optional[str] = None
+    summary: Optional[str] = None
+    is_about_business: Optional[bool] = None
+    business_info: List[Dict[str, Any]] = Field(default_factory=list)
+
+
+# Prompt templates lead with the article and end with the step's instructions, so that all
+# requests for an article share it as a prefix, see `format_messages`. The prefix is only
+# cached with LLM_INSTRUCTOR_MODE=json_mode, see `generation.get_instructor_mode`
+
+
+def get_article_system_prompt_template() -> str:
+    return "You extract structured information from news articles. The article is:\n\n{article}"
+
+
 def get_general_info_prompt_template() -> str:
-    return "Extract structured information from the following article:\n{article}"
+    return "{article}\n\nExtract structured information from the article above."
 
 
 def get_business_category_prompt_template() -> str:
-    return "Extract structured information from the following article:\n{article}"
+    return "{article}\n\nExtract structured information from the article above."
 
 
 def get_businesses_involved_prompt_template() -> str:
-    return "Extract structured information from the following article:\n{article}"
+    return "{article}\n\nExtract structured information from the article above."
 
 
 def get_business_specific_prompt_template() -> str:
     return (
-        "Extract structured information for the business '{business}' "
-        + "from the following article:\n{article}"
+        "{article}\n\nExtract structured information for the business '{business}' "
+        + "from the article above."
+    )
+
+
+def get_businesses_specific_prompt_template() -> str:
+    return (
+        "{article}\n\nExtract structured information for each of the businesses {business} "
+        + "from the article above."
+    )
+
+
+def get_article_info_prompt_template() -> str:
+    return (
+        "{article}\n\nExtract structured information from the article above. "
+        + "Only if it is about business, add info for each main business involved."
     )
 
 
+def get_article_overview_prompt_template() -> str:
+    return "{article}\n\nExtract structured information from the article above."
+
+
 def format_prompt(prompt_template: str, article: str, business: Optional[str] = None) -> str:
     """Format the prompt with the article and business if provided"""
     assert "{article}" in prompt_template, "Prompt must contain placeholder '{article}'"
@@ -83,11 +214,31 @@ def format_prompt(prompt_template: str, article: str, business: Optional[str] =
     return prompt_template.format(article=article)
 
 
+def format_messages(
+    prompt_template: str, article: str, business: Optional[str] = None
+) -> List[Dict[str, str]]:
+    """Format the prompt as chat messages: the article first, and the instructions last
+
+    The article goes in a system message that is the same for every step, so that the calls
+    for an article share a prefix that the LLM service can cache. The rest of the template
+    goes in a user message.
+    """
+    assert "{article}" in prompt_template, "Prompt must contain placeholder '{article}'"
+    instructions = "".join(prompt_template.split("{article}", 1)).strip()
+    if business is not None:
+        assert "{business}" in prompt_template, "Prompt must contain placeholder '{business}'"
+        instructions = instructions.replace("{business}", business)
+    return [
+        {"role": "system", "content": get_article_system_prompt_template().format(article=article)},
+        {"role": "user", "content": instructions},
+    ]
+
+
 # ... # TODO(12-logging-traces): Fill me in! Wrap the function with a trace span
 def extract_general_info(prompt_template: str, article: str, **kwargs) -> GeneralInfo:
     """Extract general information from an article, such as title and summary"""
-    prompt = format_prompt(prompt_template, article)
-    output = generate_object(prompt, GeneralInfo, **kwargs)
+    prompt = format_messages(prompt_template, article)
+    output = generate_step_object("general_info", prompt, GeneralInfo, **kwargs)
 
     # ...  # TODO(12-log-with-trace): Fill me in! Log the extraction step
 
@@ -96,9 +247,18 @@ def extract_general_info(prompt_template: str, article: str, **kwargs) -> Genera
 
 # ... # TODO(12-logging-traces): Fill me in! Wrap the function with a trace span
 def extract_business_category(prompt_template: str, article: str, **kwargs) -> BusinessCategory:
-    """Extract whether an article is about business"""
-    prompt = format_prompt(prompt_template, article)
-    output = generate_object(prompt, BusinessCategory, **kwargs)
+    """Extract whether an article is about business
+
+    If the local pre-classifier is confident about the article, the LLM is not called.
+    """
+    pre_classifier = get_pre_classifier()
+    if pre_classifier is not None:
+        is_about_business = pre_classifier.classify(article)
+        if is_about_business is not None:
+            return BusinessCategory(is_about_business=is_about_business)
+
+    prompt = format_messages(prompt_template, article)
+    output = generate_step_object("business_category", prompt, BusinessCategory, **kwargs)
 
     # ...  # TODO(12-log-with-trace): Fill me in! Log the extraction step
 
@@ -108,8 +268,8 @@ def extract_business_category(prompt_template: str, article: str, **kwargs) -> B
 # ... # TODO(12-logging-traces): Fill me in! Wrap the function with a trace span
 def extract_businesses_involved(prompt_template: str, article: str, **kwargs) -> BusinessesInvolved:
     """Extract which businesses are involved in an article"""
-    prompt = format_prompt(prompt_template, article)
-    output = generate_object(prompt, BusinessesInvolved, **kwargs)
+    prompt = format_messages(prompt_template, article)
+    output = generate_step_object("businesses_involved", prompt, BusinessesInvolved, **kwargs)
 
     # ...  # TODO(12-log-with-trace): Fill me in! Log the extraction step
 
@@ -121,16 +281,45 @@ def extract_business_specific_info(
     prompt_template: str, article: str, business: str, **kwargs
 ) -> BusinessSpecificInfo:
     """Extract specific information about a business from an article, such as stock price change"""
-    prompt = format_prompt(prompt_template, article, business=business)
-    output = generate_object(prompt, BusinessSpecificInfo, **kwargs)
+    prompt = format_messages(prompt_template, article, business=business)
+    output = generate_step_object("business_specific_info", prompt, BusinessSpecificInfo, **kwargs)
 
     # ...  # TODO(12-log-with-trace): Fill me in! Log the extraction step
 
     return output
 
 
+def extract_fused_article_info(prompt_template: str, article: str, **kwargs) -> ArticleInfo:
+    """Extract all structured information from an article in a single call"""
+    prompt = format_messages(prompt_template, article)
+    output = generate_step_object("article_info", prompt, ArticleInfo, **kwargs)
+    output.business_info = [
+        info
+        for info in output.business_info
+        if output.is_about_business and is_business_we_care_about(info.business)
+    ]
+    return output
+
+
+def extract_article_overview(prompt_template: str, article: str, **kwargs) -> ArticleOverview:
+    """Extract title, summary, business category and businesses involved in a single call"""
+    prompt = format_messages(prompt_template, article)
+    return generate_step_object("article_overview", prompt, ArticleOverview, **kwargs)
+
+
 def is_business_we_care_about(business: str) -> bool:
-    return True  # Some logic here
+    """Return whether the business is on the watchlist, or True if there is no watchlist"""
+    watchlist = get_watchlist()
+    return watchlist is None or watchlist.contains(business)
+
+
+def _extract_business_step(
+    prompt_template: str, article: str, business: str, **kwargs
+) -> Optional[BusinessSpecificInfo]:
+    return _run_step(
+        [f"business_info.{business}"],
+        lambda: extract_business_specific_info(prompt_template, article, business, **kwargs),
+    )
 
 
 # ... # TODO(12-logging-traces): Fill me in! Wrap the function with a trace span
@@ -141,43 +330,445 @@ def extract_business_info(
     **kwargs,
 ) -> List[BusinessSpecificInfo]:
     """Extract information about businesses involved in an article"""
-    businesses = extract_businesses_involved(
-        businesses_involved_prompt_template, article
-    ).businesses
+    businesses_involved = _run_step(
+        ["business_info"],
+        lambda: extract_businesses_involved(businesses_involved_prompt_template, article, **kwargs),
+    )
     business_info = []
-    for business in businesses:
+    for business in businesses_involved.businesses if businesses_involved else []:
         if is_business_we_care_about(business):
-            business_info.append(
-                extract_business_specific_info(
-                    business_specific_prompt_template, article, business, **kwargs
-                )
+            info = _extract_business_step(
+                business_specific_prompt_template, article, business, **kwargs
             )
+            if info is not None:
+                business_info.append(info)
     return business_info
 
 
+_scheduler = DagScheduler(
+    max_workers=int(os.getenv("EXTRACTION_MAX_WORKERS", "8")),
+    max_fan_out_workers=int(os.getenv("EXTRACTION_MAX_FAN_OUT_WORKERS", "16")),
+)
+_batch_size = int(os.getenv("EXTRACTION_BATCH_SIZE", "8"))
+_max_chunk_tokens = int(os.getenv("EXTRACTION_MAX_CHUNK_TOKENS", "4000"))
+_max_concurrent_articles = int(os.getenv("EXTRACTION_MAX_CONCURRENT_ARTICLES", "8"))
+_article_timeout = float(os.getenv("EXTRACTION_ARTICLE_TIMEOUT", "300"))
+_dedup_threshold = (
+    float(os.environ["EXTRACTION_DEDUP_THRESHOLD"])
+    if os.getenv("EXTRACTION_DEDUP_THRESHOLD")
+    else None
+)
+
+
+_step_retry_budget = int(os.getenv("EXTRACTION_STEP_RETRY_BUDGET", "3"))
+
+
+class StepRecovery:
+    """Retries the failed steps of an article within a retry budget, shared by all its steps.
+
+    Steps that still fail are recorded as errors of the fields they extract, and their result
+    is None, so that the other steps of the article are kept. Thread-safe, as the steps of an
+    article may run concurrently.
+    """
+
+    def __init__(self, retry_budget: int):
+        self.retries_left = retry_budget
+        self.n_retries = 0
+        self.errors: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def run(
+        self, fields: List[str], func: Callable[[], T], error: Optional[Exception] = None
+    ) -> Optional[T]:
+        """Run a step, retrying it within the budget. Pass the `error` of a first attempt made
+        elsewhere, e.g. speculatively, to go straight to the retries."""
+        while True:
+            if isinstance(error, CircuitOpenError):
+                raise error  # The LLM service is unavailable, so retrying a step is no use
+            if error is None:
+                try:
+                    return func()
+                except Exception as e:
+                    error = e
+                    continue
+            with self._lock:
+                if self.retries_left <= 0:
+                    for field in fields:
+                        self.errors.setdefault(field, repr(error))
+                    return None
+                self.retries_left -= 1
+                self.n_retries += 1
+            error = None
+
+
+# Recovery of the article being extracted. Steps run in copies of the context, so they share it
+_step_recovery: contextvars.ContextVar[Optional[StepRecovery]] = contextvars.ContextVar(
+    "step_recovery", default=None
+)
+
+
+def _run_step(
+    fields: List[str], func: Callable[[], T], error: Optional[Exception] = None
+) -> Optional[T]:
+    """Run a step of an article, with step recovery if `extract_article_info` set it up."""
+    recovery = _step_recovery.get()
+    if recovery is not None:
+        return recovery.run(fields, func, error)
+    if error is not None:
+        raise error
+    return func()
+
+
+def _attempt(func: Callable[[], T]) -> T | Exception:
+    """Run a step without recovery, returning its exception instead of raising it.
+
+    For speculative steps: their result may be discarded, so a failure only counts once the
+    result is used, by passing it to `_run_step`.
+    """
+    try:
+        return func()
+    except Exception as e:
+        return e
+
+
+def get_scheduler() -> DagScheduler:
+    """Returns the scheduler that runs extraction steps concurrently."""
+    return _scheduler
+
+
+def extract_businesses_specific_info(
+    prompt_template: str, article: str, businesses: List[str], **kwargs
+) -> List[BusinessSpecificInfo]:
+    """Extract specific information about each business we care about, concurrently"""
+    business_info = _scheduler.map(
+        lambda business: _extract_business_step(prompt_template, article, business, **kwargs),
+        [business for business in businesses if is_business_we_care_about(business)],
+    )
+    return [info for info in business_info if info is not None]
+
+
+def extract_businesses_specific_info_batched(
+    prompt_template: str,
+    business_specific_prompt_template: str,
+    article: str,
+    businesses: List[str],
+    batch_size: Optional[int] = None,
+    concurrent: bool = True,
+    **kwargs,
+) -> List[BusinessSpecificInfo]:
+    """Extract specific information about the businesses we care about, in batched calls
+
+    Businesses are extracted in chunks of `batch_size`, with one call per chunk. Businesses
+    missing from the output of a chunk, e.g. because their entry failed validation, are
+    extracted one by one with `business_specific_prompt_template`. Under step recovery, so
+    are the businesses of a chunk whose call failed.
+    """
+    businesses = [business for business in businesses if is_business_we_care_about(business)]
+    batch_size = batch_size or _batch_size
+    chunks = [businesses[i : i + batch_size] for i in range(0, len(businesses), batch_size)]
+
+    def extract_chunk(chunk: List[str]) -> List[BusinessSpecificInfo]:
+        quoted = ", ".join(f"'{business}'" for business in chunk)
+        prompt = format_messages(prompt_template, article, business=quoted)
+        try:
+            output = generate_step_object(
+                "businesses_specific_info", prompt, BusinessesSpecificInfo, **kwargs
+            )
+        except CircuitOpenError:
+            raise
+        except Exception as e:
+            if not is_validation_error(e) and _step_recovery.get() is None:
+                raise
+            return []  # Fall back to a call per business
+        return output.business_info
+
+    chunk_outputs = (
+        _scheduler.map(extract_chunk, chunks) if concurrent else map(extract_chunk, chunks)
+    )
+    found: Dict[str, BusinessSpecificInfo] = {}
+    for info in (info for chunk_output in chunk_outputs for info in chunk_output):
+        found.setdefault(info.business.strip().casefold(), info)
+
+    missing = [business for business in businesses if business.strip().casefold() not in found]
+
+    def extract_missing(business: str) -> Optional[BusinessSpecificInfo]:
+        return _extract_business_step(
+            business_specific_prompt_template, article, business, **kwargs
+        )
+
+    fallback = dict(
+        zip(
+            missing,
+            _scheduler.map(extract_missing, missing)
+            if concurrent
+            else map(extract_missing, missing),
+        )
+    )
+    business_info = [
+        fallback[business] if business in fallback else found[business.strip().casefold()]
+        for business in businesses
+    ]
+    return [info for info in business_info if info is not None]
+
+
+def _extract_businesses_specific_info(
+    article: str, businesses: List[str], concurrent: bool, batch_businesses: bool, **kwargs
+) -> List[BusinessSpecificInfo]:
+    if batch_businesses:
+        return extract_businesses_specific_info_batched(
+            get_businesses_specific_prompt_template(),
+            get_business_specific_prompt_template(),
+            article,
+            businesses,
+            concurrent=concurrent,
+            **kwargs,
+        )
+    if concurrent:
+        return extract_businesses_specific_info(
+            get_business_specific_prompt_template(), article, businesses, **kwargs
+        )
+    business_info = [
+        _extract_business_step(get_business_specific_prompt_template(), article, business, **kwargs)
+        for business in businesses
+        if is_business_we_care_about(business)
+    ]
+    return [info for info in business_info if info is not None]
+
+
+def configure_max_chunk_tokens(max_chunk_tokens: int) -> None:
+    """Sets the size above which articles are split into chunks in the "chunked" mode."""
+    global _max_chunk_tokens
+    _max_chunk_tokens = max_chunk_tokens
+
+
+def split_article(article: str, max_tokens: int) -> List[str]:
+    """Split an article into chunks of at most `max_tokens`, on paragraph boundaries
+
+    Paragraphs longer than that are split on words.
+    """
+    paragraphs = []
+    for paragraph in article.splitlines():
+        if estimate_tokens(paragraph) <= max_tokens:
+            paragraphs.append(paragraph)
+            continue
+        words: List[str] = []
+        for word in paragraph.split():
+            if words and estimate_tokens(" ".join([*words, word])) > max_tokens:
+                paragraphs.append(" ".join(words))
+                words = []
+            words.append(word)
+        paragraphs.append(" ".join(words))
+
+    chunks: List[List[str]] = [[]]
+    for paragraph in paragraphs:
+        if chunks[-1] and estimate_tokens("\n".join([*chunks[-1], paragraph])) > max_tokens:
+            chunks.append([])
+        chunks[-1].append(paragraph)
+    return ["\n".join(chunk).strip() for chunk in chunks if "".join(chunk).strip()]
+
+
+# Options of `extract_article_info` that change how, but not what, info is extracted
+EXECUTION_OPTIONS = {"concurrent", "speculative", "use_cache", "use_store"}
+
+
+def get_pipeline_version(
+    mode: ExtractionMode = "modular", batch_businesses: bool = False, **kwargs
+) -> str:
+    """Return a hash of everything besides the article that determines its extracted info.
+
+    That is the prompt templates, response models of the steps, models, deployments and
+    generation options, the configuration of the mode, and the watchlist and pre-classifier.
+    Whether steps run concurrently does not change the output.
+    """
+    templates = [
+        get_article_system_prompt_template(),
+        get_general_info_prompt_template(),
+        get_business_category_prompt_template(),
+        get_businesses_involved_prompt_template(),
+        get_business_specific_prompt_template(),
+        get_businesses_specific_prompt_template(),
+        get_article_info_prompt_template(),
+        get_article_overview_prompt_template(),
+    ]
+    response_models = [
+        GeneralInfo,
+        BusinessCategory,
+        BusinessesInvolved,
+        BusinessSpecificInfo,
+        BusinessesSpecificInfo,
+        ArticleInfo,
+        ArticleOverview,
+    ]
+    router = get_router()
+    watchlist = get_watchlist()
+    pre_classifier = get_pre_classifier()
+    payload = {
+        "prompt_templates": [hashlib.sha256(t.encode("utf-8")).hexdigest() for t in templates],
+        "schemas": {model.__name__: model.model_json_schema() for model in response_models},
+        "default_model_name": DEFAULT_MODEL_NAME,
+        "deployments": [
+            deployment.model_dump(include={"name", "model_name", "endpoint", "api_version"})
+            for deployment in router.deployments
+        ]
+        if router
+        else [os.getenv("AZURE_OPENAI_ENDPOINT"), os.getenv("AZURE_OPENAI_API_VERSION")],
+        "instructor_mode": get_instructor_mode().value,
+        "generation": {key: value for key, value in kwargs.items() if key not in EXECUTION_OPTIONS},
+        "cascade_profiles": {
+            step: profile.model_dump() for step, profile in get_cascade_profiles().items()
+        },
+        "mode": mode,
+        "batch_size": _batch_size if batch_businesses else None,
+        "max_chunk_tokens": _max_chunk_tokens if mode == "chunked" else None,
+        "watchlist": watchlist.version if watchlist else None,
+        "pre_classifier": [
+            pre_classifier.lower,
+            pre_classifier.upper,
+            pre_classifier.classifier.fingerprint(),
+        ]
+        if pre_classifier
+        else None,
+    }
+    serialized = json.dumps(payload, sort_keys=True, default=str)
+    return hashlib.sha256(serialized.encode("utf-8")).hexdigest()[:16]
+
+
 # ... # TODO(12-logging-traces): Fill me in! Wrap the function with a trace span
-def extract_article_info(article: str, **kwargs) -> Tuple[ArticleInfo, int]:
+def extract_article_info(
+    article: str,
+    mode: ExtractionMode = "modular",
+    concurrent: bool = True,
+    speculative: bool = False,
+    batch_businesses: bool = False,
+    use_store: bool = True,
+    **kwargs,
+) -> Tuple[ArticleInfo, int]:
     """Return structured information from an article, and trace ID.
 
     This is a toy example of a modular approach to LLM apps. Some steps in our use case
     may become over-modularized, but it can be useful for more complex applications.
+    The "fused" and "hybrid" modes trade some of that modularity for fewer calls. The
+    "chunked" mode splits articles longer than `EXTRACTION_MAX_CHUNK_TOKENS` into chunks.
+
+    If `concurrent`, independent steps run concurrently and businesses are extracted in
+    parallel. If `speculative` as well, the businesses involved are extracted while the
+    business category is, and discarded if the article is not about business.
+
+    If `batch_businesses`, the info of all businesses is extracted in one call (per chunk)
+    instead of a call per business.
+
+    An article already extracted by the same pipeline is served from the article info store,
+    if one is configured, unless `use_store` is False.
+
+    A failed step is retried on its own, within a budget of `EXTRACTION_STEP_RETRY_BUDGET`
+    retries per article. If steps still fail, the info of the other steps is kept, and an
+    IncompleteArticleInfo with the error of each missing field is returned. The fused mode
+    has a single step, so its call is retried, but there is no partial info to keep.
     """
 
     # ...  # TODO(12-log-with-trace): Fill me in! Add informative logs with trace
 
-    general_info = extract_general_info(
-        get_general_info_prompt_template(),
-        article=article,
-        **kwargs,
+    store = get_article_info_store() if use_store else None
+    if store is not None:
+        key = (get_article_hash(article), get_pipeline_version(mode, batch_businesses, **kwargs))
+        stored = store.get(*key)
+        if stored is not None:
+            return ArticleInfo.model_validate_json(stored[0]), stored[1]
+
+    recovery = StepRecovery(_step_retry_budget)
+    token = _step_recovery.set(recovery)
+    try:
+        if mode == "fused":
+            article_info = _run_step(
+                ["title", "summary", "is_about_business", "business_info"],
+                lambda: extract_fused_article_info(
+                    get_article_info_prompt_template(), article=article, **kwargs
+                ),
+            ) or _make_article_info(None, None, [])
+        elif mode == "hybrid":
+            article_info = _extract_hybrid_article_info(
+                article, concurrent, batch_businesses, **kwargs
+            )
+        elif mode == "chunked":
+            article_info = _extract_chunked_article_info(
+                article, concurrent, batch_businesses, **kwargs
+            )
+        elif concurrent:
+            article_info = _extract_concurrent_article_info(
+                article, speculative, batch_businesses, **kwargs
+            )
+        else:
+            article_info = _extract_modular_article_info(article, batch_businesses, **kwargs)
+    except CircuitOpenError:
+        # The LLM service is unavailable, so fail fast with a flagged fallback
+        return degraded_extract_article_info(article)
+    finally:
+        _step_recovery.reset(token)
+    if recovery.errors:
+        article_info = IncompleteArticleInfo(
+            **article_info.model_dump(), errors=dict(sorted(recovery.errors.items()))
+        )
+
+    # TODO(13-feedback-with-trace): replace mock trace_id with
+    # trace.get_current_span().get_span_context().trace_id
+    trace_id = 1234567890  # Mock trace ID
+    if store is not None and not recovery.errors:
+        store.put(*key, article_info.model_dump_json(), trace_id)
+    return article_info, trace_id
+
+
+def _make_article_info(
+    general_info: Optional[GeneralInfo],
+    business_category: Optional[BusinessCategory],
+    business_info: List[BusinessSpecificInfo],
+) -> ArticleInfo:
+    """Assemble the article info, with placeholders for steps that failed under recovery."""
+    return ArticleInfo(
+        title=general_info.title if general_info else "",
+        summary=general_info.summary if general_info else "",
+        is_about_business=business_category.is_about_business if business_category else False,
+        business_info=business_info,
     )
-    business_category = extract_business_category(
-        get_business_category_prompt_template(),
-        article=article,
-        **kwargs,
+
+
+def _extract_general_info_step(article: str, **kwargs) -> Optional[GeneralInfo]:
+    return _run_step(
+        ["title", "summary"],
+        lambda: extract_general_info(get_general_info_prompt_template(), article, **kwargs),
     )
 
+
+def _extract_business_category_step(article: str, **kwargs) -> Optional[BusinessCategory]:
+    # Without the category, it is unknown whether there is business info to extract
+    return _run_step(
+        ["is_about_business", "business_info"],
+        lambda: extract_business_category(
+            get_business_category_prompt_template(), article, **kwargs
+        ),
+    )
+
+
+def _extract_modular_article_info(article: str, batch_businesses: bool, **kwargs) -> ArticleInfo:
+    general_info = _extract_general_info_step(article, **kwargs)
+    business_category = _extract_business_category_step(article, **kwargs)
+
     business_info = []
-    if business_category.is_about_business:
+    if business_category and business_category.is_about_business and batch_businesses:
+        businesses_involved = _run_step(
+            ["business_info"],
+            lambda: extract_businesses_involved(
+                get_businesses_involved_prompt_template(), article, **kwargs
+            ),
+        )
+        if businesses_involved is not None:
+            business_info = _extract_businesses_specific_info(
+                article,
+                businesses_involved.businesses,
+                concurrent=False,
+                batch_businesses=True,
+                **kwargs,
+            )
+    elif business_category and business_category.is_about_business:
         business_info = extract_business_info(
             get_businesses_involved_prompt_template(),
             get_business_specific_prompt_template(),
@@ -185,28 +776,326 @@ def extract_article_info(article: str, **kwargs) -> Tuple[ArticleInfo, int]:
             **kwargs,
         )
 
-    article_info = ArticleInfo(
+    return _make_article_info(general_info, business_category, business_info)
+
+
+def _extract_concurrent_article_info(
+    article: str, speculative: bool, batch_businesses: bool, **kwargs
+) -> ArticleInfo:
+    def extract_business_info_step(
+        businesses_involved: BusinessesInvolved | Exception,
+    ) -> List[BusinessSpecificInfo]:
+        if isinstance(businesses_involved, Exception):
+            businesses_involved = _run_step(
+                ["business_info"],
+                lambda: extract_businesses_involved(
+                    get_businesses_involved_prompt_template(), article, **kwargs
+                ),
+                error=businesses_involved,
+            )
+            if businesses_involved is None:
+                return []
+        return _extract_businesses_specific_info(
+            article,
+            businesses_involved.businesses,
+            concurrent=True,
+            batch_businesses=batch_businesses,
+            **kwargs,
+        )
+
+    steps = {
+        "general_info": Step(lambda _: _extract_general_info_step(article, **kwargs)),
+        "business_category": Step(lambda _: _extract_business_category_step(article, **kwargs)),
+        # The first attempt may be speculative and discarded, so its failure is only retried
+        # and recorded by the step that uses its result
+        "businesses_involved": Step(
+            lambda _: _attempt(
+                lambda: extract_businesses_involved(
+                    get_businesses_involved_prompt_template(), article, **kwargs
+                )
+            ),
+            depends_on=["business_category"],
+            condition=lambda results: bool(
+                results["business_category"] and results["business_category"].is_about_business
+            ),
+            speculative=speculative,
+        ),
+        "business_info": Step(
+            lambda results: extract_business_info_step(results["businesses_involved"]),
+            depends_on=["businesses_involved"],
+            condition=lambda results: results["businesses_involved"] is not None,
+        ),
+    }
+    results = _scheduler.run(steps)
+
+    return _make_article_info(
+        results["general_info"], results["business_category"], results["business_info"] or []
+    )
+
+
+def _extract_hybrid_article_info(
+    article: str, concurrent: bool, batch_businesses: bool, **kwargs
+) -> ArticleInfo:
+    overview = _run_step(
+        ["title", "summary", "is_about_business", "business_info"],
+        lambda: extract_article_overview(
+            get_article_overview_prompt_template(), article=article, **kwargs
+        ),
+    )
+    if overview is None:
+        return _make_article_info(None, None, [])
+
+    business_info = []
+    if overview.is_about_business:
+        business_info = _extract_businesses_specific_info(
+            article, overview.businesses, concurrent, batch_businesses, **kwargs
+        )
+
+    return ArticleInfo(
+        title=overview.title,
+        summary=overview.summary,
+        is_about_business=overview.is_about_business,
+        business_info=business_info,
+    )
+
+
+def _extract_chunked_article_info(
+    article: str, concurrent: bool, batch_businesses: bool, **kwargs
+) -> ArticleInfo:
+    """Map-reduce extraction: extract an overview of each chunk, then merge them.
+
+    Title, summary and business category are extracted from a digest of the chunk overviews.
+    Each business is extracted from the first chunk that involves it.
+    """
+    chunks = split_article(article, _max_chunk_tokens)
+    if len(chunks) <= 1:
+        if concurrent:
+            return _extract_concurrent_article_info(article, False, batch_businesses, **kwargs)
+        return _extract_modular_article_info(article, batch_businesses, **kwargs)
+
+    def map_chunks(func: Callable[[Any], T], items: List[Any]) -> List[T]:
+        return _scheduler.map(func, items) if concurrent else [func(item) for item in items]
+
+    # Under recovery, a chunk whose overview fails is left out of the summary and businesses
+    overviews = map_chunks(
+        lambda chunk: _run_step(
+            ["summary", "business_info"],
+            lambda: extract_article_overview(
+                get_article_overview_prompt_template(), chunk, **kwargs
+            ),
+        ),
+        chunks,
+    )
+    found_overviews = [overview for overview in overviews if overview is not None]
+    if not found_overviews:
+        return _make_article_info(None, None, [])
+    digest = "\n".join(
+        [found_overviews[0].title, *(overview.summary for overview in found_overviews)]
+    )
+    overview = _run_step(
+        ["title", "summary", "is_about_business", "business_info"],
+        lambda: extract_article_overview(get_article_overview_prompt_template(), digest, **kwargs),
+    )
+    if overview is None:
+        return _make_article_info(None, None, [])
+
+    # Deduplicate the businesses of all chunks, by the first chunk that involves them
+    chunk_businesses: Dict[str, Tuple[int, str]] = {}
+    for i, chunk_overview in enumerate(overviews):
+        for business in chunk_overview.businesses if chunk_overview else []:
+            if is_business_we_care_about(business):
+                chunk_businesses.setdefault(business.strip().casefold(), (i, business))
+
+    business_info: List[BusinessSpecificInfo] = []
+    if overview.is_about_business and batch_businesses:
+        businesses_per_chunk: Dict[int, List[str]] = {}
+        for i, business in chunk_businesses.values():
+            businesses_per_chunk.setdefault(i, []).append(business)
+        outputs = map_chunks(
+            lambda item: extract_businesses_specific_info_batched(
+                get_businesses_specific_prompt_template(),
+                get_business_specific_prompt_template(),
+                chunks[item[0]],
+                item[1],
+                concurrent=False,
+                **kwargs,
+            ),
+            list(businesses_per_chunk.items()),
+        )
+        business_info = [info for output in outputs for info in output]
+    elif overview.is_about_business:
+        outputs = map_chunks(
+            lambda item: _extract_business_step(
+                get_business_specific_prompt_template(), chunks[item[0]], item[1], **kwargs
+            ),
+            list(chunk_businesses.values()),
+        )
+        business_info = [info for info in outputs if info is not None]
+
+    return ArticleInfo(
+        title=overview.title,
+        summary=overview.summary,
+        is_about_business=overview.is_about_business,
+        business_info=business_info,
+    )
+
+
+def _stream_article_info(article: str, **kwargs) -> Iterator[PartialArticleInfo | ArticleInfo]:
+    info = PartialArticleInfo()
+    prompt = format_messages(get_general_info_prompt_template(), article)
+    for general_info in stream_object(prompt, GeneralInfo, **kwargs):
+        info = info.model_copy(
+            update={"title": general_info.title, "summary": general_info.summary}
+        )
+        yield info
+
+    business_category = extract_business_category(
+        get_business_category_prompt_template(), article, **kwargs
+    )
+    info = info.model_copy(update={"is_about_business": business_category.is_about_business})
+    yield info
+
+    business_info = []
+    if business_category.is_about_business:
+        businesses = extract_businesses_involved(
+            get_businesses_involved_prompt_template(), article, **kwargs
+        ).businesses
+        for business in businesses:
+            if not is_business_we_care_about(business):
+                continue
+            prompt = format_messages(get_business_specific_prompt_template(), article, business)
+            for business_specific_info in stream_object(prompt, BusinessSpecificInfo, **kwargs):
+                partial_business_info = [*info.business_info, business_specific_info.model_dump()]
+                yield info.model_copy(update={"business_info": partial_business_info})
+            business_info.append(business_specific_info)
+            info = info.model_copy(update={"business_info": partial_business_info})
+
+    yield ArticleInfo(
         title=general_info.title,
         summary=general_info.summary,
         is_about_business=business_category.is_about_business,
         business_info=business_info,
     )
 
-    # TODO(13-feedback-with-trace): replace mock trace_id with
-    # trace.get_current_span().get_span_context().trace_id
-    trace_id = 1234567890  # Mock trace ID
-    return article_info, trace_id
+
+def stream_article_info(article: str, **kwargs) -> Iterator[PartialArticleInfo | ArticleInfo]:
+    """Yield structured information from an article as soon as it is extracted.
+
+    Title, summary and the info of each business are streamed field by field. The last item
+    is the complete ArticleInfo, the same as returned by `extract_article_info`.
+    """
+    try:
+        yield from _stream_article_info(article, **kwargs)
+    except CircuitOpenError:
+        yield degraded_extract_article_info(article)[0]
+
+
+def configure_dedup_threshold(threshold: Optional[float]) -> None:
+    """Sets the Jaccard similarity above which articles in a batch are extracted only once.
+
+    Pass None to extract every article.
+    """
+    global _dedup_threshold
+    _dedup_threshold = threshold
+
+
+def _deduplicate(articles: List[str], threshold: Optional[float]) -> Optional[Deduplication]:
+    """Cluster near-duplicate articles, and report the deduplication ratio of the batch."""
+    threshold = threshold if threshold is not None else _dedup_threshold
+    if threshold is None:
+        return None
+    with tracer.start_as_current_span("deduplicate_articles") as span:
+        deduplication = deduplicate_articles(articles, threshold)
+        span.set_attributes(
+            {
+                "dedup.threshold": threshold,
+                "dedup.n_articles": len(articles),
+                "dedup.n_unique_articles": len(deduplication.unique_indices),
+                "dedup.ratio": deduplication.dedup_ratio,
+            }
+        )
+    return deduplication
+
+
+def _fan_out(
+    deduplication: Deduplication,
+    article_infos: List[Optional[ArticleInfo]],
+    trace_ids: List[int],
+) -> Tuple[List[Optional[ArticleInfo]], List[int]]:
+    """Give each near-duplicate article a copy of the info of its cluster's representative."""
+    return (
+        [info and info.model_copy(deep=True) for info in deduplication.fan_out(article_infos)],
+        deduplication.fan_out(trace_ids),
+    )
 
 
 def extract_info_from_articles(
     articles: List[str],
+    mode: ExtractionMode = "modular",
+    dedup_threshold: Optional[float] = None,
+) -> Tuple[List[Optional[ArticleInfo]], List[int]]:
+    """Return structured information from a list of articles, and trace IDs.
+
+    If a `dedup_threshold` is given or configured, near-duplicate articles are extracted once,
+    and share the info and trace ID of the first article of their cluster.
+    """
+    deduplication = _deduplicate(articles, dedup_threshold)
+    if deduplication is None:
+        return _extract_info_from_articles(articles, mode)
+    unique_articles = [articles[i] for i in deduplication.unique_indices]
+    return _fan_out(deduplication, *_extract_info_from_articles(unique_articles, mode))
+
+
+def _get_stored_article_infos(
+    articles: List[str], pipeline_version: str
+) -> List[Optional[Tuple[ArticleInfo, int]]]:
+    """Return the stored info and trace ID of each article, looked up in one query."""
+    store = get_article_info_store()
+    if store is None:
+        return [None] * len(articles)
+    article_hashes = [get_article_hash(article) for article in articles]
+    stored = store.get_many(article_hashes, pipeline_version)
+    return [
+        (ArticleInfo.model_validate_json(stored[article_hash][0]), stored[article_hash][1])
+        if article_hash in stored
+        else None
+        for article_hash in article_hashes
+    ]
+
+
+def _store_article_infos(
+    articles: List[str],
+    pipeline_version: str,
+    article_infos: List[Optional[ArticleInfo]],
+    trace_ids: List[int],
+) -> None:
+    """Store the info of articles that were extracted, except placeholders and incomplete info."""
+    store = get_article_info_store()
+    if store is None:
+        return
+    store.put_many(
+        (get_article_hash(article), pipeline_version, article_info.model_dump_json(), trace_id)
+        for article, article_info, trace_id in zip(articles, article_infos, trace_ids)
+        if article_info is not None
+        and not isinstance(article_info, (DegradedArticleInfo, IncompleteArticleInfo))
+    )
+
+
+def _extract_info_from_articles(
+    articles: List[str], mode: ExtractionMode
 ) -> Tuple[List[Optional[ArticleInfo]], List[int]]:
-    """Return structured information from a list of articles, and trace IDs."""
+    pipeline_version = get_pipeline_version(mode)
+    stored = _get_stored_article_infos(articles, pipeline_version)
     article_infos = []
     trace_ids = []
-    for article in articles:
+    for article, stored_result in zip(articles, stored):
+        if stored_result is not None:
+            article_infos.append(stored_result[0])
+            trace_ids.append(stored_result[1])
+            continue
         try:
-            article_info, trace_id = extract_article_info(article)
+            article_info, trace_id = extract_article_info(article, mode=mode, use_store=False)
+            _store_article_infos([article], pipeline_version, [article_info], [trace_id])
         except Exception as e:
             article_info = None
             trace_id = trace.get_current_span().get_span_context().trace_id
@@ -217,6 +1106,222 @@ def extract_info_from_articles(
     return article_infos, trace_ids
 
 
+async def _extract_article_info_async(
+    article: str,
+    executor: ThreadPoolExecutor,
+    semaphore: asyncio.Semaphore,
+    timeout: Optional[float],
+    **kwargs,
+) -> Tuple[ArticleInfo | Exception, int]:
+    async with semaphore:
+        with tracer.start_as_current_span("extract_article_info") as span:
+            trace_id = span.get_span_context().trace_id
+            # The extraction runs in a copy of this context, so its spans are nested in this one
+            future = asyncio.get_running_loop().run_in_executor(
+                executor,
+                contextvars.copy_context().run,
+                lambda: extract_article_info(article, **kwargs),
+            )
+            try:
+                article_info, _ = await asyncio.wait_for(future, timeout)
+                return article_info, trace_id
+            except Exception as e:
+                # On a timeout, the extraction runs on in the background and its output is dropped
+                span.record_exception(e)
+                return e, trace_id
+
+
+async def extract_info_from_articles_async(
+    articles: List[str],
+    mode: ExtractionMode = "modular",
+    max_concurrency: Optional[int] = None,
+    timeout: Optional[float] = None,
+    dedup_threshold: Optional[float] = None,
+    **kwargs,
+) -> Tuple[List[Optional[ArticleInfo]], List[int]]:
+    """Return structured information from a list of articles, and trace IDs.
+
+    Up to `max_concurrency` articles are extracted at a time, each within `timeout` seconds.
+    The outputs are in the order of the articles, with None for articles that failed or
+    timed out. Near-duplicate articles are extracted once, as in `extract_info_from_articles`.
+    """
+    deduplication = _deduplicate(articles, dedup_threshold)
+    if deduplication is None:
+        return await _extract_info_from_articles_async(
+            articles, mode, max_concurrency, timeout, **kwargs
+        )
+    article_infos, trace_ids = await _extract_info_from_articles_async(
+        [articles[i] for i in deduplication.unique_indices],
+        mode,
+        max_concurrency,
+        timeout,
+        **kwargs,
+    )
+    return _fan_out(deduplication, article_infos, trace_ids)
+
+
+async def _extract_info_from_articles_async(
+    articles: List[str],
+    mode: ExtractionMode,
+    max_concurrency: Optional[int],
+    timeout: Optional[float],
+    **kwargs,
+) -> Tuple[List[Optional[ArticleInfo]], List[int]]:
+    pipeline_version = get_pipeline_version(mode, **kwargs)
+    stored = _get_stored_article_infos(articles, pipeline_version)
+    missing = [article for article, stored_result in zip(articles, stored) if stored_result is None]
+
+    max_concurrency = max_concurrency or _max_concurrent_articles
+    timeout = timeout if timeout is not None else _article_timeout
+    semaphore = asyncio.Semaphore(max_concurrency)
+    executor = ThreadPoolExecutor(max_concurrency, thread_name_prefix="article")
+    try:
+        results = await asyncio.gather(
+            *(
+                _extract_article_info_async(
+                    article, executor, semaphore, timeout, mode=mode, use_store=False, **kwargs
+                )
+                for article in missing
+            )
+        )
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+    article_infos = [None if isinstance(info, Exception) else info for info, _ in results]
+    trace_ids = [trace_id for _, trace_id in results]
+    _store_article_infos(missing, pipeline_version, article_infos, trace_ids)
+
+    extracted = iter(zip(article_infos, trace_ids))
+    outputs = [stored_result or next(extracted) for stored_result in stored]
+    return [info for info, _ in outputs], [trace_id for _, trace_id in outputs]
+
+
+async def _enumerate(items: Iterable[T] | AsyncIterable[T]) -> AsyncIterator[Tuple[int, T]]:
+    """Enumerate a sync or async iterable asynchronously."""
+    if isinstance(items, AsyncIterable):
+        index = 0
+        async for item in items:
+            yield index, item
+            index += 1
+    else:
+        for index, item in enumerate(items):
+            yield index, item
+
+
+async def iter_extract_info_async(
+    articles: Iterable[str] | AsyncIterable[str],
+    mode: ExtractionMode = "modular",
+    max_concurrency: Optional[int] = None,
+    timeout: Optional[float] = None,
+    **kwargs,
+) -> AsyncIterator[Tuple[int, ArticleInfo | Exception, int]]:
+    """Yield the index, structured information and trace ID of articles as they complete.
+
+    Articles can come from any iterable, such as a lazy stream from a file or dataset. Up to
+    `max_concurrency` articles are in flight at a time, and the next ones are only read when
+    there is room, so memory stays bounded however many articles there are. An article that
+    fails or takes longer than `timeout` seconds yields its exception instead of its info.
+    """
+    max_concurrency = max_concurrency or _max_concurrent_articles
+    timeout = timeout if timeout is not None else _article_timeout
+    semaphore = asyncio.Semaphore(max_concurrency)
+    executor = ThreadPoolExecutor(max_concurrency, thread_name_prefix="article")
+
+    async def extract(index: int, article: str) -> Tuple[int, ArticleInfo | Exception, int]:
+        article_info, trace_id = await _extract_article_info_async(
+            article, executor, semaphore, timeout, mode=mode, **kwargs
+        )
+        return index, article_info, trace_id
+
+    remaining = _enumerate(articles)
+    pending: Set[asyncio.Task] = set()
+    is_exhausted = False
+    try:
+        while True:
+            while not is_exhausted and len(pending) < max_concurrency:
+                try:
+                    index, article = await anext(remaining)
+                except StopAsyncIteration:
+                    is_exhausted = True
+                    break
+                pending.add(asyncio.create_task(extract(index, article)))
+            if not pending:
+                return
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                yield task.result()
+    finally:
+        for task in pending:
+            task.cancel()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def iter_extract_info(
+    articles: Iterable[str],
+    mode: ExtractionMode = "modular",
+    max_concurrency: Optional[int] = None,
+    timeout: Optional[float] = None,
+    **kwargs,
+) -> Iterator[Tuple[int, ArticleInfo | Exception, int]]:
+    """Sync version of `iter_extract_info_async`, e.g. to write results as they complete.
+
+    The articles are extracted on an event loop in a background thread, which keeps running
+    the articles in flight while the caller handles a result.
+    """
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, name="iter-extract-info", daemon=True)
+    thread.start()
+    results = iter_extract_info_async(
+        articles, mode=mode, max_concurrency=max_concurrency, timeout=timeout, **kwargs
+    )
+
+    async def next_result() -> Tuple[int, ArticleInfo | Exception, int]:
+        return await anext(results)
+
+    try:
+        while True:
+            try:
+                yield asyncio.run_coroutine_threadsafe(next_result(), loop).result()
+            except StopAsyncIteration:
+                return
+    finally:
+        asyncio.run_coroutine_threadsafe(results.aclose(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
+
+
+def run_sync(coroutine: Coroutine[Any, Any, T]) -> T:
+    """Run a coroutine to completion from sync code, even if an event loop is running."""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coroutine)
+    # asyncio.run cannot be nested in a running loop, so use a new loop in another thread
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(contextvars.copy_context().run, asyncio.run, coroutine).result()
+
+
+def extract_info_from_articles_concurrently(
+    articles: List[str],
+    mode: ExtractionMode = "modular",
+    max_concurrency: Optional[int] = None,
+    timeout: Optional[float] = None,
+    dedup_threshold: Optional[float] = None,
+    **kwargs,
+) -> Tuple[List[Optional[ArticleInfo]], List[int]]:
+    """Sync version of `extract_info_from_articles_async`, e.g. for the Streamlit app."""
+    return run_sync(
+        extract_info_from_articles_async(
+            articles,
+            mode=mode,
+            max_concurrency=max_concurrency,
+            timeout=timeout,
+            dedup_threshold=dedup_threshold,
+            **kwargs,
+        )
+    )
+
+
 def extract_general_info_from_articles(
     prompt_template: str, articles: List[str]
 ) -> List[Optional[GeneralInfo]]:
@@ -253,6 +1358,22 @@ def extract_business_category_from_articles(
     return business_category_list
 
 
+def degraded_extract_article_info(article: str) -> Tuple[DegradedArticleInfo, int]:
+    """Returns a flagged placeholder of structured info from an article, and trace ID.
+
+    Used while the circuit breaker of the generation layer is open.
+    """
+    lines = article.strip().splitlines()
+    article_info = DegradedArticleInfo(
+        title=lines[0][:100] if lines else "",
+        summary="Not available, the LLM service is temporarily unavailable.",
+        is_about_business=False,
+        business_info=[],
+    )
+    trace_id = trace.get_current_span().get_span_context().trace_id
+    return article_info, trace_id
+
+
 def mock_extract_article_info(article: str) -> Tuple[ArticleInfo, int]:
     """Returns mock extraction of structured info from an article, and trace ID."""
     trace_id = 1234567890
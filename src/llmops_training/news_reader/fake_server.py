@@ -0,0 +1,520 @@
+"""Local fake LLM server that speaks the (Azure) OpenAI chat completions protocol.
+
+Useful as a reproducible target for load and throughput testing without spending quota. For
+requests with tools, as sent by Instructor in `Mode.TOOLS`, it answers with a tool call whose
+arguments are generated from the tool's JSON schema, so they validate against the response
+model. Requests for a JSON object, as sent in `Mode.JSON`, are answered likewise with content
+generated from the schema in the messages. Info about businesses is generated for the
+businesses quoted in the instructions, so that e.g. batched requests get an entry for each
+requested business. Requests with `stream` set are answered with server-sent events, chunk by
+chunk. Latency, injected 429s and errors, quotas and token usage are all configurable.
+
+Like Azure OpenAI, it caches prompt prefixes of `prompt_cache_min_tokens` or more, in steps of
+128 tokens, and reports the cached part of a prompt as `cached_tokens`. Tool definitions come
+before the messages in the prompt.
+
+Run it with `python -m llmops_training.news_reader.fake_server --port 8000` and point
+`AZURE_OPENAI_ENDPOINT` to `http://127.0.0.1:8000`.
+"""
+
+import argparse
+import json
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    get_args,
+    get_origin,
+)
+
+from pydantic import BaseModel, Field
+
+from llmops_training.news_reader.rate_limit import TokenBucket, estimate_tokens
+
+CHAT_COMPLETIONS_PATH = re.compile(r"^(/openai/deployments/[^/]+|/v1)?/chat/completions$")
+# Business names are quoted in the instructions, e.g. "for the businesses 'Acme', 'Globex'"
+BUSINESS_PATTERN = re.compile(r"'([^']+)'")
+
+
+class FakeServerConfig(BaseModel):
+    latency_median: float = Field(0.5, description="Median response latency in seconds")
+    latency_sigma: float = Field(0.5, description="Sigma of the log-normal latency distribution")
+    rate_limit_probability: float = Field(0.0, description="Probability of an injected 429")
+    error_probability: float = Field(0.0, description="Probability of an injected 500")
+    retry_after: float = Field(1.0, description="Retry-After seconds sent with 429s")
+    requests_per_minute: Optional[int] = Field(None, description="Enforced requests quota")
+    tokens_per_minute: Optional[int] = Field(None, description="Enforced tokens quota")
+    array_length: int = Field(2, description="Number of items in generated arrays")
+    stream_chunk_size: int = Field(8, description="Characters per streamed chunk")
+    stream_chunk_delay: float = Field(0.01, description="Seconds between streamed chunks")
+    prompt_cache_min_tokens: Optional[int] = Field(
+        1024, description="Minimum tokens of a cached prompt prefix, None to disable the cache"
+    )
+    field_values: Dict[str, Any] = Field(
+        default_factory=dict,
+        description="Fixed values of generated properties by name, e.g. is_about_business",
+    )
+    seed: Optional[int] = None
+
+
+def generate_from_schema(
+    schema: Dict[str, Any],
+    rng: random.Random,
+    defs: Optional[Dict[str, Any]] = None,
+    name: str = "value",
+    array_length: int = 2,
+    businesses: Sequence[str] = (),
+    field_values: Optional[Dict[str, Any]] = None,
+) -> Any:
+    """Generate a value that is valid for a JSON schema, as produced by Pydantic.
+
+    If `businesses` were requested, "business" properties are set to them, and an array of
+    objects with a "business" property gets an item per business. Properties in
+    `field_values` get the value given there.
+    """
+    field_values = field_values or {}
+    defs = {**(defs or {}), **schema.get("$defs", {})}
+    if "$ref" in schema:
+        return generate_from_schema(
+            defs[schema["$ref"].split("/")[-1]],
+            rng,
+            defs,
+            name,
+            array_length,
+            businesses,
+            field_values,
+        )
+    if "const" in schema:
+        return schema["const"]
+    if "enum" in schema:
+        return rng.choice(schema["enum"])
+    for key in ("anyOf", "oneOf", "allOf"):
+        if key in schema:
+            options = [option for option in schema[key] if option.get("type") != "null"]
+            return generate_from_schema(
+                options[0], rng, defs, name, array_length, businesses, field_values
+            )
+
+    schema_type = schema.get("type", "object")
+    if isinstance(schema_type, list):
+        schema_type = next(t for t in schema_type if t != "null")
+    if schema_type == "object":
+        return {
+            key: field_values[key]
+            if key in field_values
+            else generate_from_schema(value, rng, defs, key, array_length, businesses, field_values)
+            for key, value in schema.get("properties", {}).items()
+        }
+    if schema_type == "array":
+        items = schema.get("items", {})
+        if businesses and "business" in _resolve(items, defs).get("properties", {}):
+            return [
+                generate_from_schema(items, rng, defs, name, array_length, [business], field_values)
+                for business in businesses
+            ]
+        n_items = max(schema.get("minItems", 0), array_length)
+        n_items = min(n_items, schema.get("maxItems", n_items))
+        return [
+            generate_from_schema(items, rng, defs, name, array_length, businesses, field_values)
+            for _ in range(n_items)
+        ]
+    if schema_type == "string":
+        if name == "business" and businesses:
+            return businesses[0]
+        return f"Fake {name.replace('_', ' ')} {rng.randint(0, 999)}"
+    if schema_type == "integer":
+        return rng.randint(schema.get("minimum", 0), schema.get("maximum", 100))
+    if schema_type == "number":
+        return rng.uniform(schema.get("minimum", 0), schema.get("maximum", 1))
+    if schema_type == "boolean":
+        return rng.random() < 0.5
+    return None
+
+
+def _resolve(schema: Dict[str, Any], defs: Dict[str, Any]) -> Dict[str, Any]:
+    if "$ref" in schema:
+        return defs.get(schema["$ref"].split("/")[-1], {})
+    return schema
+
+
+def find_requested_businesses(body: Dict[str, Any]) -> List[str]:
+    """Return the quoted business names in the instructions, the last user message."""
+    user_messages = [m for m in body.get("messages", []) if m.get("role") == "user"]
+    if not user_messages:
+        return []
+    return BUSINESS_PATTERN.findall(str(user_messages[-1].get("content") or ""))
+
+
+PROMPT_CACHE_INCREMENT = 128
+
+
+def render_prompt(body: Dict[str, Any]) -> str:
+    """Return the text of the prompt of a request: the tool definitions, then the messages."""
+    text = "".join(str(message.get("content") or "") for message in body.get("messages", []))
+    return json.dumps(body.get("tools", [])) + text
+
+
+def count_prompt_tokens(body: Dict[str, Any]) -> int:
+    """Estimate the prompt tokens of a request, including the tool definitions."""
+    return estimate_tokens(render_prompt(body))
+
+
+def count_cached_tokens(prompt: str, prompt_cache: Set[int], min_tokens: int) -> int:
+    """Return how many leading tokens of the prompt are cached, and cache its prefixes.
+
+    The cache holds hashes of the prefixes that were seen before.
+    """
+    cached_tokens = 0
+    is_cached = True
+    for n_prefix_tokens in range(min_tokens, estimate_tokens(prompt) + 1, PROMPT_CACHE_INCREMENT):
+        prefix_hash = hash(prompt[: 4 * n_prefix_tokens])
+        is_cached = is_cached and prefix_hash in prompt_cache
+        if is_cached:
+            cached_tokens = n_prefix_tokens
+        prompt_cache.add(prefix_hash)
+    return cached_tokens
+
+
+def find_response_schema(body: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Return the JSON schema of a request for a JSON object, as sent by Instructor."""
+    response_format = body.get("response_format") or {}
+    if response_format.get("type") != "json_object":
+        return None
+    if "schema" in response_format:
+        return response_format["schema"]
+    for message in body.get("messages", []):
+        content = str(message.get("content") or "")
+        if "json_schema" in content:
+            start = content.index("{", content.index("json_schema"))
+            return json.JSONDecoder().raw_decode(content[start:])[0]
+    return {}
+
+
+def make_chat_completion(
+    body: Dict[str, Any], config: FakeServerConfig, rng: random.Random, cached_tokens: int = 0
+) -> Dict[str, Any]:
+    """Return a fake chat completion for a request body.
+
+    If the request has tools, the first (or the chosen) tool is called with generated arguments.
+    If it asks for a JSON object, the content is generated from the schema in the request.
+    Info about businesses is generated for the businesses quoted in the request.
+    """
+    message: Dict[str, Any] = {"role": "assistant", "content": None}
+    tools: List[Dict[str, Any]] = body.get("tools") or []
+    response_schema = find_response_schema(body)
+    businesses = find_requested_businesses(body)
+    if tools:
+        function = tools[0]["function"]
+        tool_choice = body.get("tool_choice")
+        if isinstance(tool_choice, dict):
+            function = next(
+                tool["function"]
+                for tool in tools
+                if tool["function"]["name"] == tool_choice["function"]["name"]
+            )
+        arguments = generate_from_schema(
+            function.get("parameters", {}),
+            rng,
+            array_length=config.array_length,
+            businesses=businesses,
+            field_values=config.field_values,
+        )
+        content = json.dumps(arguments)
+        message["tool_calls"] = [
+            {
+                "id": f"call_{uuid.uuid4().hex[:24]}",
+                "type": "function",
+                "function": {"name": function["name"], "arguments": content},
+            }
+        ]
+        finish_reason = "tool_calls"
+    elif response_schema is not None:
+        content = json.dumps(
+            generate_from_schema(
+                response_schema,
+                rng,
+                array_length=config.array_length,
+                businesses=businesses,
+                field_values=config.field_values,
+            )
+        )
+        message["content"] = content
+        finish_reason = "stop"
+    else:
+        content = f"Fake response {rng.randint(0, 999)}"
+        message["content"] = content
+        finish_reason = "stop"
+
+    prompt_tokens = count_prompt_tokens(body)
+    completion_tokens = estimate_tokens(content)
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model", "fake"),
+        "choices": [{"index": 0, "finish_reason": finish_reason, "message": message}],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+            "prompt_tokens_details": {"cached_tokens": cached_tokens},
+        },
+    }
+
+
+def make_chat_completion_chunks(
+    completion: Dict[str, Any], chunk_size: int, include_usage: bool = False
+) -> Iterator[Dict[str, Any]]:
+    """Split a chat completion into streamed chunks, as sent for requests with `stream` set."""
+    choice = completion["choices"][0]
+    message, finish_reason = choice["message"], choice["finish_reason"]
+
+    def make_chunk(delta: Dict[str, Any], finish_reason: Optional[str] = None) -> Dict[str, Any]:
+        return {
+            "id": completion["id"],
+            "object": "chat.completion.chunk",
+            "created": completion["created"],
+            "model": completion["model"],
+            "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+        }
+
+    if message.get("tool_calls"):
+        tool_call = message["tool_calls"][0]
+        arguments = tool_call["function"]["arguments"]
+        yield make_chunk(
+            {
+                "role": "assistant",
+                "tool_calls": [
+                    {
+                        "index": 0,
+                        "id": tool_call["id"],
+                        "type": "function",
+                        "function": {"name": tool_call["function"]["name"], "arguments": ""},
+                    }
+                ],
+            }
+        )
+        for start in range(0, len(arguments), chunk_size):
+            piece = arguments[start : start + chunk_size]
+            yield make_chunk({"tool_calls": [{"index": 0, "function": {"arguments": piece}}]})
+    else:
+        content = message["content"]
+        yield make_chunk({"role": "assistant", "content": ""})
+        for start in range(0, len(content), chunk_size):
+            yield make_chunk({"content": content[start : start + chunk_size]})
+
+    yield make_chunk({}, finish_reason)
+    if include_usage:
+        yield {**make_chunk({}), "choices": [], "usage": completion["usage"]}
+
+
+class FakeLLMServer(ThreadingHTTPServer):
+    """Threaded HTTP server answering chat completion requests with fake completions."""
+
+    daemon_threads = True
+
+    def __init__(self, config: FakeServerConfig, host: str = "127.0.0.1", port: int = 0):
+        super().__init__((host, port), FakeLLMRequestHandler)
+        self.config = config
+        self.rng = random.Random(config.seed)
+        self.n_requests = 0
+        self.n_rate_limited = 0
+        self.n_errors = 0
+        self.n_cached_tokens = 0
+        self.lock = threading.Lock()
+        self.prompt_cache: Set[int] = set()
+        self.request_bucket = (
+            TokenBucket(config.requests_per_minute) if config.requests_per_minute else None
+        )
+        self.token_bucket = (
+            TokenBucket(config.tokens_per_minute) if config.tokens_per_minute else None
+        )
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeLLMServer":
+        """Serve requests in a background thread."""
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self) -> "FakeLLMServer":
+        return self.start()
+
+    def __exit__(self, *args) -> None:
+        self.stop()
+
+    def handle_error(self, request, client_address) -> None:
+        if not isinstance(sys.exc_info()[1], (BrokenPipeError, ConnectionResetError)):
+            super().handle_error(request, client_address)  # Cancelled requests are expected
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "requests": self.n_requests,
+            "rate_limited": self.n_rate_limited,
+            "errors": self.n_errors,
+            "cached_tokens": self.n_cached_tokens,
+        }
+
+
+class FakeLLMRequestHandler(BaseHTTPRequestHandler):
+    server: FakeLLMServer
+
+    def log_message(self, format: str, *args) -> None:
+        pass  # Keep benchmark output clean
+
+    def do_POST(self) -> None:
+        if not CHAT_COMPLETIONS_PATH.match(self.path.split("?")[0]):
+            self._send_json(404, {"error": {"code": "404", "message": "Resource not found"}})
+            return
+
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        server, config = self.server, self.server.config
+        tokens = count_prompt_tokens(body) + body.get("max_completion_tokens", 0)
+
+        with server.lock:
+            server.n_requests += 1
+            rate_limited = server.rng.random() < config.rate_limit_probability
+            for bucket, amount in ((server.request_bucket, 1), (server.token_bucket, tokens)):
+                if bucket is not None and bucket.wait_time(amount) > 0:
+                    rate_limited = True
+            if not rate_limited:
+                for bucket, amount in ((server.request_bucket, 1), (server.token_bucket, tokens)):
+                    if bucket is not None:
+                        bucket.consume(amount)
+            failed = not rate_limited and server.rng.random() < config.error_probability
+            latency = server.rng.lognormvariate(0, config.latency_sigma) * config.latency_median
+            cached_tokens = 0
+            if not rate_limited and config.prompt_cache_min_tokens is not None:
+                cached_tokens = count_cached_tokens(
+                    render_prompt(body), server.prompt_cache, config.prompt_cache_min_tokens
+                )
+                server.n_cached_tokens += cached_tokens
+            completion = make_chat_completion(body, config, server.rng, cached_tokens)
+            if rate_limited:
+                server.n_rate_limited += 1
+            if failed:
+                server.n_errors += 1
+
+        if rate_limited:
+            message = "Requests have exceeded the rate limit of your current tier."
+            self._send_json(
+                429,
+                {"error": {"code": "429", "message": message}},
+                {"retry-after": str(config.retry_after)},
+            )
+            return
+
+        time.sleep(latency)
+        if failed:
+            self._send_json(500, {"error": {"code": "500", "message": "Injected server error"}})
+            return
+        if body.get("stream"):
+            include_usage = (body.get("stream_options") or {}).get("include_usage", False)
+            chunks = make_chat_completion_chunks(
+                completion, config.stream_chunk_size, include_usage
+            )
+            self._send_events(chunks, config.stream_chunk_delay)
+            return
+        self._send_json(200, completion)
+
+    def _send_json(
+        self, status_code: int, payload: Dict[str, Any], headers: Optional[Dict[str, str]] = None
+    ) -> None:
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status_code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for key, value in self._rate_limit_headers().items():
+            self.send_header(key, value)
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_events(self, chunks: Iterator[Dict[str, Any]], delay: float) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        for key, value in self._rate_limit_headers().items():
+            self.send_header(key, value)
+        self.end_headers()
+        for chunk in chunks:
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+            time.sleep(delay)
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+
+    def _rate_limit_headers(self) -> Dict[str, str]:
+        headers = {}
+        with self.server.lock:
+            if self.server.request_bucket is not None:
+                remaining = int(self.server.request_bucket.level)
+                headers["x-ratelimit-remaining-requests"] = str(max(remaining, 0))
+            if self.server.token_bucket is not None:
+                remaining = int(self.server.token_bucket.level)
+                headers["x-ratelimit-remaining-tokens"] = str(max(remaining, 0))
+        return headers
+
+
+def make_flag_parser(annotation: Any) -> Callable[[str], Any]:
+    """Return a parser of command line values for a config field with the type annotation.
+
+    Dicts are parsed as JSON, and optional fields can be set to None with "none".
+    """
+    is_optional = type(None) in get_args(annotation)
+    value_type = (
+        next(arg for arg in get_args(annotation) if arg is not type(None))
+        if is_optional
+        else annotation
+    )
+
+    def parse(value: str) -> Any:
+        if is_optional and value.lower() == "none":
+            return None
+        if (get_origin(value_type) or value_type) is dict:
+            return json.loads(value)
+        return value_type(value)
+
+    return parse
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a local fake LLM server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    for name, field in FakeServerConfig.model_fields.items():
+        is_optional = type(None) in get_args(field.annotation)
+        parser.add_argument(
+            f"--{name.replace('_', '-')}",
+            type=make_flag_parser(field.annotation),
+            default=field.get_default(call_default_factory=True),
+            help=f"{field.description or ''}{' (or none)' if is_optional else ''}",
+        )
+    args = vars(parser.parse_args())
+    host, port = args.pop("host"), args.pop("port")
+
+    server = FakeLLMServer(FakeServerConfig(**args), host=host, port=port)
+    print(f"Fake LLM server listening on {server.url}")
+    server.serve_forever()
@@ -1,87 +1,935 @@
+import asyncio
+import atexit
+import itertools
 import os
+import threading
+import weakref
+from json import JSONDecodeError
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    TypeVar,
+)
 
 import dotenv
+import httpx
 import instructor
-from instructor.client import Instructor
-from openai import AzureOpenAI
-from pydantic import BaseModel
+from instructor.client import AsyncInstructor, Instructor
+from openai import AsyncAzureOpenAI, AzureOpenAI, DefaultAsyncHttpxClient, DefaultHttpxClient
+from pydantic import BaseModel, ValidationError
+from tenacity import AsyncRetrying, Retrying, retry_if_exception_type, stop_after_attempt
+
+from llmops_training.news_reader.cache import (
+    ResponseCache,
+    SingleFlight,
+    get_default_cache,
+    make_cache_key,
+)
+from llmops_training.news_reader.circuit_breaker import CircuitBreaker, CircuitState
+from llmops_training.news_reader.hedging import HedgingPolicy
+from llmops_training.news_reader.logs import log_with_trace
+from llmops_training.news_reader.rate_limit import RateLimiter, estimate_request_tokens
+from llmops_training.news_reader.routing import Deployment, DeploymentRouter, load_deployments
+from llmops_training.news_reader.usage import UsageStats, is_json_response
 
 dotenv.load_dotenv()
 
+T = TypeVar("T")
+
+# Model (or deployment) name of requests that do not choose one
+DEFAULT_MODEL_NAME = "o3-mini"
+
+# A prompt is a single user message, or a list of chat messages, e.g. to lead with a system
+# message that several requests share as a cacheable prefix
+Prompt = str | List[Dict[str, str]]
+
+
+def make_messages(prompt: Prompt) -> List[Dict[str, str]]:
+    """Returns the chat messages of a prompt, as a new list that Instructor can modify."""
+    if isinstance(prompt, str):
+        return [{"role": "user", "content": prompt}]
+    return [dict(message) for message in prompt]
+
+
+class ClientRegistry:
+    """Thread-safe registry of pooled Azure OpenAI and Instructor clients.
+
+    Creating a client per call means a new connection pool and TLS handshake for every
+    request. Instead, clients are created once per (endpoint, api_version, mode) and
+    share a keep-alive connection pool, until `close` is called.
+
+    Async connections are bound to the event loop that opened them, so async clients are
+    pooled per running event loop as well.
+
+    `on_response` is called with every HTTP response, e.g. to read rate limit headers. JSON
+    bodies are read before, so that it can read them too.
+    """
+
+    def __init__(
+        self,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 30.0,
+        max_retries: int = 2,
+        on_response: Optional[Callable[[httpx.Response], None]] = None,
+    ):
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.max_retries = max_retries
+        self.on_response = on_response
+        self._lock = threading.Lock()
+        self._azure_clients: Dict[Tuple[str, str], AzureOpenAI] = {}
+        self._instructor_clients: Dict[Tuple[str, str, instructor.Mode], Instructor] = {}
+        self._async_clients: weakref.WeakKeyDictionary[
+            asyncio.AbstractEventLoop, Dict[Tuple, AsyncAzureOpenAI | AsyncInstructor]
+        ] = weakref.WeakKeyDictionary()
+
+    def _response_hooks(self) -> list:
+        if self.on_response is None:
+            return []
+
+        def on_response(response: httpx.Response) -> None:
+            if is_json_response(response):
+                response.read()  # So that `on_response` can read it, e.g. for the token usage
+            self.on_response(response)
+
+        return [on_response]
+
+    def _async_response_hooks(self) -> list:
+        if self.on_response is None:
+            return []
+
+        async def on_response(response: httpx.Response) -> None:
+            if is_json_response(response):
+                await response.aread()
+            self.on_response(response)
+
+        return [on_response]
+
+    def get_azure_client(
+        self, endpoint: str, api_version: str, api_key: Optional[str] = None
+    ) -> AzureOpenAI:
+        """Returns the pooled Azure OpenAI client for an endpoint, creating it if needed."""
+        key = (endpoint, api_version)
+        with self._lock:
+            if key not in self._azure_clients:
+                self._azure_clients[key] = AzureOpenAI(
+                    api_key=api_key or os.environ["AZURE_OPENAI_API_KEY"],
+                    api_version=api_version,
+                    azure_endpoint=endpoint,
+                    max_retries=self.max_retries,
+                    http_client=DefaultHttpxClient(
+                        limits=self.limits, event_hooks={"response": self._response_hooks()}
+                    ),
+                )
+            return self._azure_clients[key]
+
+    def get_instructor_client(
+        self,
+        endpoint: str,
+        api_version: str,
+        mode: instructor.Mode = instructor.Mode.TOOLS,
+        api_key: Optional[str] = None,
+    ) -> Instructor:
+        """Returns the pooled Instructor client for an endpoint and mode."""
+        azure_client = self.get_azure_client(endpoint, api_version, api_key)
+        key = (endpoint, api_version, mode)
+        with self._lock:
+            if key not in self._instructor_clients:
+                self._instructor_clients[key] = instructor.from_openai(
+                    client=azure_client, mode=mode
+                )
+            return self._instructor_clients[key]
+
+    def get_async_azure_client(
+        self, endpoint: str, api_version: str, api_key: Optional[str] = None
+    ) -> AsyncAzureOpenAI:
+        """Returns the pooled async Azure OpenAI client for the running event loop."""
+        key = (endpoint, api_version)
+        with self._lock:
+            loop_clients = self._async_clients.setdefault(asyncio.get_running_loop(), {})
+            if key not in loop_clients:
+                loop_clients[key] = AsyncAzureOpenAI(
+                    api_key=api_key or os.environ["AZURE_OPENAI_API_KEY"],
+                    api_version=api_version,
+                    azure_endpoint=endpoint,
+                    max_retries=self.max_retries,
+                    http_client=DefaultAsyncHttpxClient(
+                        limits=self.limits,
+                        event_hooks={"response": self._async_response_hooks()},
+                    ),
+                )
+            return loop_clients[key]
+
+    def get_async_instructor_client(
+        self,
+        endpoint: str,
+        api_version: str,
+        mode: instructor.Mode = instructor.Mode.TOOLS,
+        api_key: Optional[str] = None,
+    ) -> AsyncInstructor:
+        """Returns the pooled async Instructor client for the running event loop."""
+        azure_client = self.get_async_azure_client(endpoint, api_version, api_key)
+        key = (endpoint, api_version, mode)
+        with self._lock:
+            loop_clients = self._async_clients[asyncio.get_running_loop()]
+            if key not in loop_clients:
+                loop_clients[key] = instructor.from_openai(client=azure_client, mode=mode)
+            return loop_clients[key]
+
+    def close(self) -> None:
+        """Closes all pooled clients and their connections.
+
+        Async clients cannot be awaited here, so they are only released. Use `aclose` from
+        within the event loop to close them gracefully.
+        """
+        with self._lock:
+            for azure_client in self._azure_clients.values():
+                azure_client.close()
+            self._azure_clients.clear()
+            self._instructor_clients.clear()
+            self._async_clients.clear()
+
+    async def aclose(self) -> None:
+        """Closes the pooled async clients of the running event loop."""
+        with self._lock:
+            loop_clients = self._async_clients.pop(asyncio.get_running_loop(), {})
+        for client in loop_clients.values():
+            if isinstance(client, AsyncAzureOpenAI):
+                await client.close()
 
-def get_azure_client() -> AzureOpenAI:
-    return AzureOpenAI(
-        api_key=os.environ["AZURE_OPENAI_API_KEY"],
-        api_version=os.environ["AZURE_OPENAI_API_VERSION"],
-        azure_endpoint=os.environ["AZURE_OPENAI_ENDPOINT"],
+
+_rate_limiter = RateLimiter(
+    requests_per_minute=int(os.getenv("AZURE_OPENAI_RPM", "0")) or None,
+    tokens_per_minute=int(os.getenv("AZURE_OPENAI_TPM", "0")) or None,
+)
+
+
+def configure_rate_limiter(rate_limiter: RateLimiter) -> None:
+    """Replaces the rate limiter shared by the generation functions."""
+    global _rate_limiter
+    _rate_limiter = rate_limiter
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Returns the rate limiter shared by the generation functions."""
+    return _rate_limiter
+
+
+# Optional router across multiple deployments, each with its own rate limiter
+_router: Optional[DeploymentRouter] = (
+    DeploymentRouter(load_deployments(os.environ["AZURE_OPENAI_DEPLOYMENTS_FILE"]))
+    if os.getenv("AZURE_OPENAI_DEPLOYMENTS_FILE")
+    else None
+)
+
+
+def configure_router(router: Optional[DeploymentRouter]) -> None:
+    """Routes requests across the router's deployments. Pass None to use the environment's."""
+    global _router
+    _router = router
+
+
+def get_router() -> Optional[DeploymentRouter]:
+    """Returns the deployment router used by the generation functions, if any."""
+    return _router
+
+
+# Optional hedging of slow structured generation requests
+_hedging_policy: Optional[HedgingPolicy] = (
+    HedgingPolicy(
+        percentile=float(os.getenv("LLM_HEDGE_PERCENTILE", "95")),
+        budget=float(os.environ["LLM_HEDGE_BUDGET"]),
     )
+    if os.getenv("LLM_HEDGE_BUDGET")
+    else None
+)
 
 
-def generate_text(prompt: str, model_name: str = "o3-mini", **kwargs) -> str:
-    """Generates text from a prompt using the specified model."""
-    azure_client = get_azure_client()
+def configure_hedging(hedging_policy: Optional[HedgingPolicy]) -> None:
+    """Hedges slow structured generation requests with the policy. Pass None to disable."""
+    global _hedging_policy
+    _hedging_policy = hedging_policy
+
+
+def get_hedging_policy() -> Optional[HedgingPolicy]:
+    """Returns the hedging policy used by the generation functions, if any."""
+    return _hedging_policy
+
+
+def _log_circuit_state_change(
+    old_state: CircuitState, new_state: CircuitState, consecutive_failures: int
+) -> None:
+    log_with_trace(
+        "circuit_breaker_state_change",
+        level="INFO" if new_state == "closed" else "WARNING",
+        json_payload={
+            "old_state": old_state,
+            "new_state": new_state,
+            "consecutive_failures": consecutive_failures,
+        },
+    )
+
+
+# Fails fast while the LLM service keeps failing, instead of waiting through retries
+_circuit_breaker: Optional[CircuitBreaker] = CircuitBreaker(
+    failure_threshold=int(os.getenv("LLM_CIRCUIT_FAILURE_THRESHOLD", "5")),
+    recovery_timeout=float(os.getenv("LLM_CIRCUIT_RECOVERY_SECONDS", "30")),
+    on_state_change=_log_circuit_state_change,
+)
+
+
+def configure_circuit_breaker(circuit_breaker: Optional[CircuitBreaker]) -> None:
+    """Replaces the circuit breaker around the generation requests. Pass None to disable."""
+    global _circuit_breaker
+    _circuit_breaker = circuit_breaker
+
 
+def get_circuit_breaker() -> Optional[CircuitBreaker]:
+    """Returns the circuit breaker around the generation requests, if any."""
+    return _circuit_breaker
+
+
+def _with_circuit_breaker(func: Callable[..., T]) -> Callable[..., T]:
+    """Wraps each attempt of a request in the circuit breaker, so it sees every retried error."""
+    circuit_breaker = _circuit_breaker
+    if circuit_breaker is None:
+        return func
+    return lambda *args: circuit_breaker.call(lambda: func(*args))
+
+
+def _with_circuit_breaker_async(
+    func: Callable[..., Awaitable[T]],
+) -> Callable[..., Awaitable[T]]:
+    """Asynchronous version of _with_circuit_breaker function."""
+    circuit_breaker = _circuit_breaker
+    if circuit_breaker is None:
+        return func
+    return lambda *args: circuit_breaker.call_async(lambda: func(*args))
+
+
+def _observe_response(response: httpx.Response) -> None:
+    rate_limiter = None
+    if _router is not None:
+        rate_limiter = _router.get_rate_limiter_for_url(response.request.url)
+    (rate_limiter or _rate_limiter).observe_response(response)
+    _usage_stats.observe_response(response)
+
+
+_usage_stats = UsageStats()
+
+# Requests with different response models only share a cached prefix in "json_mode", which
+# puts the response schema after the system message. The default "tool_call" mode sends the
+# schema as a tool, which comes before the messages
+_instructor_mode = instructor.Mode(os.getenv("LLM_INSTRUCTOR_MODE", instructor.Mode.TOOLS.value))
+
+
+def get_instructor_mode() -> instructor.Mode:
+    """Returns the mode in which instructor asks models for structured outputs."""
+    return _instructor_mode
+
+
+def get_usage_stats() -> UsageStats:
+    """Returns the token usage of all responses, including cached prompt tokens."""
+    return _usage_stats
+
+
+# Retries are handled by the rate limiter, which also honors the quota while waiting
+_registry = ClientRegistry(
+    max_connections=int(os.getenv("AZURE_OPENAI_MAX_CONNECTIONS", "100")),
+    max_keepalive_connections=int(os.getenv("AZURE_OPENAI_MAX_KEEPALIVE_CONNECTIONS", "20")),
+    max_retries=0,
+    on_response=_observe_response,
+)
+
+
+def configure_client_pool(
+    max_connections: int = 100,
+    max_keepalive_connections: int = 20,
+    keepalive_expiry: float = 30.0,
+) -> None:
+    """Replaces the client registry with one using the given connection pool limits.
+
+    Clients of the previous registry are closed.
+    """
+    global _registry
+    _registry.close()
+    _registry = ClientRegistry(
+        max_connections,
+        max_keepalive_connections,
+        keepalive_expiry,
+        max_retries=0,
+        on_response=_observe_response,
+    )
+
+
+def close_clients() -> None:
+    """Closes all pooled clients. New clients are created on the next call."""
+    _registry.close()
+
+
+async def close_clients_async() -> None:
+    """Closes the pooled async clients of the running event loop."""
+    await _registry.aclose()
+
+
+atexit.register(close_clients)
+
+_cache: Optional[ResponseCache] = get_default_cache()
+
+
+def configure_cache(cache: Optional[ResponseCache]) -> None:
+    """Replaces the response cache used by the generation functions. Pass None to disable."""
+    global _cache
+    _cache = cache
+
+
+def get_cache() -> Optional[ResponseCache]:
+    """Returns the response cache used by the generation functions, if any."""
+    return _cache
+
+
+def get_generation_config(**kwargs) -> Dict[str, Any]:
+    """Returns the default generation config, updated with the given arguments."""
     generation_config = {
         "temperature": 1,
         "max_completion_tokens": 4096,
     }
     generation_config.update(kwargs)
-    response = azure_client.chat.completions.create(
-        ... # TODO: Fill me in!
+    return generation_config
+
+
+def get_cached_response(key: str, use_cache: bool = True) -> Optional[str]:
+    """Returns the cached response for a cache key, if caching is enabled and it exists."""
+    if not use_cache or _cache is None:
+        return None
+    return _cache.get(key)
+
+
+def cache_response(key: str, value: Optional[str], use_cache: bool = True) -> None:
+    """Stores a response in the cache, if caching is enabled."""
+    if use_cache and _cache is not None and value is not None:
+        _cache.set(key, value)
+
+
+_single_flight = SingleFlight()
+
+
+def get_single_flight() -> SingleFlight:
+    """Returns the coalescer of identical in-flight requests, e.g. to inspect its stats."""
+    return _single_flight
+
+
+def get_azure_client(
+    endpoint: Optional[str] = None, api_version: Optional[str] = None
+) -> AzureOpenAI:
+    """Returns a pooled Azure OpenAI client, by default for the endpoint in the environment."""
+    return _registry.get_azure_client(
+        endpoint or os.environ["AZURE_OPENAI_ENDPOINT"],
+        api_version or os.environ["AZURE_OPENAI_API_VERSION"],
+    )
+
+
+def _create_text(prompt: Prompt, model_name: str, generation_config: Dict[str, Any]) -> str:
+    """Sends a single chat completion request, within the rate limits."""
+    tokens = estimate_request_tokens(prompt, generation_config)
+    if _router is not None:
+        response = _router.call(
+            model_name,
+            _with_circuit_breaker(
+                lambda deployment: _registry.get_azure_client(
+                    deployment.endpoint, deployment.api_version, deployment.api_key
+                ).chat.completions.create(
+                    model=deployment.name, messages=make_messages(prompt), **generation_config
+                )
+            ),
+            tokens=tokens,
+        )
+        return response.choices[0].message.content
+
+    azure_client = get_azure_client()
+    response = _rate_limiter.call(
+        _with_circuit_breaker(
+            lambda: azure_client.chat.completions.create(
+                model=model_name, messages=make_messages(prompt), **generation_config
+            )
+        ),
+        tokens=tokens,
     )
     return response.choices[0].message.content
 
 
-def get_instructor_client() -> Instructor:
+def generate_text(
+    prompt: Prompt, model_name: str = DEFAULT_MODEL_NAME, use_cache: bool = True, **kwargs
+) -> str:
+    """Generates text from a prompt using the specified model.
+
+    Identical requests are served from the response cache, unless `use_cache` is False.
+    Identical requests that are already in flight are coalesced into one.
+    """
+    generation_config = get_generation_config(**kwargs)
+    key = make_cache_key(model_name, prompt, generation_config=generation_config)
+    cached = get_cached_response(key, use_cache)
+    if cached is not None:
+        return cached
+
+    def create() -> str:
+        return _create_text(prompt, model_name, generation_config)
+
+    text = _single_flight.do(key, create) if use_cache else create()
+    cache_response(key, text, use_cache)
+    return text
+
+
+def get_async_azure_client(
+    endpoint: Optional[str] = None, api_version: Optional[str] = None
+) -> AsyncAzureOpenAI:
+    """Returns a pooled async Azure OpenAI client for the running event loop."""
+    return _registry.get_async_azure_client(
+        endpoint or os.environ["AZURE_OPENAI_ENDPOINT"],
+        api_version or os.environ["AZURE_OPENAI_API_VERSION"],
+    )
+
+
+async def _create_text_async(
+    prompt: Prompt, model_name: str, generation_config: Dict[str, Any]
+) -> str:
+    """Asynchronous version of _create_text function."""
+    tokens = estimate_request_tokens(prompt, generation_config)
+    if _router is not None:
+        response = await _router.call_async(
+            model_name,
+            _with_circuit_breaker_async(
+                lambda deployment: _registry.get_async_azure_client(
+                    deployment.endpoint, deployment.api_version, deployment.api_key
+                ).chat.completions.create(
+                    model=deployment.name, messages=make_messages(prompt), **generation_config
+                )
+            ),
+            tokens=tokens,
+        )
+        return response.choices[0].message.content
+
+    azure_client = get_async_azure_client()
+    response = await _rate_limiter.call_async(
+        _with_circuit_breaker_async(
+            lambda: azure_client.chat.completions.create(
+                model=model_name, messages=make_messages(prompt), **generation_config
+            )
+        ),
+        tokens=tokens,
+    )
+    return response.choices[0].message.content
+
+
+async def generate_text_async(
+    prompt: Prompt, model_name: str = DEFAULT_MODEL_NAME, use_cache: bool = True, **kwargs
+) -> str:
+    """Asynchronous version of generate_text function."""
+    generation_config = get_generation_config(**kwargs)
+    key = make_cache_key(model_name, prompt, generation_config=generation_config)
+    cached = get_cached_response(key, use_cache)
+    if cached is not None:
+        return cached
+
+    def create() -> Awaitable[str]:
+        return _create_text_async(prompt, model_name, generation_config)
+
+    text = await (_single_flight.do_async(key, create) if use_cache else create())
+    cache_response(key, text, use_cache)
+    return text
+
+
+def get_instructor_client(
+    endpoint: Optional[str] = None,
+    api_version: Optional[str] = None,
+    mode: Optional[instructor.Mode] = None,
+) -> Instructor:
     """Returns an Instructor client for the specified model.
 
     This client can be used to generate structured Pydantic objects from prompts.
+    Clients are pooled, so repeated calls reuse the same connections.
     See: https://python.useinstructor.com/
     """
+    return _registry.get_instructor_client(
+        endpoint or os.environ["AZURE_OPENAI_ENDPOINT"],
+        api_version or os.environ["AZURE_OPENAI_API_VERSION"],
+        mode or _instructor_mode,
+    )
+
+
+def get_async_instructor_client(
+    endpoint: Optional[str] = None,
+    api_version: Optional[str] = None,
+    mode: Optional[instructor.Mode] = None,
+) -> AsyncInstructor:
+    """Returns an async Instructor client for the running event loop.
+
+    Awaiting this client does not block the event loop, so many calls can run concurrently.
+    """
+    return _registry.get_async_instructor_client(
+        endpoint or os.environ["AZURE_OPENAI_ENDPOINT"],
+        api_version or os.environ["AZURE_OPENAI_API_VERSION"],
+        mode or _instructor_mode,
+    )
 
-    azure_client = get_azure_client()
-    client = instructor.from_openai(client=azure_client, mode=instructor.Mode.TOOLS)
-    return client
+
+def get_validation_retrying(
+    max_retries: int | Retrying | AsyncRetrying, is_async: bool = False
+) -> Retrying | AsyncRetrying:
+    """Returns Instructor's retry policy, re-asking only when the output fails validation.
+
+    Instructor retries any error by default, but API errors are already retried with backoff
+    by the rate limiter, and retrying them here as well would multiply the attempts.
+    """
+    if isinstance(max_retries, (Retrying, AsyncRetrying)):
+        return max_retries
+    retrying_class = AsyncRetrying if is_async else Retrying
+    return retrying_class(
+        stop=stop_after_attempt(max_retries),
+        retry=retry_if_exception_type((ValidationError, JSONDecodeError)),
+        reraise=True,
+    )
+
+
+def _get_instructor_kwargs(
+    generation_config: Dict[str, Any], is_async: bool = False
+) -> Dict[str, Any]:
+    """Returns the generation config with a new retry policy, which calls cannot share."""
+    max_retries = get_validation_retrying(generation_config.get("max_retries", 3), is_async)
+    return {**generation_config, "max_retries": max_retries}
+
+
+def _create_object(
+    prompt: Prompt,
+    response_model: BaseModel,
+    model_name: str,
+    generation_config: Dict[str, Any],
+) -> BaseModel:
+    """Sends a single structured generation request, within the rate limits."""
+    tokens = estimate_request_tokens(prompt, generation_config, response_model.model_json_schema())
+    used_deployments: List[Deployment] = []
+
+    def create_with_deployment(deployment: Deployment) -> BaseModel:
+        used_deployments.append(deployment)
+        client = _registry.get_instructor_client(
+            deployment.endpoint,
+            deployment.api_version,
+            mode=_instructor_mode,
+            api_key=deployment.api_key,
+        )
+        return client.create(
+            model=deployment.name,
+            messages=make_messages(prompt),
+            response_model=response_model,
+            **_get_instructor_kwargs(generation_config),
+        )
+
+    def create(is_hedge: bool = False) -> BaseModel:
+        if _router is not None:
+            # A hedge goes to another deployment than the request it races, if there is one
+            exclude = used_deployments[:1] if is_hedge else []
+            return _router.call(
+                model_name,
+                _with_circuit_breaker(create_with_deployment),
+                tokens=tokens,
+                exclude=exclude,
+            )
+
+        client = get_instructor_client()
+        return _rate_limiter.call(
+            _with_circuit_breaker(
+                lambda: client.create(
+                    model=model_name,
+                    messages=make_messages(prompt),
+                    response_model=response_model,
+                    **_get_instructor_kwargs(generation_config),
+                )
+            ),
+            tokens=tokens,
+        )
+
+    if _hedging_policy is not None:
+        return _hedging_policy.call(create)
+    return create()
 
 
 def generate_object(
-    prompt: str, response_model: BaseModel, model_name: str = "o3-mini", **kwargs
+    prompt: Prompt,
+    response_model: BaseModel,
+    model_name: str = DEFAULT_MODEL_NAME,
+    use_cache: bool = True,
+    **kwargs,
 ) -> BaseModel:
-    """Uses the Instructor client to generate a structured Pydantic object from a prompt."""
-    client = get_instructor_client()
+    """Uses the Instructor client to generate a structured Pydantic object from a prompt.
 
-    generation_config = {
-        "temperature": 1,
-        "max_completion_tokens": 4096,
-    }
-    generation_config.update(kwargs)
-    return client.create(
-        model=model_name,
-        messages=[{"role": "user", "content": prompt}],
-        response_model=response_model,
-        **generation_config,
-    )
+    Identical requests are rehydrated from the response cache, unless `use_cache` is False.
+    Identical requests that are already in flight are coalesced into one.
+    """
+    generation_config = get_generation_config(**kwargs)
+    key = make_cache_key(model_name, prompt, response_model.model_json_schema(), generation_config)
+    cached = get_cached_response(key, use_cache)
+    if cached is not None:
+        return response_model.model_validate_json(cached)
+
+    def create() -> BaseModel:
+        return _create_object(prompt, response_model, model_name, generation_config)
+
+    output = _single_flight.do(key, create) if use_cache else create()
+    cache_response(key, output.model_dump_json(), use_cache)
+    return output
+
+
+async def _create_object_async(
+    prompt: Prompt,
+    response_model: BaseModel,
+    model_name: str,
+    generation_config: Dict[str, Any],
+) -> BaseModel:
+    """Asynchronous version of _create_object function."""
+    tokens = estimate_request_tokens(prompt, generation_config, response_model.model_json_schema())
+    used_deployments: List[Deployment] = []
+
+    def create_with_deployment(deployment: Deployment) -> Awaitable[BaseModel]:
+        used_deployments.append(deployment)
+        client = _registry.get_async_instructor_client(
+            deployment.endpoint,
+            deployment.api_version,
+            mode=_instructor_mode,
+            api_key=deployment.api_key,
+        )
+        return client.create(
+            model=deployment.name,
+            messages=make_messages(prompt),
+            response_model=response_model,
+            **_get_instructor_kwargs(generation_config, is_async=True),
+        )
+
+    async def create(is_hedge: bool = False) -> BaseModel:
+        if _router is not None:
+            exclude = used_deployments[:1] if is_hedge else []
+            return await _router.call_async(
+                model_name,
+                _with_circuit_breaker_async(create_with_deployment),
+                tokens=tokens,
+                exclude=exclude,
+            )
+
+        client = get_async_instructor_client()
+        return await _rate_limiter.call_async(
+            _with_circuit_breaker_async(
+                lambda: client.create(
+                    model=model_name,
+                    messages=make_messages(prompt),
+                    response_model=response_model,
+                    **_get_instructor_kwargs(generation_config, is_async=True),
+                )
+            ),
+            tokens=tokens,
+        )
+
+    if _hedging_policy is not None:
+        return await _hedging_policy.call_async(create)
+    return await create()
 
 
 async def generate_object_async(
-    prompt: str,
+    prompt: Prompt,
     response_model: BaseModel,
-    model_name: str = "o3-mini",
+    model_name: str = DEFAULT_MODEL_NAME,
+    use_cache: bool = True,
     **kwargs,
 ) -> BaseModel:
     """Asynchronous version of generate_object function.
 
     For more info, see: https://python.useinstructor.com/blog/2023/11/13/learn-async/
     """
+    generation_config = get_generation_config(**kwargs)
+    key = make_cache_key(model_name, prompt, response_model.model_json_schema(), generation_config)
+    cached = get_cached_response(key, use_cache)
+    if cached is not None:
+        return response_model.model_validate_json(cached)
+
+    def create() -> Awaitable[BaseModel]:
+        return _create_object_async(prompt, response_model, model_name, generation_config)
+
+    output = await (_single_flight.do_async(key, create) if use_cache else create())
+    cache_response(key, output.model_dump_json(), use_cache)
+    return output
+
+
+def _start_stream(stream: Iterator[T]) -> Iterator[T]:
+    """Waits for the first item of a stream, so errors in sending the request are raised here."""
+    first = next(stream)
+    return itertools.chain([first], stream)
+
+
+async def _start_stream_async(stream: AsyncIterator[T]) -> AsyncIterator[T]:
+    """Asynchronous version of _start_stream function."""
+    first = await anext(stream)
+
+    async def chain() -> AsyncIterator[T]:
+        yield first
+        async for item in stream:
+            yield item
+
+    return chain()
+
+
+def _create_partial(
+    prompt: Prompt,
+    response_model: BaseModel,
+    model_name: str,
+    generation_config: Dict[str, Any],
+) -> Iterator[BaseModel]:
+    """Starts a single streamed structured generation request, within the rate limits.
+
+    API errors before the first partial object are retried. Errors halfway through the stream
+    are not, as its partial objects have already been consumed.
+    """
+    tokens = estimate_request_tokens(prompt, generation_config, response_model.model_json_schema())
+    if _router is not None:
+        return _router.call(
+            model_name,
+            _with_circuit_breaker(
+                lambda deployment: _start_stream(
+                    _registry.get_instructor_client(
+                        deployment.endpoint,
+                        deployment.api_version,
+                        mode=_instructor_mode,
+                        api_key=deployment.api_key,
+                    ).create_partial(
+                        model=deployment.name,
+                        messages=make_messages(prompt),
+                        response_model=response_model,
+                        **_get_instructor_kwargs(generation_config),
+                    )
+                )
+            ),
+            tokens=tokens,
+        )
+
     client = get_instructor_client()
-    generation_config = {
-        "temperature": 1,
-        "max_completion_tokens": 4096,
-    }
-    generation_config.update(kwargs)
-    return await client.create(
-        model=model_name,
-        messages=[{"role": "user", "content": prompt}],
-        response_model=response_model,
-        **generation_config,
+    return _rate_limiter.call(
+        _with_circuit_breaker(
+            lambda: _start_stream(
+                client.create_partial(
+                    model=model_name,
+                    messages=make_messages(prompt),
+                    response_model=response_model,
+                    **_get_instructor_kwargs(generation_config),
+                )
+            )
+        ),
+        tokens=tokens,
+    )
+
+
+def stream_object(
+    prompt: Prompt,
+    response_model: BaseModel,
+    model_name: str = DEFAULT_MODEL_NAME,
+    use_cache: bool = True,
+    **kwargs,
+) -> Iterator[BaseModel]:
+    """Streams partial structured objects from a prompt, as soon as fields are generated.
+
+    The partial objects have all fields optional. The last item is the complete object,
+    validated against `response_model`. It shares the response cache with `generate_object`,
+    so a cache hit yields only the complete object. Streams are not coalesced.
+    """
+    generation_config = get_generation_config(**kwargs)
+    key = make_cache_key(model_name, prompt, response_model.model_json_schema(), generation_config)
+    cached = get_cached_response(key, use_cache)
+    if cached is not None:
+        yield response_model.model_validate_json(cached)
+        return
+
+    partial = None
+    stream = _create_partial(prompt, response_model, model_name, generation_config)
+    for partial in stream:
+        yield partial
+
+    output = response_model.model_validate(partial.model_dump() if partial else {})
+    cache_response(key, output.model_dump_json(), use_cache)
+    yield output
+
+
+async def _create_partial_async(
+    prompt: Prompt,
+    response_model: BaseModel,
+    model_name: str,
+    generation_config: Dict[str, Any],
+) -> AsyncIterator[BaseModel]:
+    """Asynchronous version of _create_partial function."""
+    tokens = estimate_request_tokens(prompt, generation_config, response_model.model_json_schema())
+    if _router is not None:
+        return await _router.call_async(
+            model_name,
+            _with_circuit_breaker_async(
+                lambda deployment: _start_stream_async(
+                    _registry.get_async_instructor_client(
+                        deployment.endpoint,
+                        deployment.api_version,
+                        mode=_instructor_mode,
+                        api_key=deployment.api_key,
+                    ).create_partial(
+                        model=deployment.name,
+                        messages=make_messages(prompt),
+                        response_model=response_model,
+                        **_get_instructor_kwargs(generation_config, is_async=True),
+                    )
+                )
+            ),
+            tokens=tokens,
+        )
+
+    client = get_async_instructor_client()
+    return await _rate_limiter.call_async(
+        _with_circuit_breaker_async(
+            lambda: _start_stream_async(
+                client.create_partial(
+                    model=model_name,
+                    messages=make_messages(prompt),
+                    response_model=response_model,
+                    **_get_instructor_kwargs(generation_config, is_async=True),
+                )
+            )
+        ),
+        tokens=tokens,
     )
+
+
+async def stream_object_async(
+    prompt: Prompt,
+    response_model: BaseModel,
+    model_name: str = DEFAULT_MODEL_NAME,
+    use_cache: bool = True,
+    **kwargs,
+) -> AsyncIterator[BaseModel]:
+    """Asynchronous version of stream_object function."""
+    generation_config = get_generation_config(**kwargs)
+    key = make_cache_key(model_name, prompt, response_model.model_json_schema(), generation_config)
+    cached = get_cached_response(key, use_cache)
+    if cached is not None:
+        yield response_model.model_validate_json(cached)
+        return
+
+    partial = None
+    stream = await _create_partial_async(prompt, response_model, model_name, generation_config)
+    async for partial in stream:
+        yield partial
+
+    output = response_model.model_validate(partial.model_dump() if partial else {})
+    cache_response(key, output.model_dump_json(), use_cache)
+    yield output
@@ -0,0 +1,183 @@
+"""Hedged requests: cut tail latency by racing a duplicate request against a slow one.
+
+If a request has not completed after a delay, set to a high percentile of recent request
+latencies, a duplicate (hedge) request is sent. The first successful response wins and the
+other request is cancelled. Hedges are only sent within a budget, e.g. at most 5% extra
+requests, so that a slow deployment is not flooded with duplicates.
+"""
+
+import asyncio
+import contextvars
+import statistics
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Awaitable, Callable, Dict, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class HedgingPolicy:
+    """Thread-safe policy deciding when to hedge a request, and running the race.
+
+    `func` is called with `is_hedge`, so that a hedge can e.g. go to another deployment.
+    """
+
+    def __init__(
+        self,
+        percentile: float = 95,
+        budget: float = 0.05,
+        min_delay: float = 0.5,
+        initial_delay: float = 10.0,
+        min_samples: int = 20,
+        window: int = 1000,
+        max_workers: int = 64,
+    ):
+        if not 1 <= percentile <= 99:
+            raise ValueError(f"Percentile must be between 1 and 99, got {percentile}")
+        self.percentile = percentile
+        self.budget = budget
+        self.min_delay = min_delay
+        self.initial_delay = initial_delay
+        self.min_samples = min_samples
+        self._latencies: deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="hedge")
+        self.n_requests = 0
+        self.n_hedges = 0
+        self.n_hedges_won = 0
+
+    def delay(self) -> float:
+        """Return the delay after which to hedge: a percentile of the recent latencies."""
+        with self._lock:
+            if len(self._latencies) < self.min_samples:
+                return self.initial_delay
+            quantiles = statistics.quantiles(self._latencies, n=100, method="inclusive")
+            return max(self.min_delay, quantiles[int(self.percentile) - 1])
+
+    def record_latency(self, latency: float) -> None:
+        with self._lock:
+            self._latencies.append(latency)
+
+    def _start_request(self) -> None:
+        with self._lock:
+            self.n_requests += 1
+
+    def _try_start_hedge(self) -> bool:
+        """Return whether a hedge fits in the budget, counting it if it does."""
+        with self._lock:
+            if self.n_hedges + 1 > self.budget * self.n_requests:
+                return False
+            self.n_hedges += 1
+            return True
+
+    def _record_hedge_won(self) -> None:
+        with self._lock:
+            self.n_hedges_won += 1
+
+    def _timed(self, func: Callable[[bool], T], is_hedge: bool) -> T:
+        start = time.monotonic()
+        output = func(is_hedge)
+        self.record_latency(time.monotonic() - start)
+        return output
+
+    def _start_primary(self, func: Callable[[bool], T]) -> Future:
+        """Run the primary request in a thread of its own, so that it never waits for a worker."""
+        future: Future = Future()
+        # In a copy of the caller's context, e.g. so that the request belongs to its trace span
+        context = contextvars.copy_context()
+
+        def run() -> None:
+            future.set_running_or_notify_cancel()
+            try:
+                future.set_result(context.run(self._timed, func, False))
+            except BaseException as e:
+                future.set_exception(e)
+
+        threading.Thread(target=run, name="hedge-primary", daemon=True).start()
+        return future
+
+    def _submit_hedge(self, func: Callable[[bool], T]) -> Future:
+        context = contextvars.copy_context()
+        return self._executor.submit(context.run, self._timed, func, True)
+
+    def call(self, func: Callable[[bool], T]) -> T:
+        """Call `func`, hedging it with a second call if it is slow and the budget allows.
+
+        Threads cannot be interrupted, so the losing call runs to completion in the background
+        and its output is discarded. Only hedges run in the pool of `max_workers` threads.
+        """
+        self._start_request()
+        primary = self._start_primary(func)
+        done, _ = wait([primary], timeout=self.delay())
+        if done or not self._try_start_hedge():
+            return primary.result()
+
+        hedge = self._submit_hedge(func)
+        pending = {primary, hedge}
+        error: Optional[BaseException] = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is not None:
+                    error = error or future.exception()
+                    continue
+                self._cancel(pending)
+                if future is hedge:
+                    self._record_hedge_won()
+                return future.result()
+        raise error
+
+    @staticmethod
+    def _cancel(futures: set[Future]) -> None:
+        for future in futures:
+            future.cancel()
+
+    async def _timed_async(self, func: Callable[[bool], Awaitable[T]], is_hedge: bool) -> T:
+        start = time.monotonic()
+        output = await func(is_hedge)
+        self.record_latency(time.monotonic() - start)
+        return output
+
+    async def call_async(self, func: Callable[[bool], Awaitable[T]]) -> T:
+        """Asynchronous version of `call`, where the losing call is cancelled."""
+        self._start_request()
+        primary = asyncio.ensure_future(self._timed_async(func, False))
+        done, _ = await asyncio.wait([primary], timeout=self.delay())
+        if done or not self._try_start_hedge():
+            return await primary
+
+        hedge = asyncio.ensure_future(self._timed_async(func, True))
+        pending = {primary, hedge}
+        error: Optional[BaseException] = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is not None:
+                        error = error or task.exception()
+                        continue
+                    if task is hedge:
+                        self._record_hedge_won()
+                    return task.result()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def stats(self) -> Dict[str, float]:
+        """Return how often hedges were sent and won."""
+        with self._lock:
+            n_requests, n_hedges, n_won = self.n_requests, self.n_hedges, self.n_hedges_won
+        return {
+            "requests": n_requests,
+            "hedges": n_hedges,
+            "hedges_won": n_won,
+            "hedge_rate": n_hedges / n_requests if n_requests else 0.0,
+            "hedge_win_rate": n_won / n_hedges if n_hedges else 0.0,
+            "delay": self.delay(),
+        }
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,217 @@
+"""Client-side rate limiting for Azure OpenAI requests-per-minute and tokens-per-minute quotas.
+
+Azure estimates the tokens of a request up front from the prompt and `max_completion_tokens`,
+and rejects requests with a 429 once the quota is exhausted. The limiter mirrors that estimate
+to throttle before sending, keeps in sync with the `x-ratelimit-remaining-*` response headers,
+and retries 429s with jittered exponential backoff, honoring `Retry-After`.
+"""
+
+import asyncio
+import json
+import random
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, TypeVar
+
+import httpx
+import openai
+from instructor.exceptions import InstructorRetryException
+
+T = TypeVar("T")
+
+RETRYABLE_ERRORS = (openai.RateLimitError, openai.APIConnectionError, openai.InternalServerError)
+
+
+def estimate_tokens(text: str) -> int:
+    """Roughly estimate the number of tokens in a text (about 4 characters per token)."""
+    return max(1, len(text) // 4)
+
+
+def estimate_request_tokens(
+    prompt: str | List[Dict[str, str]],
+    generation_config: Dict[str, Any],
+    response_schema: Optional[Dict[str, Any]] = None,
+) -> int:
+    """Estimate the tokens a request counts towards the quota: prompt, schema and completion.
+
+    The prompt is a text or a list of chat messages.
+    """
+    if not isinstance(prompt, str):
+        prompt = "".join(message["content"] for message in prompt)
+    tokens = estimate_tokens(prompt) + generation_config.get("max_completion_tokens", 0)
+    if response_schema is not None:
+        tokens += estimate_tokens(json.dumps(response_schema))
+    return tokens
+
+
+def unwrap_exception(exception: BaseException) -> BaseException:
+    """Return the underlying API error if Instructor wrapped it in its retry exception."""
+    if isinstance(exception, InstructorRetryException) and exception.args:
+        if isinstance(exception.args[0], BaseException):
+            return exception.args[0]
+    return exception
+
+
+class TokenBucket:
+    """Bucket that refills continuously up to `capacity` units per minute."""
+
+    def __init__(self, capacity: float):
+        self.capacity = capacity
+        self.level = capacity
+        self._updated_at = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self._updated_at) * self.capacity / 60)
+        self._updated_at = now
+
+    def wait_time(self, amount: float) -> float:
+        """Return the seconds until `amount` units are available."""
+        self._refill()
+        amount = min(amount, self.capacity)
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) * 60 / self.capacity
+
+    def consume(self, amount: float) -> None:
+        self._refill()
+        self.level -= min(amount, self.capacity)
+
+    def sync(self, remaining: float) -> None:
+        """Lower the level to what the server reports as remaining."""
+        self._refill()
+        self.level = min(self.level, remaining)
+
+
+class RateLimiter:
+    """Thread-safe limiter shared by the sync and async generation paths.
+
+    Limits are optional: without them the limiter only honors server feedback and retries.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: Optional[int] = None,
+        tokens_per_minute: Optional[int] = None,
+        max_retries: int = 5,
+        base_delay: float = 1.0,
+        max_delay: float = 60.0,
+    ):
+        self.request_bucket = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self.token_bucket = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.n_requests = 0
+        self.n_rate_limited = 0
+        self.n_retries = 0
+        self.throttled_seconds = 0.0
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def _reserve(self, tokens: int) -> float:
+        """Reserve capacity for a request, or return how long to wait before trying again."""
+        with self._lock:
+            wait = max(0.0, self._blocked_until - time.monotonic())
+            if self.request_bucket is not None:
+                wait = max(wait, self.request_bucket.wait_time(1))
+            if self.token_bucket is not None:
+                wait = max(wait, self.token_bucket.wait_time(tokens))
+            if wait > 0:
+                return wait
+            if self.request_bucket is not None:
+                self.request_bucket.consume(1)
+            if self.token_bucket is not None:
+                self.token_bucket.consume(tokens)
+            self.n_requests += 1
+            return 0.0
+
+    def acquire(self, tokens: int = 1) -> None:
+        """Block until the request fits within the quota."""
+        while (wait := self._reserve(tokens)) > 0:
+            self.throttled_seconds += wait
+            time.sleep(wait)
+
+    async def acquire_async(self, tokens: int = 1) -> None:
+        """Wait, without blocking the event loop, until the request fits within the quota."""
+        while (wait := self._reserve(tokens)) > 0:
+            self.throttled_seconds += wait
+            await asyncio.sleep(wait)
+
+    def observe_response(self, response: httpx.Response) -> None:
+        """Update the limiter from the rate limit headers of an Azure OpenAI response."""
+        headers = response.headers
+        with self._lock:
+            remaining_requests = headers.get("x-ratelimit-remaining-requests")
+            if remaining_requests is not None and self.request_bucket is not None:
+                self.request_bucket.sync(float(remaining_requests))
+            remaining_tokens = headers.get("x-ratelimit-remaining-tokens")
+            if remaining_tokens is not None and self.token_bucket is not None:
+                self.token_bucket.sync(float(remaining_tokens))
+            if response.status_code == 429:
+                self.n_rate_limited += 1
+                retry_after = get_retry_after(headers)
+                if retry_after is not None:
+                    self._blocked_until = max(self._blocked_until, time.monotonic() + retry_after)
+
+    def backoff_delay(self, attempt: int, exception: BaseException) -> float:
+        """Return the delay before a retry: `Retry-After` if given, else jittered backoff."""
+        response = getattr(exception, "response", None)
+        retry_after = get_retry_after(response.headers) if response is not None else None
+        if retry_after is not None:
+            return retry_after + random.uniform(0, self.base_delay)
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+
+    def call(self, func: Callable[[], T], tokens: int = 1) -> T:
+        """Call `func` within the quota, retrying rate limited and transient errors."""
+        for attempt in range(self.max_retries + 1):
+            self.acquire(tokens)
+            try:
+                return func()
+            except Exception as e:
+                error = unwrap_exception(e)
+                if not isinstance(error, RETRYABLE_ERRORS) or attempt == self.max_retries:
+                    raise
+                self.n_retries += 1
+                time.sleep(self.backoff_delay(attempt, error))
+        raise AssertionError("unreachable")
+
+    async def call_async(self, func: Callable[[], Awaitable[T]], tokens: int = 1) -> T:
+        """Asynchronous version of `call`."""
+        for attempt in range(self.max_retries + 1):
+            await self.acquire_async(tokens)
+            try:
+                return await func()
+            except Exception as e:
+                error = unwrap_exception(e)
+                if not isinstance(error, RETRYABLE_ERRORS) or attempt == self.max_retries:
+                    raise
+                self.n_retries += 1
+                await asyncio.sleep(self.backoff_delay(attempt, error))
+        raise AssertionError("unreachable")
+
+    def stats(self) -> Dict[str, float]:
+        """Return counters of the limiter."""
+        return {
+            "requests": self.n_requests,
+            "rate_limited": self.n_rate_limited,
+            "retries": self.n_retries,
+            "throttled_seconds": self.throttled_seconds,
+        }
+
+
+def get_retry_after(headers: httpx.Headers) -> Optional[float]:
+    """Return the number of seconds to wait according to the `Retry-After` headers, if any."""
+    retry_after_ms = headers.get("retry-after-ms")
+    if retry_after_ms is not None:
+        try:
+            return float(retry_after_ms) / 1000
+        except ValueError:
+            pass
+    retry_after = headers.get("retry-after")
+    if retry_after is not None:
+        try:
+            return float(retry_after)
+        except ValueError:
+            pass
+    return None
@@ -0,0 +1,297 @@
+"""Latency-aware routing of LLM requests across multiple Azure OpenAI deployments.
+
+Each request goes to one of the deployments serving the requested model, chosen at random
+with a probability proportional to its weight, divided by its recent (EWMA) latency and
+scaled down by its recent error rate. Deployments that keep failing are taken out of rotation
+for a cooldown period, after which a single probe request decides whether they come back.
+Every deployment has its own rate limiter for its own quota.
+"""
+
+import asyncio
+import json
+import os
+import random
+import threading
+import time
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional, Sequence, Tuple, TypeVar
+
+import httpx
+from pydantic import BaseModel, Field
+
+from llmops_training.news_reader.circuit_breaker import CircuitOpenError
+from llmops_training.news_reader.rate_limit import (
+    RETRYABLE_ERRORS,
+    RateLimiter,
+    unwrap_exception,
+)
+
+T = TypeVar("T")
+
+
+class Deployment(BaseModel):
+    name: str = Field(..., description="Name of the deployment in Azure OpenAI")
+    model_name: str = Field(..., description="Model name that requests use to select it")
+    endpoint: str
+    api_version: str
+    api_key_env: str = "AZURE_OPENAI_API_KEY"
+    weight: float = 1.0
+    requests_per_minute: Optional[int] = None
+    tokens_per_minute: Optional[int] = None
+
+    @property
+    def api_key(self) -> str:
+        return os.environ[self.api_key_env]
+
+
+class DeploymentState:
+    """Live health statistics of a deployment."""
+
+    def __init__(self, deployment: Deployment, initial_latency: float):
+        self.deployment = deployment
+        self.rate_limiter = RateLimiter(
+            deployment.requests_per_minute, deployment.tokens_per_minute, max_retries=0
+        )
+        self.ewma_latency = initial_latency
+        self.ewma_error_rate = 0.0
+        self.consecutive_failures = 0
+        self.unhealthy_until: Optional[float] = None
+        self.probing = False
+        self.n_requests = 0
+        self.n_failures = 0
+
+    @property
+    def is_healthy(self) -> bool:
+        return self.unhealthy_until is None
+
+    def score(self) -> float:
+        return (
+            self.deployment.weight
+            / max(self.ewma_latency, 1e-3)
+            * max(1 - self.ewma_error_rate, 0.01)
+        )
+
+
+class DeploymentRouter:
+    """Thread-safe router that picks a deployment per request and fails over between them."""
+
+    def __init__(
+        self,
+        deployments: Sequence[Deployment],
+        alpha: float = 0.2,
+        max_consecutive_failures: int = 3,
+        max_error_rate: float = 0.5,
+        cooldown_seconds: float = 30.0,
+        max_attempts: int = 3,
+        initial_latency: float = 5.0,
+    ):
+        self.alpha = alpha
+        self.max_consecutive_failures = max_consecutive_failures
+        self.max_error_rate = max_error_rate
+        self.cooldown_seconds = cooldown_seconds
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+        self._states = [DeploymentState(deployment, initial_latency) for deployment in deployments]
+
+    @property
+    def deployments(self) -> List[Deployment]:
+        return [state.deployment for state in self._states]
+
+    def choose(self, model_name: str, exclude: Sequence[Deployment] = ()) -> Deployment:
+        """Pick a deployment for the model, preferring fast, reliable and heavily weighted ones.
+
+        An unhealthy deployment whose cooldown has passed is chosen as a probe, one at a time.
+        If no healthy deployment is left, the one that became unhealthy first is tried anyway.
+        """
+        return self._choose(model_name, exclude)[0]
+
+    def _choose(
+        self, model_name: str, exclude: Sequence[Deployment] = ()
+    ) -> Tuple[Deployment, bool]:
+        """Return the chosen deployment, and whether it was chosen as a probe."""
+        with self._lock:
+            states = [
+                state
+                for state in self._states
+                if state.deployment.model_name == model_name and state.deployment not in exclude
+            ]
+            if not states:
+                raise ValueError(f"No deployment available for model '{model_name}'")
+
+            now = time.monotonic()
+            for state in states:
+                if not state.is_healthy and not state.probing and state.unhealthy_until <= now:
+                    state.probing = True
+                    return state.deployment, True
+
+            healthy = [state for state in states if state.is_healthy]
+            if not healthy:
+                return min(states, key=lambda state: state.unhealthy_until).deployment, False
+
+            scores = [state.score() for state in healthy]
+            return random.choices(healthy, weights=scores)[0].deployment, False
+
+    def _get_state(self, deployment: Deployment) -> DeploymentState:
+        return next(state for state in self._states if state.deployment == deployment)
+
+    def record_success(self, deployment: Deployment, latency: float) -> None:
+        """Update the statistics of a deployment after a successful request."""
+        with self._lock:
+            state = self._get_state(deployment)
+            state.n_requests += 1
+            state.ewma_latency += self.alpha * (latency - state.ewma_latency)
+            state.ewma_error_rate *= 1 - self.alpha
+            state.consecutive_failures = 0
+            state.unhealthy_until = None
+            state.probing = False
+
+    def record_failure(self, deployment: Deployment) -> None:
+        """Update the statistics of a deployment after a failed request."""
+        with self._lock:
+            state = self._get_state(deployment)
+            state.n_requests += 1
+            state.n_failures += 1
+            state.ewma_error_rate += self.alpha * (1 - state.ewma_error_rate)
+            state.consecutive_failures += 1
+            if (
+                state.probing
+                or state.consecutive_failures >= self.max_consecutive_failures
+                or state.ewma_error_rate > self.max_error_rate
+            ):
+                state.unhealthy_until = time.monotonic() + self.cooldown_seconds
+            state.probing = False
+
+    def release_probe(self, deployment: Deployment) -> None:
+        """Let another request probe a deployment, after a probe that neither failed nor
+        succeeded, e.g. because it was cancelled."""
+        with self._lock:
+            self._get_state(deployment).probing = False
+
+    def get_rate_limiter(self, deployment: Deployment) -> RateLimiter:
+        """Return the rate limiter of a deployment."""
+        return self._get_state(deployment).rate_limiter
+
+    def get_rate_limiter_for_url(self, url: httpx.URL) -> Optional[RateLimiter]:
+        """Return the rate limiter of the deployment that a request URL was sent to, if any."""
+        for state in self._states:
+            endpoint = httpx.URL(state.deployment.endpoint)
+            if url.host == endpoint.host and f"/deployments/{state.deployment.name}/" in url.path:
+                return state.rate_limiter
+        return None
+
+    def call(
+        self,
+        model_name: str,
+        func: Callable[[Deployment], T],
+        tokens: int = 1,
+        exclude: Sequence[Deployment] = (),
+    ) -> T:
+        """Call `func` with a chosen deployment, failing over to another one on API errors.
+
+        Deployments in `exclude` are avoided, unless no other deployment is left.
+        """
+        tried: List[Deployment] = list(exclude)
+        for attempt in range(self.max_attempts):
+            deployment, is_probe = self._choose(model_name, self._exclude(model_name, tried))
+            rate_limiter = self.get_rate_limiter(deployment)
+            try:
+                rate_limiter.acquire(tokens)
+                start = time.monotonic()
+                output = func(deployment)
+            except CircuitOpenError:
+                # The request was not sent: neither a success nor a failure
+                if is_probe:
+                    self.release_probe(deployment)
+                raise
+            except Exception as e:
+                error = unwrap_exception(e)
+                if not isinstance(error, RETRYABLE_ERRORS):
+                    # The deployment did respond, e.g. with output that failed validation
+                    self.record_success(deployment, time.monotonic() - start)
+                    raise
+                self.record_failure(deployment)
+                if attempt == self.max_attempts - 1:
+                    raise
+                tried.append(deployment)
+                if not self._exclude(model_name, tried):
+                    time.sleep(rate_limiter.backoff_delay(attempt, error))
+                continue
+            except BaseException:
+                # Cancelled, e.g. a losing hedge: neither a success nor a failure
+                if is_probe:
+                    self.release_probe(deployment)
+                raise
+            self.record_success(deployment, time.monotonic() - start)
+            return output
+        raise AssertionError("unreachable")
+
+    async def call_async(
+        self,
+        model_name: str,
+        func: Callable[[Deployment], Awaitable[T]],
+        tokens: int = 1,
+        exclude: Sequence[Deployment] = (),
+    ) -> T:
+        """Asynchronous version of `call`."""
+        tried: List[Deployment] = list(exclude)
+        for attempt in range(self.max_attempts):
+            deployment, is_probe = self._choose(model_name, self._exclude(model_name, tried))
+            rate_limiter = self.get_rate_limiter(deployment)
+            try:
+                await rate_limiter.acquire_async(tokens)
+                start = time.monotonic()
+                output = await func(deployment)
+            except CircuitOpenError:
+                # The request was not sent: neither a success nor a failure
+                if is_probe:
+                    self.release_probe(deployment)
+                raise
+            except Exception as e:
+                error = unwrap_exception(e)
+                if not isinstance(error, RETRYABLE_ERRORS):
+                    self.record_success(deployment, time.monotonic() - start)
+                    raise
+                self.record_failure(deployment)
+                if attempt == self.max_attempts - 1:
+                    raise
+                tried.append(deployment)
+                if not self._exclude(model_name, tried):
+                    await asyncio.sleep(rate_limiter.backoff_delay(attempt, error))
+                continue
+            except BaseException:
+                # Cancelled, e.g. a losing hedge: neither a success nor a failure
+                if is_probe:
+                    self.release_probe(deployment)
+                raise
+            self.record_success(deployment, time.monotonic() - start)
+            return output
+        raise AssertionError("unreachable")
+
+    def _exclude(self, model_name: str, tried: List[Deployment]) -> List[Deployment]:
+        """Return the tried deployments to exclude, unless that would exclude all of them."""
+        candidates = [s for s in self._states if s.deployment.model_name == model_name]
+        if all(state.deployment in tried for state in candidates):
+            return []
+        return tried
+
+    def stats(self) -> List[Dict[str, float | str | bool]]:
+        """Return live statistics per deployment."""
+        with self._lock:
+            return [
+                {
+                    "deployment": state.deployment.name,
+                    "endpoint": state.deployment.endpoint,
+                    "healthy": state.is_healthy,
+                    "ewma_latency": state.ewma_latency,
+                    "ewma_error_rate": state.ewma_error_rate,
+                    "requests": state.n_requests,
+                    "failures": state.n_failures,
+                }
+                for state in self._states
+            ]
+
+
+def load_deployments(path: str | Path) -> List[Deployment]:
+    """Load deployments from a JSON file containing a list of deployment configs."""
+    with open(path, "r", encoding="utf-8") as file:
+        return [Deployment.model_validate(deployment) for deployment in json.load(file)]
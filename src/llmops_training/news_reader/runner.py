@@ -0,0 +1,246 @@
+"""Checkpointed, resumable extraction of structured information from a corpus of articles.
+
+Articles are sharded across a pool of threads or processes. The outcome of every article is
+appended to a JSONL checkpoint file as soon as it is done, so a run that crashes or hits a
+quota cutoff resumes where it stopped: articles that were extracted are skipped, and failed
+ones are tried again. Progress (throughput, error rate and ETA) is reported while running.
+
+If the circuit breaker of the generation layer opens, the LLM service is unavailable, so the
+run stops submitting articles instead of failing through the rest of the corpus.
+"""
+
+import argparse
+import hashlib
+import json
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Executor,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
+from pathlib import Path
+from typing import Any, Callable, Dict, Mapping, Optional, get_args
+
+from llmops_training.news_reader.extraction import (
+    ArticleInfo,
+    DegradedArticleInfo,
+    ExtractionMode,
+    IncompleteArticleInfo,
+    extract_article_info,
+)
+
+CHECKPOINT_FILE = "article_infos.jsonl"
+
+
+def get_article_id(article: str) -> str:
+    """Returns a stable ID for an article, based on its content."""
+    return hashlib.sha256(article.encode("utf-8")).hexdigest()[:16]
+
+
+class Checkpoint:
+    """Thread-safe, append-only JSONL file with the outcome of each article, by article ID.
+
+    The last line of an article wins, so a retried article overrides its earlier failure.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._lock = threading.Lock()
+        self.records: Dict[str, Dict[str, Any]] = {}
+        if path.exists():
+            with open(path, "r", encoding="utf-8") as file:
+                for line in file:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # A line cut off by a crash, the article is redone
+                    self.records[record["article_id"]] = record
+
+    def is_done(self, article_id: str) -> bool:
+        record = self.records.get(article_id)
+        return record is not None and record["article_info"] is not None
+
+    def write(self, record: Dict[str, Any]) -> None:
+        """Append the record, and make sure it is on disk before returning."""
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as file:
+                file.write(json.dumps(record) + "\n")
+                file.flush()
+                os.fsync(file.fileno())
+            self.records[record["article_id"]] = record
+
+    def article_infos(self) -> Dict[str, Optional[ArticleInfo]]:
+        """Returns the info of each article in the checkpoint, or None if it failed."""
+        with self._lock:
+            return {
+                article_id: ArticleInfo.model_validate(record["article_info"])
+                if record["article_info"] is not None
+                else None
+                for article_id, record in self.records.items()
+            }
+
+
+class RunProgress:
+    """Thread-safe counters of a run, with throughput, error rate and ETA."""
+
+    def __init__(self, total: int, skipped: int = 0):
+        self.total = total
+        self.skipped = skipped
+        self.n_done = 0
+        self.n_failed = 0
+        self.stopped_reason: Optional[str] = None
+        self._start = time.monotonic()
+        self._lock = threading.Lock()
+
+    def record(self, failed: bool) -> None:
+        with self._lock:
+            self.n_done += 1
+            self.n_failed += failed
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            n_done, n_failed = self.n_done, self.n_failed
+        elapsed = time.monotonic() - self._start
+        throughput = n_done / elapsed if elapsed > 0 else 0.0
+        remaining = self.total - self.skipped - n_done
+        return {
+            "total": self.total,
+            "skipped": self.skipped,
+            "done": n_done,
+            "failed": n_failed,
+            "error_rate": n_failed / n_done if n_done else 0.0,
+            "throughput": throughput,
+            "eta_seconds": remaining / throughput if throughput else None,
+            "stopped_reason": self.stopped_reason,
+        }
+
+    def report(self) -> str:
+        stats = self.stats()
+        eta = stats["eta_seconds"]
+        return (
+            f"{stats['skipped'] + stats['done']}/{stats['total']} articles "
+            + f"({stats['skipped']} from checkpoint, {stats['failed']} failed), "
+            + f"{stats['throughput']:.2f} articles/s, {stats['error_rate']:.1%} errors, "
+            + f"ETA {'unknown' if eta is None else f'{eta:.0f}s'}"
+        )
+
+
+def print_progress(progress: RunProgress) -> None:
+    print(progress.report(), flush=True)
+
+
+def _extract_record(article_id: str, article: str, mode: ExtractionMode) -> Dict[str, Any]:
+    """Extract an article into a checkpoint record. Runs in a worker thread or process."""
+    try:
+        article_info, trace_id = extract_article_info(article, mode=mode)
+    except Exception as e:
+        return {"article_id": article_id, "article_info": None, "trace_id": None, "error": repr(e)}
+    if isinstance(article_info, DegradedArticleInfo):
+        # A placeholder, the article is extracted again on resume
+        return {
+            "article_id": article_id,
+            "article_info": None,
+            "trace_id": trace_id,
+            "error": "degraded",
+        }
+    if isinstance(article_info, IncompleteArticleInfo):
+        # Extracted again on resume, with the steps that succeeded served from the LLM cache
+        return {
+            "article_id": article_id,
+            "article_info": None,
+            "trace_id": trace_id,
+            "error": f"incomplete: {article_info.errors}",
+        }
+    return {
+        "article_id": article_id,
+        "article_info": article_info.model_dump(),
+        "trace_id": trace_id,
+        "error": None,
+    }
+
+
+def run_corpus(
+    articles: Mapping[str, str],
+    checkpoint_dir: Path,
+    mode: ExtractionMode = "modular",
+    max_workers: int = 8,
+    use_processes: bool = False,
+    report_every: float = 10.0,
+    on_progress: Callable[[RunProgress], None] = print_progress,
+) -> Dict[str, Optional[ArticleInfo]]:
+    """Extract info from articles by ID, resuming from the checkpoint in `checkpoint_dir`.
+
+    Returns the info of every article in the checkpoint, or None if it failed. Progress is
+    reported every `report_every` seconds and at the end.
+    """
+    checkpoint = Checkpoint(Path(checkpoint_dir) / CHECKPOINT_FILE)
+    todo = [article_id for article_id in articles if not checkpoint.is_done(article_id)]
+    progress = RunProgress(total=len(articles), skipped=len(articles) - len(todo))
+
+    # Worker processes are spawned rather than forked, so that they open their own clients and
+    # SQLite connections instead of sharing the parent's
+    executor: Executor = (
+        ProcessPoolExecutor(max_workers, mp_context=multiprocessing.get_context("spawn"))
+        if use_processes
+        else ThreadPoolExecutor(max_workers)
+    )
+    pending: Dict[Future, str] = {}
+    next_report = time.monotonic() + report_every
+    try:
+        remaining = iter(todo)
+        while True:
+            # Keep a bounded number of articles in flight, so that a stop is quick
+            while progress.stopped_reason is None and len(pending) < 2 * max_workers:
+                article_id = next(remaining, None)
+                if article_id is None:
+                    break
+                future = executor.submit(_extract_record, article_id, articles[article_id], mode)
+                pending[future] = article_id
+            if not pending:
+                break
+
+            done, _ = wait(pending, timeout=report_every, return_when=FIRST_COMPLETED)
+            for future in done:
+                del pending[future]
+                record = future.result()
+                checkpoint.write(record)
+                progress.record(failed=record["error"] is not None)
+                if record["error"] == "degraded":
+                    progress.stopped_reason = "LLM service unavailable"
+            if time.monotonic() >= next_report:
+                on_progress(progress)
+                next_report = time.monotonic() + report_every
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+    on_progress(progress)
+    return checkpoint.article_infos()
+
+
+if __name__ == "__main__":
+    from llmops_training.news_reader.data import get_bbc_news_sample
+
+    parser = argparse.ArgumentParser(description="Extract info from a month of BBC news")
+    parser.add_argument("--year-month", help="Month of BBC news to process (YYYY-MM)")
+    parser.add_argument("--checkpoint-dir", default="runs", help="Directory for checkpoints")
+    parser.add_argument("--mode", default="modular", choices=get_args(ExtractionMode))
+    parser.add_argument("--workers", type=int, default=8, help="Number of workers")
+    parser.add_argument("--processes", action="store_true", help="Use processes, not threads")
+    args = parser.parse_args()
+
+    data = get_bbc_news_sample(args.year_month)
+    articles = {get_article_id(article): article for article in data["article"]}
+    run_corpus(
+        articles,
+        Path(args.checkpoint_dir),
+        mode=args.mode,
+        max_workers=args.workers,
+        use_processes=args.processes,
+    )
@@ -0,0 +1,124 @@
+"""Small dependency-aware scheduler to run independent extraction steps concurrently.
+
+Steps form a DAG: each step starts as soon as the steps it depends on are done, in a thread
+pool. A speculative step starts right away, before its dependencies are done, and is cancelled
+(or its result discarded) if its condition turns out to be false.
+
+Steps run in a copy of the caller's context, so trace spans started in a step are nested under
+the span that was current when the steps were scheduled.
+"""
+
+import contextvars
+import threading
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, TypeVar
+
+T = TypeVar("T")
+U = TypeVar("U")
+
+
+class Step:
+    """A step of the DAG.
+
+    `func` is called with the results of the steps it depends on, by name. A step with a
+    `condition` only runs if the condition holds for those results, else its result is None.
+    A speculative step does not wait for its dependencies, so its `func` must not use them.
+    """
+
+    def __init__(
+        self,
+        func: Callable[[Dict[str, Any]], Any],
+        depends_on: Sequence[str] = (),
+        condition: Optional[Callable[[Dict[str, Any]], bool]] = None,
+        speculative: bool = False,
+    ):
+        self.func = func
+        self.depends_on = depends_on
+        self.condition = condition
+        self.speculative = speculative
+
+
+class DagScheduler:
+    """Runs DAGs of steps in a shared thread pool, with a separate pool to fan out work.
+
+    Fan-out work runs in its own pool, so steps waiting on it can never starve it of threads.
+    """
+
+    def __init__(self, max_workers: int = 8, max_fan_out_workers: int = 16):
+        self._executor = ThreadPoolExecutor(max_workers, thread_name_prefix="step")
+        self._fan_out_executor = ThreadPoolExecutor(
+            max_fan_out_workers, thread_name_prefix="fan_out"
+        )
+        self._lock = threading.Lock()
+        self.n_speculative_cancelled = 0
+
+    @staticmethod
+    def _submit(executor: ThreadPoolExecutor, func: Callable[..., T], *args) -> "Future[T]":
+        return executor.submit(contextvars.copy_context().run, func, *args)
+
+    def run(self, steps: Dict[str, Step]) -> Dict[str, Any]:
+        """Run the steps, and return their results by name. Raises the first error of a step."""
+        results: Dict[str, Any] = {}
+        futures: Dict[str, Future] = {}
+        pending = set(steps)
+
+        def is_ready(name: str) -> bool:
+            return all(dependency in results for dependency in steps[name].depends_on)
+
+        def dependency_results(name: str) -> Dict[str, Any]:
+            return {dependency: results[dependency] for dependency in steps[name].depends_on}
+
+        try:
+            while pending:
+                skipped = False
+                for name in sorted(pending):
+                    step = steps[name]
+                    if is_ready(name) and step.condition is not None:
+                        if not step.condition(dependency_results(name)):
+                            results[name] = None
+                            pending.remove(name)
+                            self._cancel_speculative(futures.pop(name, None))
+                            skipped = True
+                            continue
+                    if name not in futures and (is_ready(name) or step.speculative):
+                        args = dependency_results(name) if is_ready(name) else {}
+                        futures[name] = self._submit(self._executor, step.func, args)
+
+                finished = [
+                    name
+                    for name in pending
+                    if name in futures and futures[name].done() and is_ready(name)
+                ]
+                for name in finished:
+                    results[name] = futures[name].result()
+                    pending.remove(name)
+                if finished or skipped:
+                    continue
+
+                running = [futures[name] for name in pending if name in futures]
+                running = [future for future in running if not future.done()]
+                if not running:
+                    raise ValueError(f"Steps {sorted(pending)} have missing or cyclic dependencies")
+                wait(running, return_when=FIRST_COMPLETED)
+        except BaseException:
+            for future in futures.values():
+                future.cancel()
+            raise
+        return results
+
+    def _cancel_speculative(self, future: Optional[Future]) -> None:
+        """Cancel a speculative step. If it already started, it finishes and is ignored."""
+        if future is not None:
+            with self._lock:
+                self.n_speculative_cancelled += 1
+            future.cancel()
+
+    def map(self, func: Callable[[U], T], items: Iterable[U]) -> List[T]:
+        """Call `func` for each item concurrently, and return the results in order."""
+        futures = [self._submit(self._fan_out_executor, func, item) for item in items]
+        try:
+            return [future.result() for future in futures]
+        except BaseException:
+            for future in futures:
+                future.cancel()
+            raise
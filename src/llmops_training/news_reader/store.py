@@ -0,0 +1,137 @@
+"""Durable store of extraction results, keyed by article content and pipeline version.
+
+An article that was extracted before by the same pipeline is not extracted again. Results
+are keyed by a hash of the normalized article text and by the pipeline version: a hash of
+everything else that determines the result, such as prompt templates, model and mode (see
+`extraction.get_pipeline_version`). Changing the pipeline thus never serves stale results.
+
+Results live in a SQLite database that survives restarts and can be shared between
+processes. A batch of articles is looked up in a single query.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import dotenv
+
+dotenv.load_dotenv()
+
+
+def normalize_article(article: str) -> str:
+    """Return the article with Unicode normalized and whitespace collapsed."""
+    return " ".join(unicodedata.normalize("NFC", article).split())
+
+
+def get_article_hash(article: str) -> str:
+    """Return a hash of the normalized article text."""
+    return hashlib.sha256(normalize_article(article).encode("utf-8")).hexdigest()
+
+
+class ArticleInfoStore:
+    """SQLite store of serialized article infos and their trace IDs. Safe to share between threads.
+
+    Values are strings (Pydantic JSON), so that the caller can rehydrate them into the right type.
+    """
+
+    def __init__(self, path: str):
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._connection = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        # Write-ahead logging lets processes read while another one writes
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS article_infos (article_hash TEXT, pipeline_version TEXT, "
+            "value TEXT, trace_id TEXT, created_at REAL, "
+            "PRIMARY KEY (article_hash, pipeline_version))"
+        )
+        self._connection.commit()
+
+    def get(self, article_hash: str, pipeline_version: str) -> Optional[Tuple[str, int]]:
+        """Return the stored value and trace ID of an article, or None if it is missing."""
+        return self.get_many([article_hash], pipeline_version).get(article_hash)
+
+    def get_many(
+        self, article_hashes: List[str], pipeline_version: str
+    ) -> Dict[str, Tuple[str, int]]:
+        """Return the stored value and trace ID of each article that is in the store.
+
+        All articles are looked up in one query, however many there are.
+        """
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT article_hash, value, trace_id FROM article_infos "
+                "WHERE pipeline_version = ? AND article_hash IN (SELECT value FROM json_each(?))",
+                (pipeline_version, json.dumps(article_hashes)),
+            ).fetchall()
+            results = {
+                article_hash: (value, int(trace_id)) for article_hash, value, trace_id in rows
+            }
+            n_lookups = len(set(article_hashes))
+            self.hits += len(results)
+            self.misses += n_lookups - len(results)
+        return results
+
+    def put(self, article_hash: str, pipeline_version: str, value: str, trace_id: int) -> None:
+        """Store the value and trace ID of an article, replacing an earlier one."""
+        self.put_many([(article_hash, pipeline_version, value, trace_id)])
+
+    def put_many(self, records: Iterable[Tuple[str, str, str, int]]) -> None:
+        """Store (article hash, pipeline version, value, trace ID) records in one transaction."""
+        now = time.time()
+        with self._lock:
+            # Trace IDs are 128-bit, too large for SQLite integers
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO article_infos VALUES (?, ?, ?, ?, ?)",
+                [
+                    (article_hash, pipeline_version, value, str(trace_id), now)
+                    for article_hash, pipeline_version, value, trace_id in records
+                ],
+            )
+            self._connection.commit()
+
+    def clear(self) -> None:
+        """Remove all entries and reset the counters."""
+        with self._lock:
+            self._connection.execute("DELETE FROM article_infos")
+            self._connection.commit()
+            self.hits = self.misses = 0
+
+    def stats(self) -> Dict[str, float]:
+        """Return hit and miss counters of the store."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+
+_store: Optional[ArticleInfoStore] = (
+    ArticleInfoStore(os.environ["EXTRACTION_STORE_PATH"])
+    if os.getenv("EXTRACTION_STORE_PATH")
+    else None
+)
+
+
+def configure_article_info_store(store: Optional[ArticleInfoStore]) -> None:
+    """Replaces the article info store. Pass None to always extract articles."""
+    global _store
+    _store = store
+
+
+def get_article_info_store() -> Optional[ArticleInfoStore]:
+    """Returns the article info store, if there is one."""
+    return _store
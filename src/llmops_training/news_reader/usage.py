@@ -0,0 +1,63 @@
+"""Token usage of LLM responses, including prompt tokens served from the prompt cache.
+
+Azure OpenAI caches prompt prefixes of 1024 tokens or more automatically, and reports the
+cached part as `usage.prompt_tokens_details.cached_tokens`. Cached tokens are cheaper and
+faster, so requests for the same article should share as long a prefix as possible.
+"""
+
+import threading
+from typing import Any, Dict
+
+import httpx
+
+
+def is_json_response(response: httpx.Response) -> bool:
+    return response.headers.get("content-type", "").startswith("application/json")
+
+
+class UsageStats:
+    """Thread-safe counters of the token usage reported in responses."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.n_responses = 0
+        self.n_cache_hits = 0
+        self.prompt_tokens = 0
+        self.cached_tokens = 0
+        self.completion_tokens = 0
+
+    def record(self, usage: Dict[str, Any]) -> None:
+        """Record the `usage` of a chat completion."""
+        cached_tokens = (usage.get("prompt_tokens_details") or {}).get("cached_tokens") or 0
+        with self._lock:
+            self.n_responses += 1
+            self.n_cache_hits += cached_tokens > 0
+            self.prompt_tokens += usage.get("prompt_tokens") or 0
+            self.cached_tokens += cached_tokens
+            self.completion_tokens += usage.get("completion_tokens") or 0
+
+    def observe_response(self, response: httpx.Response) -> None:
+        """Record the usage of a chat completion response, if it has one. Its body must be read."""
+        if response.status_code != 200 or not is_json_response(response):
+            return
+        usage = response.json().get("usage")
+        if usage:
+            self.record(usage)
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            return {
+                "responses": self.n_responses,
+                "cache_hits": self.n_cache_hits,
+                "prompt_tokens": self.prompt_tokens,
+                "cached_tokens": self.cached_tokens,
+                "completion_tokens": self.completion_tokens,
+                "cached_token_rate": (
+                    self.cached_tokens / self.prompt_tokens if self.prompt_tokens else 0.0
+                ),
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self.n_responses = self.n_cache_hits = 0
+            self.prompt_tokens = self.cached_tokens = self.completion_tokens = 0
@@ -0,0 +1,161 @@
+"""Watchlist of businesses we care about, compiled into a multi-pattern index.
+
+Only businesses on the watchlist get a per-business extraction call. The watchlist is loaded
+from the versioned JSON file in `WATCHLIST_PATH`, e.g.:
+
+    {"version": "2025-01", "entries": [
+        {"name": "Acme Holdings plc", "ticker": "ACME", "aliases": ["Acme"]}
+    ]}
+
+Names are normalized before matching: case folded, punctuation removed, and legal suffixes
+such as "plc" and "Ltd" dropped. Names and aliases are matched anywhere in a business name,
+on word boundaries, with an Aho-Corasick automaton over words. Tickers only match a business
+name that is exactly the ticker, as short tickers are often ordinary words.
+"""
+
+import json
+import os
+import re
+import threading
+from collections import deque
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import dotenv
+from pydantic import BaseModel, Field
+
+dotenv.load_dotenv()
+
+WORD_PATTERN = re.compile(r"[^\W_]+")
+LEGAL_SUFFIXES = {
+    "ag", "bv", "co", "company", "corp", "corporation", "gmbh", "group", "holding", "holdings",
+    "inc", "incorporated", "limited", "llc", "llp", "ltd", "nv", "plc", "sa", "se",
+}  # fmt: skip
+
+
+class WatchlistEntry(BaseModel):
+    name: str = Field(..., description="Name of the business")
+    ticker: Optional[str] = Field(None, description="Stock ticker of the business")
+    aliases: List[str] = Field(default_factory=list, description="Other names of the business")
+
+
+class Watchlist(BaseModel):
+    version: str = Field(..., description="Version of the watchlist, e.g. its release date")
+    entries: List[WatchlistEntry]
+
+
+def normalize_name(name: str) -> List[str]:
+    """Return the words of a business name, case folded and without legal suffixes."""
+    words = WORD_PATTERN.findall(name.replace("&", " and ").casefold())
+    while len(words) > 1 and words[-1] in LEGAL_SUFFIXES:
+        words.pop()
+    if len(words) > 1 and words[0] == "the":
+        words.pop(0)
+    return words
+
+
+class WatchlistIndex:
+    """Compiled watchlist, matching business names in time linear in their number of words.
+
+    Thread-safe counters keep track of the names that were checked and filtered out.
+    """
+
+    def __init__(self, watchlist: Watchlist):
+        self.version = watchlist.version
+        self.entries = watchlist.entries
+        self._tickers: Dict[str, int] = {}
+        # Aho-Corasick automaton over words: transitions, failure links, and the entry matched
+        # at each state, if any
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[Optional[int]] = [None]
+        for i, entry in enumerate(watchlist.entries):
+            if entry.ticker:
+                self._tickers.setdefault(entry.ticker.casefold(), i)
+            for name in [entry.name, *entry.aliases]:
+                self._add_pattern(normalize_name(name), i)
+        self._build_failure_links()
+
+        self._lock = threading.Lock()
+        self.n_checked = 0
+        self.n_filtered_out = 0
+
+    def _add_pattern(self, words: List[str], entry_index: int) -> None:
+        if not words:
+            return
+        state = 0
+        for word in words:
+            if word not in self._goto[state]:
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(None)
+                self._goto[state][word] = len(self._goto) - 1
+            state = self._goto[state][word]
+        if self._output[state] is None:
+            self._output[state] = entry_index
+
+    def _build_failure_links(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for word, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and word not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_state] = self._goto[fail].get(word, 0)
+                if self._output[next_state] is None:
+                    self._output[next_state] = self._output[self._fail[next_state]]
+
+    def match(self, business: str) -> Optional[WatchlistEntry]:
+        """Return the watchlist entry that the business name matches, if any."""
+        ticker_index = self._tickers.get(business.strip().casefold())
+        if ticker_index is not None:
+            return self.entries[ticker_index]
+        state = 0
+        for word in normalize_name(business):
+            while state and word not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(word, 0)
+            if self._output[state] is not None:
+                return self.entries[self._output[state]]
+        return None
+
+    def contains(self, business: str) -> bool:
+        """Return whether the business is on the watchlist, counting the ones that are not."""
+        is_match = self.match(business) is not None
+        with self._lock:
+            self.n_checked += 1
+            self.n_filtered_out += not is_match
+        return is_match
+
+    def stats(self) -> Dict[str, int | str]:
+        """Return how many businesses were checked, and filtered out to save an LLM call."""
+        with self._lock:
+            return {
+                "version": self.version,
+                "checked": self.n_checked,
+                "filtered_out": self.n_filtered_out,
+            }
+
+
+def load_watchlist(path: str | Path) -> WatchlistIndex:
+    """Load and compile a watchlist from a JSON file."""
+    with open(path, "r", encoding="utf-8") as file:
+        return WatchlistIndex(Watchlist.model_validate(json.load(file)))
+
+
+_watchlist: Optional[WatchlistIndex] = (
+    load_watchlist(os.environ["WATCHLIST_PATH"]) if os.getenv("WATCHLIST_PATH") else None
+)
+
+
+def configure_watchlist(watchlist: Optional[WatchlistIndex]) -> None:
+    """Replaces the watchlist. Pass None to care about every business."""
+    global _watchlist
+    _watchlist = watchlist
+
+
+def get_watchlist() -> Optional[WatchlistIndex]:
+    """Returns the watchlist, if there is one."""
+    return _watchlist
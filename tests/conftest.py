@@ -0,0 +1,33 @@
+import pytest
+
+from llmops_training.news_reader import cascade, classifier, generation, store, watchlist
+from llmops_training.news_reader.circuit_breaker import CircuitBreaker
+from llmops_training.news_reader.fake_server import FakeLLMServer, FakeServerConfig
+from llmops_training.news_reader.rate_limit import RateLimiter
+
+
+@pytest.fixture
+def fake_server(monkeypatch):
+    """Fake LLM server that all generation calls go to, answering about business articles.
+
+    Every step is a single request, not served from a cache or store, nor hedged or cascaded,
+    and every business is one we care about, so that tests can count the requests.
+    """
+    config = FakeServerConfig(
+        latency_median=0.01, field_values={"is_about_business": True}, seed=42
+    )
+    with FakeLLMServer(config) as server:
+        monkeypatch.setenv("AZURE_OPENAI_ENDPOINT", server.url)
+        monkeypatch.setenv("AZURE_OPENAI_API_VERSION", "2024-10-21")
+        monkeypatch.setenv("AZURE_OPENAI_API_KEY", "fake")
+        monkeypatch.setattr(generation, "_cache", None)
+        monkeypatch.setattr(generation, "_router", None)
+        monkeypatch.setattr(generation, "_hedging_policy", None)
+        monkeypatch.setattr(cascade, "_profiles", {})
+        monkeypatch.setattr(generation, "_rate_limiter", RateLimiter(base_delay=0.01))
+        monkeypatch.setattr(generation, "_circuit_breaker", CircuitBreaker())
+        monkeypatch.setattr(store, "_store", None)
+        monkeypatch.setattr(watchlist, "_watchlist", None)
+        monkeypatch.setattr(classifier, "_pre_classifier", None)
+        yield server
+        generation.close_clients()
@@ -0,0 +1,196 @@
+import json
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Dict, Optional
+
+import instructor
+import pytest
+
+from llmops_training.news_reader import batch, generation
+from llmops_training.news_reader.batch import (
+    AzureOpenAIBatchBackend,
+    LocalBatchBackend,
+    extract_info_from_articles_batch,
+    make_batch_request,
+    parse_batch_result,
+)
+from llmops_training.news_reader.extraction import ArticleInfo, BusinessSpecificInfo, GeneralInfo
+
+
+def make_tool_call_completion(name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "id": "chatcmpl-0",
+        "object": "chat.completion",
+        "created": 0,
+        "model": "o3-mini",
+        "choices": [
+            {
+                "index": 0,
+                "finish_reason": "stop",
+                "message": {
+                    "role": "assistant",
+                    "content": None,
+                    "tool_calls": [
+                        {
+                            "id": "call_0",
+                            "type": "function",
+                            "function": {"name": name, "arguments": json.dumps(arguments)},
+                        }
+                    ],
+                },
+            }
+        ],
+    }
+
+
+def responder(body: Dict[str, Any]) -> Dict[str, Any]:
+    """Answers batch requests as if the article "Shares in Acme rise" is about business."""
+    name = body["tool_choice"]["function"]["name"]
+    article = body["messages"][0]["content"]  # The article comes first, then the instructions
+    prompt = "\n".join(message["content"] for message in body["messages"])
+    is_about_business = "Acme" in article
+    arguments = {
+        "GeneralInfo": {"title": article.splitlines()[-1], "summary": "A summary."},
+        "BusinessCategory": {"is_about_business": is_about_business},
+        "BusinessesInvolved": {"businesses": ["Acme", "Globex"]},
+        "BusinessSpecificInfo": {
+            "business": "Acme" if "'Acme'" in prompt else "Globex",
+            "stock_price_change": "increase",
+            "reason": "Shares rose.",
+            "relevant_substring": "Shares in Acme rise",
+        },
+    }[name]
+    return make_tool_call_completion(name, arguments)
+
+
+def make_business_info(business: str) -> BusinessSpecificInfo:
+    return BusinessSpecificInfo(
+        business=business,
+        stock_price_change="increase",
+        reason="Shares rose.",
+        relevant_substring="Shares in Acme rise",
+    )
+
+
+def test_make_and_parse_batch_request():
+    request = make_batch_request("0:general_info", "Some prompt", GeneralInfo)
+
+    assert request["custom_id"] == "0:general_info"
+    assert request["url"] == "/chat/completions"
+    assert request["body"]["tool_choice"]["function"]["name"] == "GeneralInfo"
+
+    result = {
+        "custom_id": "0:general_info",
+        "response": {"status_code": 200, "body": responder(request["body"])},
+        "error": None,
+    }
+    assert parse_batch_result(result, GeneralInfo) == GeneralInfo(
+        title="Some prompt", summary="A summary."
+    )
+    assert (
+        parse_batch_result({"custom_id": "0", "error": {"message": "Failed"}}, GeneralInfo) is None
+    )
+
+
+def test_make_and_parse_batch_request_in_json_mode(monkeypatch):
+    monkeypatch.setattr(generation, "_instructor_mode", instructor.Mode.JSON)
+    request = make_batch_request("0:general_info", "Some prompt", GeneralInfo)
+
+    assert request["body"]["response_format"] == {"type": "json_object"}
+    assert request["body"]["messages"][0]["role"] == "system"  # With the schema
+    assert "tools" not in request["body"]
+
+    completion = make_tool_call_completion("GeneralInfo", {})
+    completion["choices"][0]["message"] = {
+        "role": "assistant",
+        "content": json.dumps({"title": "Some prompt", "summary": "A summary."}),
+    }
+    result = {"custom_id": "0:general_info", "response": {"status_code": 200, "body": completion}}
+    assert parse_batch_result(result, GeneralInfo) == GeneralInfo(
+        title="Some prompt", summary="A summary."
+    )
+
+
+def test_extract_info_from_articles_batch(tmp_path: Path):
+    backend = LocalBatchBackend(tmp_path / "backend", responder)
+    articles = ["Shares in Acme rise", "Football match ends in a draw"]
+
+    article_infos = extract_info_from_articles_batch(
+        articles, backend, tmp_path / "batch", poll_interval=0
+    )
+
+    assert article_infos == [
+        ArticleInfo(
+            title="Shares in Acme rise",
+            summary="A summary.",
+            is_about_business=True,
+            business_info=[
+                make_business_info("Acme"),
+                make_business_info("Globex"),
+            ],
+        ),
+        ArticleInfo(
+            title="Football match ends in a draw",
+            summary="A summary.",
+            is_about_business=False,
+            business_info=[],
+        ),
+    ]
+
+
+def test_extract_info_from_articles_batch_returns_none_for_failed_articles(tmp_path: Path):
+    def failing_responder(body: Dict[str, Any]) -> Dict[str, Any]:
+        if body["tool_choice"]["function"]["name"] == "BusinessSpecificInfo":
+            raise RuntimeError("Request failed")
+        return responder(body)
+
+    backend = LocalBatchBackend(tmp_path / "backend", failing_responder)
+    articles = ["Shares in Acme rise", "Football match ends in a draw"]
+
+    article_infos = extract_info_from_articles_batch(
+        articles, backend, tmp_path / "batch", poll_interval=0
+    )
+
+    assert article_infos[0] is None
+    assert article_infos[1] is not None
+
+
+@pytest.mark.parametrize("output_file_id", ["output", None])
+def test_azure_backend_downloads_failed_requests(
+    tmp_path: Path, monkeypatch, output_file_id: Optional[str]
+):
+    succeeded = {
+        "custom_id": "0:general_info",
+        "response": {
+            "status_code": 200,
+            "body": make_tool_call_completion(
+                "GeneralInfo", {"title": "Title", "summary": "A summary."}
+            ),
+        },
+        "error": None,
+    }
+    failed = {
+        "custom_id": "1:general_info",
+        "response": {"status_code": 400, "body": {"error": {"message": "Invalid request"}}},
+        "error": None,
+    }
+    files = {"output": json.dumps(succeeded) + "\n", "error": json.dumps(failed) + "\n"}
+    client = SimpleNamespace(
+        batches=SimpleNamespace(
+            retrieve=lambda batch_id: SimpleNamespace(
+                output_file_id=output_file_id, error_file_id="error"
+            )
+        ),
+        files=SimpleNamespace(content=lambda file_id: SimpleNamespace(text=files[file_id])),
+    )
+    monkeypatch.setattr(batch, "get_azure_client", lambda: client)
+
+    results_path = AzureOpenAIBatchBackend().download_results("batch_0", tmp_path / "results.jsonl")
+
+    with open(results_path, "r", encoding="utf-8") as results_file:
+        results = {result["custom_id"]: result for result in map(json.loads, results_file)}
+    assert parse_batch_result(results["1:general_info"], GeneralInfo) is None
+    if output_file_id is None:
+        assert list(results) == ["1:general_info"]
+    else:
+        assert parse_batch_result(results["0:general_info"], GeneralInfo).title == "Title"
@@ -0,0 +1,192 @@
+import asyncio
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+from pydantic import BaseModel
+
+from llmops_training.news_reader import generation
+from llmops_training.news_reader.cache import (
+    ResponseCache,
+    SingleFlight,
+    get_default_cache,
+    make_cache_key,
+)
+
+
+class User(BaseModel):
+    name: str
+    age: int
+
+
+def test_make_cache_key_depends_on_all_inputs():
+    key = make_cache_key("o3-mini", "prompt", User.model_json_schema(), {"temperature": 1})
+
+    assert key == make_cache_key("o3-mini", "prompt", User.model_json_schema(), {"temperature": 1})
+    assert key != make_cache_key("gpt-4o", "prompt", User.model_json_schema(), {"temperature": 1})
+    assert key != make_cache_key("o3-mini", "other", User.model_json_schema(), {"temperature": 1})
+    assert key != make_cache_key("o3-mini", "prompt", None, {"temperature": 1})
+    assert key != make_cache_key("o3-mini", "prompt", User.model_json_schema(), {"temperature": 0})
+
+
+def test_response_cache_persists_to_disk(tmp_path: Path):
+    path = (tmp_path / "cache.sqlite").as_posix()
+    cache = ResponseCache(path=path)
+    cache.set("key", "value")
+    cache.close()
+
+    reopened = ResponseCache(path=path)
+
+    assert reopened.get("key") == "value"
+    assert reopened.get("key") == "value"
+    assert reopened.get("missing") is None
+    assert reopened.stats()["disk_hits"] == 1
+    assert reopened.stats()["memory_hits"] == 1
+    assert reopened.stats()["misses"] == 1
+
+
+def test_response_cache_is_shared_between_connections(tmp_path: Path):
+    path = (tmp_path / "cache.sqlite").as_posix()
+    first, second = ResponseCache(path=path), ResponseCache(path=path)
+
+    first.set("key", "value")
+
+    assert second.get("key") == "value"
+    with sqlite3.connect(path) as connection:
+        assert connection.execute("PRAGMA journal_mode").fetchone() == ("wal",)
+
+
+def test_response_cache_evicts_least_recently_used():
+    cache = ResponseCache(path=None, max_memory_entries=2)
+    cache.set("a", "1")
+    cache.set("b", "2")
+    cache.get("a")
+    cache.set("c", "3")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "1"
+    assert cache.get("c") == "3"
+
+
+def test_response_cache_expires_entries(tmp_path: Path):
+    cache = ResponseCache(path=(tmp_path / "cache.sqlite").as_posix(), ttl_seconds=0.01)
+    cache.set("key", "value")
+    time.sleep(0.02)
+
+    assert cache.get("key") is None
+
+
+def test_default_cache_is_in_memory_unless_path_is_set(tmp_path: Path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.delenv("LLM_CACHE_PATH", raising=False)
+    assert get_default_cache()._connection is None
+    assert not list(tmp_path.iterdir())
+
+    monkeypatch.setenv("LLM_CACHE_PATH", str(tmp_path / "cache.sqlite"))
+    assert get_default_cache()._connection is not None
+
+
+def test_generate_object_rehydrates_cache_hit(monkeypatch):
+    cache = ResponseCache(path=None)
+    monkeypatch.setattr(generation, "_cache", cache)
+    prompt = "Extract Jason is 25 years old."
+    key = make_cache_key(
+        "o3-mini", prompt, User.model_json_schema(), generation.get_generation_config()
+    )
+    cache.set(key, User(name="Jason", age=25).model_dump_json())
+
+    output = generation.generate_object(prompt, User)
+
+    assert output == User(name="Jason", age=25)
+    assert cache.stats()["memory_hits"] == 1
+
+
+def test_single_flight_coalesces_threaded_calls():
+    single_flight = SingleFlight()
+    release = threading.Event()
+    n_executions = 0
+
+    def slow_call():
+        nonlocal n_executions
+        n_executions += 1
+        release.wait(timeout=5)
+        return "result"
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        futures = [executor.submit(single_flight.do, "key", slow_call) for _ in range(4)]
+        while single_flight.stats()["deduplicated"] < 3:
+            time.sleep(0.01)
+        release.set()
+        results = [future.result() for future in futures]
+
+    assert results == ["result"] * 4
+    assert n_executions == 1
+    assert single_flight.stats()["deduplicated"] == 3
+
+
+def test_single_flight_releases_key_before_sharing_result():
+    single_flight = SingleFlight()
+    in_flight_when_shared = []
+
+    def call():
+        future = single_flight._in_flight["key"]
+        future.add_done_callback(
+            lambda _: in_flight_when_shared.append("key" in single_flight._in_flight)
+        )
+        return "result"
+
+    assert single_flight.do("key", call) == "result"
+    assert in_flight_when_shared == [False]
+
+
+def test_single_flight_coalesces_async_calls_and_shares_errors():
+    single_flight = SingleFlight()
+    n_executions = 0
+
+    async def failing_call():
+        nonlocal n_executions
+        n_executions += 1
+        await asyncio.sleep(0.05)
+        raise ValueError("LLM error")
+
+    async def run():
+        calls = [single_flight.do_async("key", failing_call) for _ in range(3)]
+        return await asyncio.gather(*calls, return_exceptions=True)
+
+    results = asyncio.run(run())
+
+    assert all(isinstance(result, ValueError) for result in results)
+    assert n_executions == 1
+    assert single_flight.stats() == {"calls": 1, "deduplicated": 2, "deduplication_rate": 2 / 3}
+
+
+def test_single_flight_follower_takes_over_from_cancelled_leader():
+    single_flight = SingleFlight()
+    n_executions = 0
+
+    async def slow_call():
+        nonlocal n_executions
+        n_executions += 1
+        await asyncio.sleep(0.05)
+        return "result"
+
+    async def run():
+        leader = asyncio.create_task(single_flight.do_async("key", slow_call))
+        await asyncio.sleep(0.01)
+        followers = [
+            asyncio.create_task(single_flight.do_async("key", slow_call)) for _ in range(2)
+        ]
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await asyncio.gather(*followers)
+
+    results = asyncio.run(run())
+
+    assert results == ["result", "result"]
+    assert n_executions == 2
+    assert single_flight.stats() == {"calls": 2, "deduplicated": 1, "deduplication_rate": 1 / 3}
@@ -0,0 +1,118 @@
+import json
+from pathlib import Path
+from typing import Dict, List
+
+import pytest
+from pydantic import BaseModel, ValidationError
+
+from llmops_training.news_reader import cascade
+from llmops_training.news_reader.cascade import (
+    CascadeProfile,
+    ModelTier,
+    generate_object_cascade,
+    generate_step_object,
+    load_cascade_profiles,
+)
+from llmops_training.news_reader.extraction import BusinessCategory
+
+PROFILE = CascadeProfile(
+    tiers=[
+        ModelTier(model_name="cheap", min_confidence=0.8),
+        ModelTier(model_name="strong"),
+    ]
+)
+
+
+@pytest.fixture
+def calls(monkeypatch) -> List[Dict]:
+    """Records calls to `generate_object`, which answers according to `RESPONSES`."""
+    calls = []
+
+    def generate_object(prompt: str, response_model: BaseModel, model_name: str, **kwargs):
+        calls.append({"prompt": prompt, "model_name": model_name, **kwargs})
+        response = RESPONSES[prompt][model_name]
+        if isinstance(response, Exception):
+            raise response
+        return response_model.model_validate(response)
+
+    monkeypatch.setattr(cascade, "generate_object", generate_object)
+    monkeypatch.setattr(cascade, "_stats", cascade.CascadeStats())
+    return calls
+
+
+def make_validation_error() -> ValidationError:
+    try:
+        BusinessCategory.model_validate({})
+    except ValidationError as e:
+        return e
+
+
+RESPONSES = {
+    "confident": {"cheap": {"is_about_business": True, "confidence": 0.9}},
+    "unsure": {
+        "cheap": {"is_about_business": True, "confidence": 0.5},
+        "strong": {"is_about_business": False},
+    },
+    "invalid": {"cheap": make_validation_error(), "strong": {"is_about_business": False}},
+}
+
+
+def test_cascade_accepts_confident_cheap_output(calls: List[Dict]):
+    output = generate_object_cascade("confident", BusinessCategory, PROFILE, step="category")
+
+    assert output == BusinessCategory(is_about_business=True)
+    assert [call["model_name"] for call in calls] == ["cheap"]
+    assert cascade.get_cascade_stats().stats()[0]["escalation_rate"] == 0
+
+
+@pytest.mark.parametrize(
+    "prompt, reason", [("unsure", "low_confidence"), ("invalid", "validation")]
+)
+def test_cascade_escalates(calls: List[Dict], prompt: str, reason: str):
+    output = generate_object_cascade(prompt, BusinessCategory, PROFILE, step="category")
+
+    assert output == BusinessCategory(is_about_business=False)
+    assert [call["model_name"] for call in calls] == ["cheap", "strong"]
+    cheap_stats, strong_stats = cascade.get_cascade_stats().stats()
+    assert cheap_stats["escalation_rate"] == 1
+    assert cheap_stats[f"escalations_{reason}"] == 1
+    assert strong_stats["escalations"] == 0
+
+
+def test_cascade_escalates_on_disagreement(calls: List[Dict], monkeypatch):
+    samples = iter([{"is_about_business": True}, {"is_about_business": False}])
+
+    def generate_object(prompt, response_model, model_name, **kwargs):
+        calls.append({"model_name": model_name, **kwargs})
+        if model_name == "cheap":
+            return response_model.model_validate(next(samples))
+        return response_model(is_about_business=False)
+
+    monkeypatch.setattr(cascade, "generate_object", generate_object)
+    profile = CascadeProfile(tiers=[ModelTier(model_name="cheap", n_samples=2), *PROFILE.tiers[1:]])
+
+    output = generate_object_cascade("disputed", BusinessCategory, profile)
+
+    assert output == BusinessCategory(is_about_business=False)
+    assert sorted(call["use_cache"] for call in calls if call["model_name"] == "cheap") == [
+        False,
+        True,
+    ]
+    assert cascade.get_cascade_stats().stats()[0]["escalations_disagreement"] == 1
+
+
+def test_generate_step_object_uses_profile_of_step(calls: List[Dict], monkeypatch):
+    monkeypatch.setattr(cascade, "_profiles", {"business_category": PROFILE})
+
+    generate_step_object("business_category", "confident", BusinessCategory)
+    generate_step_object("business_category", "confident", BusinessCategory, model_name="cheap")
+
+    assert len(calls) == 2
+    assert "use_cache" in calls[0] and "use_cache" not in calls[1]
+
+
+def test_load_cascade_profiles(tmp_path: Path):
+    path = tmp_path / "profiles.json"
+    path.write_text(json.dumps({"business_category": PROFILE.model_dump()}))
+
+    assert load_cascade_profiles(path) == {"business_category": PROFILE}
@@ -0,0 +1,120 @@
+import asyncio
+import time
+
+import httpx
+import openai
+import pytest
+
+from llmops_training.news_reader import generation
+from llmops_training.news_reader.circuit_breaker import CircuitBreaker, CircuitOpenError
+from llmops_training.news_reader.extraction import DegradedArticleInfo, extract_article_info
+from llmops_training.news_reader.fake_server import FakeLLMServer
+from llmops_training.news_reader.rate_limit import RateLimiter
+
+
+def fail():
+    raise openai.APIConnectionError(request=httpx.Request("POST", "https://example.com"))
+
+
+def test_breaker_opens_after_consecutive_failures():
+    breaker = CircuitBreaker(failure_threshold=2)
+
+    for _ in range(2):
+        with pytest.raises(openai.APIConnectionError):
+            breaker.call(fail)
+
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpenError):
+        breaker.call(lambda: "ok")
+    assert breaker.stats()["rejected"] == 1
+
+
+def test_breaker_ignores_non_api_errors():
+    breaker = CircuitBreaker(failure_threshold=2)
+    with pytest.raises(openai.APIConnectionError):
+        breaker.call(fail)
+
+    with pytest.raises(ValueError):
+        breaker.call(lambda: int("not a number"))
+
+    assert breaker.state == "closed"
+    assert breaker.stats()["consecutive_failures"] == 1  # Not reset either
+
+
+def test_breaker_closes_after_successful_half_open_trial():
+    transitions = []
+    breaker = CircuitBreaker(
+        failure_threshold=1,
+        recovery_timeout=0.05,
+        on_state_change=lambda old, new, failures: transitions.append((old, new)),
+    )
+    with pytest.raises(openai.APIConnectionError):
+        breaker.call(fail)
+
+    time.sleep(0.06)
+    breaker.before_call()  # The single trial
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    breaker.record_success()
+
+    assert breaker.state == "closed"
+    assert transitions == [("closed", "open"), ("open", "half_open"), ("half_open", "closed")]
+
+
+def test_breaker_reopens_after_failed_half_open_trial():
+    breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=0.05)
+    with pytest.raises(openai.APIConnectionError):
+        breaker.call(fail)
+
+    time.sleep(0.06)
+    with pytest.raises(openai.APIConnectionError):
+        breaker.call(fail)
+
+    assert breaker.state == "open"
+
+
+def test_cancelled_call_releases_half_open_trial():
+    breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=0.0)
+    with pytest.raises(openai.APIConnectionError):
+        breaker.call(fail)
+
+    async def cancelled_call():
+        task = asyncio.ensure_future(breaker.call_async(lambda: asyncio.sleep(1)))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(cancelled_call())
+
+    assert breaker.state == "half_open"
+    breaker.before_call()
+
+
+def test_extract_article_info_degrades_when_circuit_opens(fake_server: FakeLLMServer, monkeypatch):
+    fake_server.config.error_probability = 1.0
+    monkeypatch.setattr(generation, "_rate_limiter", RateLimiter(max_retries=0))
+    monkeypatch.setattr(generation, "_circuit_breaker", CircuitBreaker(failure_threshold=1))
+
+    # The error of the first step opens the circuit, so the next steps and articles find it open
+    first_article_info, _ = extract_article_info(
+        "Shares in Acme rose sharply today.", concurrent=False
+    )
+    article_info, _ = extract_article_info("Shares in Acme rose sharply today.", concurrent=False)
+
+    assert isinstance(first_article_info, DegradedArticleInfo)
+    assert isinstance(article_info, DegradedArticleInfo)
+    assert article_info.title == "Shares in Acme rose sharply today."
+    assert fake_server.stats()["requests"] == 1  # Only the general info of the first article
+
+
+def test_breaker_counts_every_retried_attempt(fake_server: FakeLLMServer, monkeypatch):
+    fake_server.config.error_probability = 1.0
+    monkeypatch.setattr(generation, "_rate_limiter", RateLimiter(max_retries=5, base_delay=0))
+    monkeypatch.setattr(generation, "_circuit_breaker", CircuitBreaker(failure_threshold=3))
+
+    # The breaker opens after the third attempt, so the remaining retries are not sent
+    with pytest.raises(CircuitOpenError):
+        generation.generate_text("Hello", use_cache=False)
+
+    assert fake_server.stats()["requests"] == 3
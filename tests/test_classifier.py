@@ -0,0 +1,108 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from llmops_training.news_reader import classifier, extraction
+from llmops_training.news_reader.classifier import (
+    BusinessPreClassifier,
+    HashedBagOfWordsClassifier,
+    evaluate_pre_classifier,
+    hash_features,
+    train_business_classifier,
+)
+from llmops_training.news_reader.extraction import (
+    extract_business_category,
+    get_business_category_prompt_template,
+)
+
+BUSINESS_ARTICLES = [
+    "Shares in Acme rose after the company reported record quarterly profits.",
+    "The bank raised interest rates as inflation hit investors and markets.",
+    "Globex shares fell sharply after the firm cut its profit forecast.",
+    "The retailer reported falling sales and warned investors about profits.",
+]
+OTHER_ARTICLES = [
+    "The football match ended in a draw after a late goal by the striker.",
+    "The band announced a world tour and a new album for next summer.",
+    "Heavy rain and storms are expected across the north this weekend.",
+    "The team won the championship final in front of a home crowd.",
+]
+
+
+@pytest.fixture
+def trained_classifier() -> HashedBagOfWordsClassifier:
+    articles = BUSINESS_ARTICLES + OTHER_ARTICLES
+    labels = [True] * len(BUSINESS_ARTICLES) + [False] * len(OTHER_ARTICLES)
+    return train_business_classifier(articles, labels, epochs=30)
+
+
+def test_hash_features_is_stable_and_normalized():
+    features = hash_features("Shares rose, shares fell", n_features=2**10)
+
+    assert features == hash_features("shares rose shares fell", n_features=2**10)
+    assert sum(value**2 for value in features.values()) == pytest.approx(1.0)
+
+
+def test_classifier_separates_business_articles(trained_classifier: HashedBagOfWordsClassifier):
+    assert trained_classifier.predict_proba("Acme shares and profits rose for investors") > 0.5
+    assert trained_classifier.predict_proba("The striker scored a goal in the final") < 0.5
+
+
+def test_classifier_save_and_load(trained_classifier: HashedBagOfWordsClassifier, tmp_path: Path):
+    path = tmp_path / "classifier.npz"
+    trained_classifier.save(path)
+
+    loaded = HashedBagOfWordsClassifier.load(path)
+
+    article = BUSINESS_ARTICLES[0]
+    assert loaded.predict_proba(article) == pytest.approx(trained_classifier.predict_proba(article))
+
+
+def test_classifier_load_rejects_other_version(tmp_path: Path):
+    path = tmp_path / "classifier.npz"
+    np.savez_compressed(path, version=0, weights=np.zeros(4), bias=0.0, l2=0.0)
+
+    with pytest.raises(ValueError, match="version"):
+        HashedBagOfWordsClassifier.load(path)
+
+
+def test_pre_classifier_only_decides_outside_uncertain_band(
+    trained_classifier: HashedBagOfWordsClassifier,
+):
+    pre_classifier = BusinessPreClassifier(trained_classifier, lower=0.1, upper=0.9)
+
+    assert pre_classifier.decide(0.05) is False
+    assert pre_classifier.decide(0.5) is None
+    assert pre_classifier.decide(0.95) is True
+
+    for article in BUSINESS_ARTICLES:
+        pre_classifier.classify(article)
+    assert pre_classifier.stats()["articles"] == len(BUSINESS_ARTICLES)
+
+
+def test_evaluate_pre_classifier(trained_classifier: HashedBagOfWordsClassifier):
+    pre_classifier = BusinessPreClassifier(trained_classifier, lower=0.4, upper=0.6)
+    articles = BUSINESS_ARTICLES + OTHER_ARTICLES
+    labels = [True] * len(BUSINESS_ARTICLES) + [False] * len(OTHER_ARTICLES)
+
+    metrics = evaluate_pre_classifier(pre_classifier, articles, labels)
+
+    assert metrics == {"precision": 1.0, "recall": 1.0, "call_savings": 1.0}
+    assert pre_classifier.stats()["articles"] == 0
+
+
+def test_extract_business_category_skips_llm_when_confident(
+    trained_classifier: HashedBagOfWordsClassifier, monkeypatch
+):
+    calls = []
+    monkeypatch.setattr(extraction, "generate_step_object", lambda *args, **_: calls.append(args))
+    monkeypatch.setattr(
+        classifier, "_pre_classifier", BusinessPreClassifier(trained_classifier, 0.4, 0.6)
+    )
+
+    output = extract_business_category(get_business_category_prompt_template(), OTHER_ARTICLES[0])
+
+    assert output.is_about_business is False
+    assert calls == []
+    assert classifier.get_pre_classifier().stats()["llm_calls_saved"] == 1
@@ -0,0 +1,73 @@
+from pathlib import Path
+
+import pytest
+
+from llmops_training.news_reader.dedup import (
+    Deduplication,
+    NearDuplicateIndex,
+    choose_bands,
+    deduplicate_articles,
+    get_shingles,
+    jaccard,
+)
+
+ARTICLE = (Path(__file__).parent / "articles" / "article_0.txt").read_text(encoding="utf-8")
+
+
+def edit(article: str, n_words: int) -> str:
+    """Return the article with the first `n_words` words of its last paragraph changed."""
+    *paragraphs, last = article.strip().split("\n")
+    words = last.split()
+    return "\n".join([*paragraphs, " ".join(["edited"] * n_words + words[n_words:])])
+
+
+def test_get_shingles_ignores_case_and_punctuation():
+    assert get_shingles("Acme shares rose, sharply!", 2) == get_shingles(
+        "acme shares rose sharply", 2
+    )
+    assert len(get_shingles("Too short", 5)) == 1
+
+
+@pytest.mark.parametrize("threshold", [0.5, 0.8, 0.95])
+def test_choose_bands_catches_articles_at_threshold(threshold: float):
+    bands, rows = choose_bands(threshold, num_perm=128)
+
+    assert bands * rows == 128
+    assert 1 - (1 - threshold**rows) ** bands >= 0.99
+
+
+def test_index_finds_near_duplicates():
+    index = NearDuplicateIndex(threshold=0.8)
+    near_duplicate = edit(ARTICLE, 3)
+    assert jaccard(get_shingles(ARTICLE), get_shingles(near_duplicate)) >= 0.8
+
+    assert index.add(ARTICLE) == (0, False)
+    assert index.add("A different story about the weather this weekend.") == (1, False)
+    assert index.add(near_duplicate) == (0, True)
+    assert index.add(ARTICLE.upper()) == (0, True)
+
+
+def test_deduplicate_articles():
+    other = "A different story about the weather this weekend."
+    articles = [ARTICLE, other, edit(ARTICLE, 3), ARTICLE, other]
+
+    deduplication = deduplicate_articles(articles, threshold=0.8)
+
+    assert deduplication.representatives == [0, 1, 0, 0, 1]
+    assert deduplication.unique_indices == [0, 1]
+    assert deduplication.dedup_ratio == pytest.approx(0.6)
+
+
+def test_deduplicate_articles_respects_threshold():
+    articles = [ARTICLE, edit(ARTICLE, 60)]
+    similarity = jaccard(get_shingles(articles[0]), get_shingles(articles[1]))
+
+    assert deduplicate_articles(articles, threshold=similarity - 0.05).unique_indices == [0]
+    assert deduplicate_articles(articles, threshold=similarity + 0.05).unique_indices == [0, 1]
+
+
+def test_fan_out():
+    deduplication = Deduplication([0, 1, 0, 3])
+
+    assert deduplication.fan_out(["a", "b", "d"]) == ["a", "b", "a", "d"]
+    assert Deduplication([]).dedup_ratio == 0.0
@@ -1,6 +1,7 @@
 import pandas as pd
 import pytest
 
+from llmops_training.news_reader import evaluation
 from llmops_training.news_reader.data import get_evaluation_data
 from llmops_training.news_reader.evaluation import run_evaluation
 from llmops_training.news_reader.logs import configure_structlog, configure_tracer
@@ -15,3 +16,19 @@ def evaluation_data() -> pd.DataFrame:
 
 
 # TODO: Fill me in! Add evaluation test that asserts pass rates are satisfied
+
+
+def test_extract_article_info_with_latency_bypasses_cache_and_store(monkeypatch):
+    calls = []
+
+    def fake_extract_article_info(article, **kwargs):
+        calls.append(kwargs)
+        raise ValueError("Extraction failed")
+
+    monkeypatch.setattr(evaluation, "extract_article_info", fake_extract_article_info)
+
+    article_infos, latencies = evaluation.extract_article_info_with_latency(["Article"], "fused")
+
+    assert article_infos == [None]
+    assert len(latencies) == 1
+    assert calls == [{"mode": "fused", "use_cache": False, "use_store": False}]
@@ -1,15 +1,44 @@
+import asyncio
+import time
 from pathlib import Path
 
+import instructor
 import pytest
 
+from llmops_training.news_reader import extraction, generation
 from llmops_training.news_reader.extraction import (
+    ArticleInfo,
+    BusinessCategory,
+    BusinessesInvolved,
+    BusinessesSpecificInfo,
+    BusinessSpecificInfo,
+    DegradedArticleInfo,
+    GeneralInfo,
+    IncompleteArticleInfo,
+    PartialArticleInfo,
+    extract_article_info,
     extract_businesses_involved,
+    extract_businesses_specific_info_batched,
     extract_general_info,
+    extract_info_from_articles,
+    extract_info_from_articles_async,
+    extract_info_from_articles_concurrently,
+    format_messages,
     format_prompt,
+    get_business_specific_prompt_template,
     get_businesses_involved_prompt_template,
+    get_businesses_specific_prompt_template,
     get_general_info_prompt_template,
+    iter_extract_info,
+    iter_extract_info_async,
+    mock_extract_article_info,
+    split_article,
+    stream_article_info,
 )
+from llmops_training.news_reader.fake_server import FakeLLMServer
 from llmops_training.news_reader.logs import configure_structlog, configure_tracer
+from llmops_training.news_reader.rate_limit import estimate_tokens
+from llmops_training.news_reader.usage import UsageStats
 
 configure_structlog()
 configure_tracer()
@@ -44,3 +73,493 @@ def test_format_prompt_article_and_business():
 
 
 # TODO: Fill me in! Add more tests here
+
+
+def business_specific_info(business: str) -> BusinessSpecificInfo:
+    return BusinessSpecificInfo(
+        business=business,
+        stock_price_change="none",
+        reason="Some reason",
+        relevant_substring="Some substring",
+    )
+
+
+def test_businesses_specific_info_drops_invalid_entries():
+    output = BusinessesSpecificInfo.model_validate(
+        {"business_info": [business_specific_info("Acme").model_dump(), {"business": "Globex"}]}
+    )
+
+    assert [info.business for info in output.business_info] == ["Acme"]
+
+
+@pytest.mark.parametrize("concurrent", [True, False])
+def test_extract_businesses_specific_info_batched(monkeypatch, concurrent: bool):
+    calls = []
+
+    def fake_generate_step_object(step, prompt, response_model, **kwargs):
+        calls.append((step, prompt))
+        instructions = prompt[-1]["content"]
+        if response_model is BusinessSpecificInfo:
+            return business_specific_info(instructions.split("'")[1])
+        # Drop the last business of each chunk, as if its entry failed validation
+        businesses = instructions.split("'")[1:-1:2]
+        return BusinessesSpecificInfo(
+            business_info=[business_specific_info(b.lower()) for b in businesses[:-1]]
+        )
+
+    monkeypatch.setattr(extraction, "generate_step_object", fake_generate_step_object)
+    businesses = ["Acme", "Globex", "Initech", "Umbrella", "Hooli"]
+
+    output = extract_businesses_specific_info_batched(
+        get_businesses_specific_prompt_template(),
+        get_business_specific_prompt_template(),
+        "This is an article.",
+        businesses,
+        batch_size=2,
+        concurrent=concurrent,
+    )
+
+    assert [info.business.lower() for info in output] == [b.lower() for b in businesses]
+    steps = [step for step, _ in calls]
+    assert steps.count("businesses_specific_info") == 3
+    assert steps.count("business_specific_info") == 3  # Globex, Umbrella and Hooli
+
+
+def fake_generate_step_object_with_failures(
+    calls: list, failures: dict, is_about_business: bool = True
+):
+    """Return a fake `generate_step_object` that fails a step (or business) `failures` times."""
+
+    def fake_generate_step_object(step, prompt, response_model, **kwargs):
+        instructions = prompt[-1]["content"]
+        quoted = instructions.split("'")
+        key = f"{step}.{quoted[1]}" if len(quoted) > 1 else step
+        calls.append(key)
+        if failures.get(key, 0) > 0:
+            failures[key] -= 1
+            raise ValueError(f"{key} failed")
+        if response_model is ArticleInfo:
+            return mock_extract_article_info("")[0]
+        if response_model is GeneralInfo:
+            return GeneralInfo(title="Title", summary="Summary")
+        if response_model is BusinessCategory:
+            time.sleep(0.05)  # Let speculative steps start first
+            return BusinessCategory(is_about_business=is_about_business)
+        if response_model is BusinessesInvolved:
+            return BusinessesInvolved(businesses=["Acme", "Globex"])
+        return business_specific_info(instructions.split("'")[1])
+
+    return fake_generate_step_object
+
+
+@pytest.mark.parametrize("concurrent", [True, False])
+@pytest.mark.parametrize("batch_businesses", [True, False])
+def test_extract_article_info_passes_kwargs_to_every_step(
+    monkeypatch, concurrent: bool, batch_businesses: bool
+):
+    model_names = {}
+    fake = fake_generate_step_object_with_failures([], {})
+
+    def fake_generate_step_object(step, prompt, response_model, **kwargs):
+        model_names[step] = kwargs.get("model_name")
+        if response_model is BusinessesSpecificInfo:
+            businesses = prompt[-1]["content"].split("'")[1:-1:2]
+            return BusinessesSpecificInfo(
+                business_info=[business_specific_info(b) for b in businesses]
+            )
+        return fake(step, prompt, response_model, **kwargs)
+
+    monkeypatch.setattr(extraction, "generate_step_object", fake_generate_step_object)
+
+    extract_article_info(
+        "This is an article.",
+        concurrent=concurrent,
+        batch_businesses=batch_businesses,
+        use_store=False,
+        model_name="gpt-4o",
+    )
+
+    assert "businesses_involved" in model_names
+    assert set(model_names.values()) == {"gpt-4o"}
+
+
+@pytest.mark.parametrize("concurrent", [True, False])
+def test_extract_article_info_retries_only_failed_steps(monkeypatch, concurrent: bool):
+    calls = []
+    failures = {"general_info": 1, "business_specific_info.Globex": 2}
+    monkeypatch.setattr(
+        extraction, "generate_step_object", fake_generate_step_object_with_failures(calls, failures)
+    )
+    monkeypatch.setattr(extraction, "_step_retry_budget", 3)
+
+    article_info, _ = extract_article_info("This is an article.", concurrent=concurrent)
+
+    assert not isinstance(article_info, IncompleteArticleInfo)
+    assert article_info.title == "Title"
+    assert [info.business for info in article_info.business_info] == ["Acme", "Globex"]
+    assert calls.count("general_info") == 2
+    assert calls.count("business_category") == 1
+    assert calls.count("business_specific_info.Acme") == 1
+    assert calls.count("business_specific_info.Globex") == 3
+
+
+@pytest.mark.parametrize("concurrent", [True, False])
+def test_extract_article_info_keeps_partial_info_when_budget_runs_out(
+    monkeypatch, concurrent: bool
+):
+    calls = []
+    failures = {"general_info": 10, "business_specific_info.Globex": 10}
+    monkeypatch.setattr(
+        extraction, "generate_step_object", fake_generate_step_object_with_failures(calls, failures)
+    )
+    monkeypatch.setattr(extraction, "_step_retry_budget", 2)
+
+    article_info, _ = extract_article_info("This is an article.", concurrent=concurrent)
+
+    assert isinstance(article_info, IncompleteArticleInfo)
+    assert sorted(article_info.errors) == [
+        "business_info.Globex",
+        "summary",
+        "title",
+    ]
+    assert "general_info failed" in article_info.errors["title"]
+    assert article_info.title == ""
+    assert article_info.is_about_business is True
+    assert [info.business for info in article_info.business_info] == ["Acme"]
+    # Two failed steps, and two retries in total
+    assert calls.count("general_info") + calls.count("business_specific_info.Globex") == 4
+
+
+@pytest.mark.parametrize("is_about_business", [False, True])
+def test_extract_article_info_only_recovers_speculative_steps_that_are_used(
+    monkeypatch, is_about_business: bool
+):
+    calls = []
+    monkeypatch.setattr(
+        extraction,
+        "generate_step_object",
+        fake_generate_step_object_with_failures(
+            calls, {"businesses_involved": 1}, is_about_business
+        ),
+    )
+    monkeypatch.setattr(extraction, "_step_retry_budget", 1)
+
+    article_info, _ = extract_article_info("This is an article.", speculative=True)
+
+    assert not isinstance(article_info, IncompleteArticleInfo)
+    assert article_info.is_about_business is is_about_business
+    # The failed speculative attempt is only retried if the article is about business
+    assert calls.count("businesses_involved") == (2 if is_about_business else 1)
+    assert len(article_info.business_info) == (2 if is_about_business else 0)
+
+
+@pytest.mark.parametrize("n_failures, is_complete", [(1, True), (3, False)])
+def test_extract_article_info_recovers_fused_call(monkeypatch, n_failures: int, is_complete: bool):
+    calls = []
+    monkeypatch.setattr(
+        extraction,
+        "generate_step_object",
+        fake_generate_step_object_with_failures(calls, {"article_info": n_failures}),
+    )
+    monkeypatch.setattr(extraction, "_step_retry_budget", 2)
+
+    article_info, _ = extract_article_info("This is an article.", mode="fused")
+
+    assert isinstance(article_info, IncompleteArticleInfo) is not is_complete
+    assert calls.count("article_info") == min(n_failures + 1, 3)
+    if not is_complete:
+        assert sorted(article_info.errors) == [
+            "business_info",
+            "is_about_business",
+            "summary",
+            "title",
+        ]
+
+
+def test_extract_article_info_marks_business_info_when_category_fails(monkeypatch):
+    calls = []
+    monkeypatch.setattr(
+        extraction,
+        "generate_step_object",
+        fake_generate_step_object_with_failures(calls, {"business_category": 10}),
+    )
+    monkeypatch.setattr(extraction, "_step_retry_budget", 0)
+
+    article_info, _ = extract_article_info("This is an article.")
+
+    assert isinstance(article_info, IncompleteArticleInfo)
+    assert sorted(article_info.errors) == ["business_info", "is_about_business"]
+    assert article_info.title == "Title"
+    assert "businesses_involved" not in calls
+
+
+def test_extract_info_from_articles_async_preserves_order(monkeypatch):
+    def fake_extract_article_info(article, **kwargs):
+        time.sleep(0.05 if article == "slow" else 0.01)
+        if article == "error":
+            raise ValueError("Extraction failed")
+        return mock_extract_article_info(article)
+
+    monkeypatch.setattr(extraction, "extract_article_info", fake_extract_article_info)
+    articles = ["slow", "fast", "error", "fast"]
+
+    article_infos, trace_ids = asyncio.run(
+        extract_info_from_articles_async(articles, max_concurrency=4)
+    )
+
+    assert [info is None for info in article_infos] == [False, False, True, False]
+    assert len(trace_ids) == 4
+    assert trace_ids[2] not in (0, trace_ids[0])  # The trace of the failed article
+
+
+def test_extract_info_from_articles_async_returns_trace_id_of_each_article(monkeypatch):
+    def fake_extract_article_info(article, **kwargs):
+        if article == "error":
+            raise ValueError("Extraction failed")
+        return mock_extract_article_info(article)  # With a mock trace ID
+
+    monkeypatch.setattr(extraction, "extract_article_info", fake_extract_article_info)
+
+    _, trace_ids = asyncio.run(extract_info_from_articles_async(["a", "error", "b"]))
+
+    assert len(set(trace_ids)) == 3
+    assert all(trace_id not in (0, mock_extract_article_info("a")[1]) for trace_id in trace_ids)
+
+
+def test_extract_info_from_articles_concurrently_times_out(monkeypatch):
+    def fake_extract_article_info(article, **kwargs):
+        time.sleep(float(article))
+        return mock_extract_article_info(article)
+
+    monkeypatch.setattr(extraction, "extract_article_info", fake_extract_article_info)
+
+    async def extract_in_running_loop():
+        return extract_info_from_articles_concurrently(["0.01", "1", "0.01"], timeout=0.2)
+
+    start = time.monotonic()
+    article_infos, _ = asyncio.run(extract_in_running_loop())
+
+    assert [info is None for info in article_infos] == [False, True, False]
+    assert time.monotonic() - start < 0.9
+
+
+@pytest.mark.parametrize("concurrently", [False, True])
+def test_extract_info_from_articles_extracts_near_duplicates_once(
+    monkeypatch, article: str, concurrently: bool
+):
+    extracted = []
+
+    def fake_extract_article_info(article, **kwargs):
+        extracted.append(article)
+        return mock_extract_article_info(article)
+
+    monkeypatch.setattr(extraction, "extract_article_info", fake_extract_article_info)
+    other = "A different story about the weather this weekend."
+    articles = [article, other, article.replace("\n", "\n\n"), article]
+
+    extract = (
+        extract_info_from_articles_concurrently if concurrently else extract_info_from_articles
+    )
+    article_infos, trace_ids = extract(articles, dedup_threshold=0.8)
+
+    assert sorted(extracted) == sorted([article, other])
+    assert article_infos[0] == article_infos[2] == article_infos[3]
+    assert article_infos[0] is not article_infos[3]
+    assert trace_ids[0] == trace_ids[2] == trace_ids[3]
+
+
+def test_iter_extract_info_yields_in_completion_order(monkeypatch):
+    def fake_extract_article_info(article, **kwargs):
+        time.sleep(float(article))
+        if article == "0.02":
+            raise ValueError("Extraction failed")
+        return mock_extract_article_info(article)
+
+    monkeypatch.setattr(extraction, "extract_article_info", fake_extract_article_info)
+    read = []
+
+    def articles():  # A lazy stream, read only when there is room
+        for article in ["0.2", "0.01", "0.02", "0.05"]:
+            read.append(article)
+            yield article
+
+    results = iter_extract_info(articles(), max_concurrency=2)
+
+    index, article_info, trace_id = next(results)
+    assert (index, len(read)) == (1, 2)
+    assert isinstance(article_info, ArticleInfo)
+    assert trace_id != 0
+    rest = list(results)
+    assert [index for index, _, _ in rest] == [2, 3, 0]
+    assert isinstance(rest[0][1], ValueError)
+
+
+def test_iter_extract_info_async_accepts_async_iterable(monkeypatch):
+    monkeypatch.setattr(extraction, "extract_article_info", lambda article, **_: time.sleep(1))
+
+    async def articles():
+        for article in ["a", "b", "c"]:
+            yield article
+
+    async def extract():
+        return [result async for result in iter_extract_info_async(articles(), timeout=0.05)]
+
+    start = time.monotonic()
+    results = asyncio.run(extract())
+
+    assert sorted(index for index, _, _ in results) == [0, 1, 2]
+    assert all(isinstance(article_info, TimeoutError) for _, article_info, _ in results)
+    assert time.monotonic() - start < 0.9
+
+
+def test_iter_extract_info_can_stop_early(monkeypatch):
+    monkeypatch.setattr(
+        extraction, "extract_article_info", lambda article, **_: mock_extract_article_info(article)
+    )
+
+    results = iter_extract_info(map(str, range(1000)), max_concurrency=4)
+    first = next(results)
+    results.close()
+
+    assert first[0] < 4
+
+
+def test_format_messages_puts_article_first():
+    article = "This is an article."
+    templates = [get_general_info_prompt_template(), get_business_specific_prompt_template()]
+
+    messages = [format_messages(template, article, "Company") for template in templates[1:]]
+    messages.append(format_messages(templates[0], article))
+
+    assert messages[0][0] == messages[1][0]  # The same system message, with the article
+    assert article in messages[0][0]["content"]
+    assert "'Company'" in messages[0][1]["content"]
+    assert article not in messages[0][1]["content"]
+
+
+def test_split_article_on_paragraphs():
+    paragraphs = [f"Paragraph {i}" + " word" * 20 for i in range(6)]
+    article = "\n".join(paragraphs)
+
+    chunks = split_article(article, max_tokens=60)
+
+    assert len(chunks) == 3
+    assert all(estimate_tokens(chunk) <= 60 for chunk in chunks)
+    assert "\n".join(chunks) == article.strip()
+
+
+def test_split_article_splits_long_paragraph_on_words():
+    article = "word " * 200
+
+    chunks = split_article(article, max_tokens=50)
+
+    assert all(estimate_tokens(chunk) <= 50 for chunk in chunks)
+    assert " ".join(chunks).split() == article.split()
+    assert split_article("Short article.", max_tokens=50) == ["Short article."]
+
+
+def is_fully_extracted(article_info) -> bool:
+    return isinstance(article_info, ArticleInfo) and not isinstance(
+        article_info, (DegradedArticleInfo, IncompleteArticleInfo)
+    )
+
+
+@pytest.mark.parametrize(
+    "mode, batch_businesses, n_requests",
+    [
+        ("modular", False, 5),  # General info, category, businesses, and a call per business
+        ("modular", True, 4),  # General info, category, businesses, and a batched call
+        ("fused", False, 1),
+        ("hybrid", False, 3),  # Overview, and a call per business
+        ("hybrid", True, 2),  # Overview, and a batched call
+    ],
+)
+def test_extract_article_info_with_fake_server(
+    fake_server: FakeLLMServer, mode: str, batch_businesses: bool, n_requests: int
+):
+    article_info, _ = extract_article_info(
+        "Shares in Acme rose sharply today.", mode=mode, batch_businesses=batch_businesses
+    )
+
+    assert is_fully_extracted(article_info)
+    assert article_info.is_about_business
+    assert len(article_info.business_info) == 2
+    assert fake_server.stats()["requests"] == n_requests
+
+
+def test_fake_server_answers_batched_requests_for_the_requested_businesses(
+    fake_server: FakeLLMServer,
+):
+    businesses = ["Acme", "Globex", "Initech"]
+
+    business_info = extract_businesses_specific_info_batched(
+        get_businesses_specific_prompt_template(),
+        get_business_specific_prompt_template(),
+        "Shares in Acme rose sharply today.",
+        businesses,
+        batch_size=2,
+    )
+
+    assert [info.business for info in business_info] == businesses
+    assert fake_server.stats()["requests"] == 2  # A call per batch, none per business
+
+
+def test_stream_article_info_with_fake_server(fake_server: FakeLLMServer):
+    outputs = list(stream_article_info("Shares in Acme rose sharply today."))
+
+    assert outputs[0] == PartialArticleInfo()
+    assert is_fully_extracted(outputs[-1])
+    assert outputs[-1].model_dump() == outputs[-2].model_dump()
+    assert len(outputs[-1].business_info) == 2
+    assert fake_server.stats()["requests"] == 5
+
+
+def test_extract_info_from_articles_concurrently_with_fake_server(fake_server: FakeLLMServer):
+    articles = [f"Shares in Acme rose {i}% today." for i in range(3)]
+
+    article_infos, trace_ids = extract_info_from_articles_concurrently(articles)
+
+    assert all(is_fully_extracted(info) for info in article_infos)
+    assert len(set(trace_ids)) == 3
+    assert fake_server.stats()["requests"] == 3 * 5
+
+
+def test_article_prefix_is_cached_across_steps_in_json_mode(
+    fake_server: FakeLLMServer, monkeypatch
+):
+    fake_server.config.prompt_cache_min_tokens = 256
+    monkeypatch.setattr(generation, "_instructor_mode", instructor.Mode.JSON)
+    monkeypatch.setattr(generation, "_usage_stats", UsageStats())
+    article = "Shares in Acme rose sharply today. " * 100
+
+    article_info, _ = extract_article_info(article, concurrent=False)
+
+    assert is_fully_extracted(article_info)
+    stats = generation.get_usage_stats().stats()
+    assert stats["responses"] == fake_server.stats()["requests"] == 5
+    assert stats["cache_hits"] == 4  # All but the first call
+    assert stats["cached_tokens"] == fake_server.stats()["cached_tokens"] > 0
+
+
+@pytest.mark.parametrize(
+    "batch_businesses, n_requests",
+    [
+        (False, 4 + 4 * 2 + 1),  # An overview and a call per business per chunk, and the digest
+        (True, 4 + 4 + 1),  # An overview and a batched call per chunk, and the digest
+    ],
+)
+def test_extract_long_article_in_chunks_with_fake_server(
+    fake_server: FakeLLMServer, monkeypatch, batch_businesses: bool, n_requests: int
+):
+    monkeypatch.setattr(extraction, "_max_chunk_tokens", 50)
+    article = "\n".join(f"Paragraph {i}: shares in Acme rose sharply today." * 3 for i in range(4))
+    assert len(split_article(article, 50)) == 4
+
+    article_info, _ = extract_article_info(
+        article, mode="chunked", batch_businesses=batch_businesses
+    )
+
+    assert is_fully_extracted(article_info)
+    assert fake_server.stats()["requests"] == n_requests
+    businesses = [info.business for info in article_info.business_info]
+    assert len(businesses) == len(set(businesses)) == 4 * 2
@@ -0,0 +1,78 @@
+import random
+
+import pytest
+
+from llmops_training.news_reader import generation
+from llmops_training.news_reader.extraction import (
+    ArticleInfo,
+    BusinessCategory,
+    BusinessesInvolved,
+    BusinessesSpecificInfo,
+    BusinessSpecificInfo,
+    GeneralInfo,
+)
+from llmops_training.news_reader.fake_server import (
+    FakeLLMServer,
+    FakeServerConfig,
+    count_cached_tokens,
+    generate_from_schema,
+    make_flag_parser,
+)
+
+
+@pytest.mark.parametrize(
+    "response_model",
+    [GeneralInfo, BusinessCategory, BusinessesInvolved, BusinessSpecificInfo, ArticleInfo],
+)
+def test_generate_from_schema_is_valid(response_model):
+    value = generate_from_schema(response_model.model_json_schema(), random.Random(0))
+    response_model.model_validate(value)
+
+
+def test_generate_from_schema_echoes_requested_businesses():
+    schema = BusinessesSpecificInfo.model_json_schema()
+
+    value = generate_from_schema(schema, random.Random(0), businesses=["Acme", "Globex", "Hooli"])
+
+    assert [info["business"] for info in value["business_info"]] == ["Acme", "Globex", "Hooli"]
+
+
+def test_generate_from_schema_uses_field_values():
+    schema = ArticleInfo.model_json_schema()
+
+    values = [
+        generate_from_schema(schema, random.Random(seed), field_values={"is_about_business": True})
+        for seed in range(10)
+    ]
+
+    assert all(value["is_about_business"] is True for value in values)
+
+
+def test_generate_text_reports_usage(fake_server: FakeLLMServer):
+    response = generation.get_azure_client().chat.completions.create(
+        model="o3-mini", messages=[{"role": "user", "content": "Say hello"}]
+    )
+
+    assert response.choices[0].message.content.startswith("Fake response")
+    assert response.usage.prompt_tokens > 0
+    assert fake_server.stats()["requests"] == 1
+
+
+def test_count_cached_tokens():
+    prompt_cache = set()
+    prompt = "x" * 4 * 300
+
+    assert count_cached_tokens(prompt, prompt_cache, min_tokens=100) == 0
+    assert count_cached_tokens(prompt + "y" * 400, prompt_cache, min_tokens=100) == 228
+    assert count_cached_tokens("z" + prompt, prompt_cache, min_tokens=100) == 0
+
+
+def test_make_flag_parser():
+    fields = FakeServerConfig.model_fields
+
+    assert make_flag_parser(fields["latency_median"].annotation)("0.1") == 0.1
+    assert make_flag_parser(fields["prompt_cache_min_tokens"].annotation)("256") == 256
+    assert make_flag_parser(fields["prompt_cache_min_tokens"].annotation)("none") is None
+    assert make_flag_parser(fields["field_values"].annotation)('{"is_about_business": true}') == {
+        "is_about_business": True
+    }
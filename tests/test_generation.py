@@ -1,6 +1,11 @@
+import asyncio
+
 from pydantic import BaseModel
 
-from llmops_training.news_reader.generation import generate_object, generate_text
+from llmops_training.news_reader import generation
+from llmops_training.news_reader.extraction import BusinessSpecificInfo, GeneralInfo
+from llmops_training.news_reader.fake_server import FakeLLMServer
+from llmops_training.news_reader.generation import ClientRegistry, generate_object, generate_text
 
 
 def test_generate_text():
@@ -21,3 +26,65 @@ def test_generate_object() -> None:
     assert isinstance(resp, User)
     assert resp.name == "Jason"
     assert resp.age == 25
+
+
+def test_client_registry_reuses_clients() -> None:
+    registry = ClientRegistry()
+    endpoint = "https://example.openai.azure.com"
+
+    azure_client = registry.get_azure_client(endpoint, "2024-10-21", api_key="test")
+    instructor_client = registry.get_instructor_client(endpoint, "2024-10-21", api_key="test")
+
+    assert registry.get_azure_client(endpoint, "2024-10-21") is azure_client
+    assert registry.get_instructor_client(endpoint, "2024-10-21") is instructor_client
+    assert registry.get_azure_client(endpoint, "2025-01-01", api_key="test") is not azure_client
+
+    registry.close()
+    assert registry.get_azure_client(endpoint, "2024-10-21", api_key="test") is not azure_client
+
+
+def test_client_registry_pools_async_clients_per_event_loop() -> None:
+    registry = ClientRegistry()
+    endpoint = "https://example.openai.azure.com"
+
+    async def get_clients():
+        first = registry.get_async_instructor_client(endpoint, "2024-10-21", api_key="test")
+        second = registry.get_async_instructor_client(endpoint, "2024-10-21", api_key="test")
+        await registry.aclose()
+        return first, second
+
+    first, second = asyncio.run(get_clients())
+    other_loop_client, _ = asyncio.run(get_clients())
+
+    assert first is second
+    assert other_loop_client is not first
+
+
+def test_generate_object_with_fake_server(fake_server: FakeLLMServer):
+    output = generation.generate_object("Extract info from this article", BusinessSpecificInfo)
+
+    assert isinstance(output, BusinessSpecificInfo)
+    assert fake_server.stats()["requests"] == 1
+
+
+def test_stream_object_with_fake_server(fake_server: FakeLLMServer):
+    outputs = list(generation.stream_object("Extract info", BusinessSpecificInfo))
+
+    assert len(outputs) > 2
+    assert all(output.reason is None for output in outputs[:2])
+    assert isinstance(outputs[-1], BusinessSpecificInfo)
+    assert outputs[-1].model_dump() == outputs[-2].model_dump()
+    assert fake_server.stats()["requests"] == 1
+
+
+def test_stream_object_async_with_fake_server(fake_server: FakeLLMServer):
+    async def stream():
+        outputs = [output async for output in generation.stream_object_async("Hi", GeneralInfo)]
+        await generation.close_clients_async()
+        return outputs
+
+    outputs = asyncio.run(stream())
+
+    assert outputs[0].summary is None
+    assert isinstance(outputs[-1], GeneralInfo)
+    assert fake_server.stats()["requests"] == 1
@@ -0,0 +1,120 @@
+import asyncio
+import contextvars
+import time
+
+import pytest
+
+from llmops_training.news_reader.hedging import HedgingPolicy
+
+
+def make_policy(**kwargs) -> HedgingPolicy:
+    return HedgingPolicy(initial_delay=0.05, budget=1.0, **kwargs)
+
+
+def test_delay_is_percentile_of_recent_latencies():
+    policy = HedgingPolicy(percentile=90, min_delay=0.0, min_samples=10)
+    assert policy.delay() == policy.initial_delay
+
+    for latency in range(1, 101):
+        policy.record_latency(latency / 100)
+
+    assert policy.delay() == pytest.approx(0.9, abs=0.01)
+
+
+@pytest.mark.parametrize("percentile", [0, 100])
+def test_percentile_must_have_a_quantile(percentile: float):
+    with pytest.raises(ValueError):
+        HedgingPolicy(percentile=percentile)
+
+
+def test_call_hedges_slow_request():
+    policy = make_policy()
+
+    def func(is_hedge: bool) -> str:
+        time.sleep(0.01 if is_hedge else 0.5)
+        return "hedge" if is_hedge else "primary"
+
+    assert policy.call(func) == "hedge"
+    assert policy.stats()["hedges"] == 1
+    assert policy.stats()["hedges_won"] == 1
+
+
+def test_call_does_not_hedge_fast_request():
+    policy = make_policy()
+
+    assert policy.call(lambda is_hedge: is_hedge) is False
+    assert policy.stats()["hedges"] == 0
+
+
+def test_call_respects_hedge_budget():
+    policy = make_policy()
+    policy.budget = 0.5
+
+    def func(is_hedge: bool) -> bool:
+        time.sleep(0.01 if is_hedge else 0.1)
+        return is_hedge
+
+    assert [policy.call(func) for _ in range(4)] == [False, True, False, True]
+    assert policy.stats()["hedge_rate"] == 0.5
+
+
+def test_call_does_not_wait_for_a_worker_to_run_the_primary_request():
+    policy = make_policy(max_workers=1)
+    policy._executor.submit(time.sleep, 0.2)  # Keep the only worker busy
+
+    def func(is_hedge: bool) -> bool:
+        time.sleep(0.01)
+        return is_hedge
+
+    start = time.monotonic()
+    assert policy.call(func) is False
+    assert time.monotonic() - start < 0.1
+    assert policy.stats()["hedges"] == 0
+
+
+def test_call_runs_requests_in_the_callers_context():
+    policy = make_policy()
+    request_id = contextvars.ContextVar("request_id", default=None)
+    request_id.set("request-1")
+
+    def func(is_hedge: bool) -> str:
+        time.sleep(0.01 if is_hedge else 0.1)
+        return request_id.get()
+
+    assert policy.call(func) == "request-1"
+    assert policy.stats()["hedges"] == 1
+
+
+def test_call_falls_back_to_other_request_on_error():
+    policy = make_policy()
+
+    def func(is_hedge: bool) -> str:
+        if is_hedge:
+            raise RuntimeError("Hedge failed")
+        time.sleep(0.1)
+        return "primary"
+
+    assert policy.call(func) == "primary"
+    assert policy.stats()["hedges_won"] == 0
+
+
+def test_call_async_cancels_losing_request():
+    policy = make_policy()
+    cancelled = []
+
+    async def func(is_hedge: bool) -> str:
+        try:
+            await asyncio.sleep(0.01 if is_hedge else 1.0)
+        except asyncio.CancelledError:
+            cancelled.append(is_hedge)
+            raise
+        return "hedge" if is_hedge else "primary"
+
+    async def call() -> str:
+        output = await policy.call_async(func)
+        await asyncio.sleep(0)
+        return output
+
+    assert asyncio.run(call()) == "hedge"
+    assert cancelled == [False]
+    assert policy.stats()["hedges_won"] == 1
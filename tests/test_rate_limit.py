@@ -0,0 +1,113 @@
+import asyncio
+
+import httpx
+import openai
+import pytest
+
+from llmops_training.news_reader import generation
+from llmops_training.news_reader.extraction import GeneralInfo
+from llmops_training.news_reader.fake_server import FakeLLMServer
+from llmops_training.news_reader.rate_limit import (
+    RateLimiter,
+    TokenBucket,
+    estimate_request_tokens,
+    get_retry_after,
+    unwrap_exception,
+)
+
+
+def make_response(status_code: int, headers: dict) -> httpx.Response:
+    request = httpx.Request("POST", "https://example.openai.azure.com/openai/deployments/x")
+    return httpx.Response(status_code, headers=headers, request=request)
+
+
+def make_rate_limit_error(retry_after: str = "0") -> openai.RateLimitError:
+    response = make_response(429, {"retry-after": retry_after})
+    return openai.RateLimitError("Too many requests", response=response, body=None)
+
+
+def test_estimate_request_tokens_counts_completion_budget():
+    tokens = estimate_request_tokens("a" * 400, {"max_completion_tokens": 1000})
+    assert tokens == 1100
+
+
+def test_token_bucket_wait_time():
+    bucket = TokenBucket(capacity=60)
+    bucket.consume(60)
+
+    assert bucket.wait_time(1) == pytest.approx(1, abs=0.05)
+    assert bucket.wait_time(30) == pytest.approx(30, abs=0.05)
+
+
+def test_rate_limiter_throttles_on_token_quota():
+    limiter = RateLimiter(tokens_per_minute=600)
+
+    assert limiter._reserve(600) == 0
+    assert limiter._reserve(60) == pytest.approx(6, abs=0.05)
+
+
+def test_observe_response_syncs_remaining_and_retry_after():
+    limiter = RateLimiter(requests_per_minute=100)
+
+    limiter.observe_response(make_response(200, {"x-ratelimit-remaining-requests": "0"}))
+    assert limiter._reserve(1) > 0
+
+    limiter = RateLimiter()
+    limiter.observe_response(make_response(429, {"retry-after-ms": "2000"}))
+    assert limiter._reserve(1) == pytest.approx(2, abs=0.05)
+    assert limiter.stats()["rate_limited"] == 1
+
+
+def test_get_retry_after():
+    assert get_retry_after(httpx.Headers({"retry-after": "3"})) == 3
+    assert get_retry_after(httpx.Headers({"retry-after-ms": "250"})) == 0.25
+    assert get_retry_after(httpx.Headers({})) is None
+
+
+def test_call_retries_rate_limit_errors():
+    limiter = RateLimiter(base_delay=0)
+    responses = [make_rate_limit_error(), make_rate_limit_error(), "ok"]
+
+    def func():
+        response = responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    assert limiter.call(func) == "ok"
+    assert limiter.stats()["retries"] == 2
+
+
+def test_call_async_gives_up_after_max_retries():
+    limiter = RateLimiter(max_retries=1, base_delay=0)
+
+    async def func():
+        raise make_rate_limit_error()
+
+    with pytest.raises(openai.RateLimitError):
+        asyncio.run(limiter.call_async(func))
+    assert limiter.stats()["retries"] == 1
+
+
+def test_call_does_not_retry_other_errors():
+    limiter = RateLimiter(base_delay=0)
+
+    def func():
+        raise ValueError("Not retryable")
+
+    with pytest.raises(ValueError):
+        limiter.call(func)
+    assert limiter.stats()["retries"] == 0
+
+
+def test_injected_rate_limits_are_retried(fake_server: FakeLLMServer, monkeypatch):
+    fake_server.config.rate_limit_probability = 1.0
+    fake_server.config.retry_after = 0.01
+    monkeypatch.setattr(generation, "_rate_limiter", RateLimiter(max_retries=2))
+
+    with pytest.raises(Exception) as exc_info:
+        generation.generate_object("Extract info", GeneralInfo)
+
+    assert isinstance(unwrap_exception(exc_info.value), openai.RateLimitError)
+    assert fake_server.stats()["rate_limited"] == 3
+    assert generation.get_rate_limiter().stats()["rate_limited"] == 3
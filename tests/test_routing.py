@@ -0,0 +1,148 @@
+import asyncio
+import json
+import random
+import time
+from collections import Counter
+from pathlib import Path
+
+import httpx
+import openai
+import pytest
+
+from llmops_training.news_reader.circuit_breaker import CircuitOpenError
+from llmops_training.news_reader.routing import Deployment, DeploymentRouter, load_deployments
+
+
+def make_deployment(name: str, endpoint: str = "https://eu.openai.azure.com", **kwargs):
+    return Deployment(
+        name=name, model_name="o3-mini", endpoint=endpoint, api_version="2024-10-21", **kwargs
+    )
+
+
+def make_connection_error() -> openai.APIConnectionError:
+    return openai.APIConnectionError(request=httpx.Request("POST", "https://example.com"))
+
+
+def test_choose_prefers_faster_deployments():
+    fast, slow = make_deployment("fast"), make_deployment("slow")
+    router = DeploymentRouter([fast, slow])
+    for _ in range(20):
+        router.record_success(fast, latency=0.5)
+        router.record_success(slow, latency=5.0)
+
+    choices = Counter(router.choose("o3-mini").name for _ in range(1000))
+
+    assert choices["fast"] > 3 * choices["slow"]
+
+
+def test_choose_only_returns_deployments_of_the_model():
+    router = DeploymentRouter([make_deployment("o3-mini-eu")])
+
+    with pytest.raises(ValueError):
+        router.choose("gpt-4o")
+
+
+def test_unhealthy_deployment_is_probed_after_cooldown():
+    flaky, stable = make_deployment("flaky"), make_deployment("stable")
+    router = DeploymentRouter([flaky, stable], max_consecutive_failures=2, cooldown_seconds=0.05)
+    router.record_failure(flaky)
+    router.record_failure(flaky)
+
+    assert {router.choose("o3-mini").name for _ in range(50)} == {"stable"}
+
+    time.sleep(0.06)
+    assert router.choose("o3-mini").name == "flaky"  # probe
+    assert router.choose("o3-mini").name == "stable"  # only one probe at a time
+
+    router.record_success(flaky, latency=1.0)
+    assert router.stats()[0]["healthy"]
+
+
+def test_cancelled_probe_is_released():
+    flaky = make_deployment("flaky")
+    router = DeploymentRouter([flaky], max_consecutive_failures=1, cooldown_seconds=0)
+    router.record_failure(flaky)
+
+    async def func(deployment: Deployment) -> str:
+        await asyncio.sleep(1)
+        return deployment.name
+
+    async def cancel_probe():
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(router.call_async("o3-mini", func), timeout=0.01)
+
+    asyncio.run(cancel_probe())
+
+    assert router.stats()[0]["failures"] == 1  # Cancellation is not a failure
+    assert router.choose("o3-mini").name == "flaky"  # Probed again
+
+
+def test_request_rejected_by_circuit_breaker_is_not_recorded():
+    flaky = make_deployment("flaky")
+    router = DeploymentRouter([flaky], max_consecutive_failures=1, cooldown_seconds=0)
+    router.record_failure(flaky)
+
+    def func(deployment: Deployment) -> str:
+        raise CircuitOpenError()
+
+    with pytest.raises(CircuitOpenError):
+        router.call("o3-mini", func)
+
+    assert router.stats()[0]["failures"] == 1
+    assert not router.stats()[0]["healthy"]
+    assert router.choose("o3-mini").name == "flaky"  # Probed again
+
+
+def test_call_fails_over_to_other_deployment():
+    broken, working = make_deployment("broken"), make_deployment("working")
+    router = DeploymentRouter([broken, working])
+    calls = []
+    random.seed(0)  # Deployments are chosen at random, make sure the broken one is tried
+
+    def func(deployment: Deployment) -> str:
+        calls.append(deployment.name)
+        if deployment == broken:
+            raise make_connection_error()
+        return deployment.name
+
+    for _ in range(10):
+        assert router.call("o3-mini", func) == "working"
+    assert "broken" in calls
+    assert router.stats()[0]["failures"] == calls.count("broken")
+
+
+def test_call_async_raises_after_max_attempts():
+    router = DeploymentRouter([make_deployment("broken")], max_attempts=2)
+
+    async def func(deployment: Deployment) -> str:
+        raise make_connection_error()
+
+    with pytest.raises(openai.APIConnectionError):
+        asyncio.run(router.call_async("o3-mini", func))
+    assert router.stats()[0]["failures"] == 2
+
+
+def test_get_rate_limiter_for_url():
+    eu, us = make_deployment("eu"), make_deployment("us", endpoint="https://us.openai.azure.com")
+    router = DeploymentRouter([eu, us])
+    url = httpx.URL("https://us.openai.azure.com/openai/deployments/us/chat/completions")
+
+    assert router.get_rate_limiter_for_url(url) is router.get_rate_limiter(us)
+    assert router.get_rate_limiter_for_url(httpx.URL("https://other.com/x")) is None
+
+
+def test_load_deployments(tmp_path: Path):
+    path = tmp_path / "deployments.json"
+    path.write_text(json.dumps([make_deployment("eu", weight=2).model_dump()]))
+
+    assert load_deployments(path) == [make_deployment("eu", weight=2)]
+
+
+def test_call_avoids_excluded_deployments():
+    first, second = make_deployment("first"), make_deployment("second")
+    router = DeploymentRouter([first, second])
+
+    assert {router.call("o3-mini", lambda d: d.name, exclude=[first]) for _ in range(20)} == {
+        "second"
+    }
+    assert router.call("o3-mini", lambda d: d.name, exclude=[first, second]) in {"first", "second"}
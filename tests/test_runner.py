@@ -0,0 +1,107 @@
+from pathlib import Path
+from typing import List
+
+from llmops_training.news_reader import runner
+from llmops_training.news_reader.extraction import (
+    IncompleteArticleInfo,
+    degraded_extract_article_info,
+    mock_extract_article_info,
+)
+from llmops_training.news_reader.runner import (
+    CHECKPOINT_FILE,
+    Checkpoint,
+    RunProgress,
+    get_article_id,
+    run_corpus,
+)
+
+
+def make_articles(n: int):
+    articles = [f"Article {i}" for i in range(n)]
+    return {get_article_id(article): article for article in articles}
+
+
+def fake_extract_article_info(calls: List[str], failing: set):
+    def extract_article_info(article, **kwargs):
+        calls.append(article)
+        if article in failing:
+            raise ValueError("Quota exceeded")
+        return mock_extract_article_info(article)
+
+    return extract_article_info
+
+
+def test_run_corpus_resumes_from_checkpoint(tmp_path: Path, monkeypatch):
+    articles = make_articles(10)
+    calls: List[str] = []
+    monkeypatch.setattr(
+        runner, "extract_article_info", fake_extract_article_info(calls, {"Article 3"})
+    )
+
+    article_infos = run_corpus(articles, tmp_path, max_workers=4, on_progress=lambda _: None)
+
+    assert len(calls) == 10
+    assert [article_infos[article_id] is None for article_id in articles].count(True) == 1
+
+    # Resume: only the failed article is extracted again
+    calls.clear()
+    monkeypatch.setattr(runner, "extract_article_info", fake_extract_article_info(calls, set()))
+    progress: List[RunProgress] = []
+
+    article_infos = run_corpus(articles, tmp_path, on_progress=progress.append)
+
+    assert calls == ["Article 3"]
+    assert all(article_info is not None for article_info in article_infos.values())
+    assert progress[-1].stats()["skipped"] == 9
+
+
+def test_run_corpus_stops_when_llm_service_is_unavailable(tmp_path: Path, monkeypatch):
+    articles = make_articles(50)
+    monkeypatch.setattr(
+        runner, "extract_article_info", lambda article, **_: degraded_extract_article_info(article)
+    )
+    progress: List[RunProgress] = []
+
+    article_infos = run_corpus(articles, tmp_path, max_workers=2, on_progress=progress.append)
+
+    stats = progress[-1].stats()
+    assert stats["stopped_reason"] == "LLM service unavailable"
+    assert stats["done"] < 50
+    assert all(article_info is None for article_info in article_infos.values())
+
+
+def test_run_corpus_redoes_incomplete_articles(tmp_path: Path, monkeypatch):
+    def extract_incomplete_article_info(article, **kwargs):
+        article_info, trace_id = mock_extract_article_info(article)
+        errors = {"business_info.Acme": "ValueError('Quota exceeded')"}
+        return IncompleteArticleInfo(**article_info.model_dump(), errors=errors), trace_id
+
+    articles = make_articles(1)
+    monkeypatch.setattr(runner, "extract_article_info", extract_incomplete_article_info)
+
+    article_infos = run_corpus(articles, tmp_path, on_progress=lambda _: None)
+
+    article_id = next(iter(articles))
+    assert article_infos[article_id] is None
+    record = Checkpoint(tmp_path / CHECKPOINT_FILE).records[article_id]
+    assert record["error"].startswith("incomplete")
+
+
+def test_checkpoint_ignores_line_cut_off_by_crash(tmp_path: Path):
+    path = tmp_path / CHECKPOINT_FILE
+    checkpoint = Checkpoint(path)
+    checkpoint.write(
+        {
+            "article_id": "a",
+            "article_info": mock_extract_article_info("A")[0].model_dump(),
+            "trace_id": 1,
+            "error": None,
+        }
+    )
+    with open(path, "a", encoding="utf-8") as file:
+        file.write('{"article_id": "b", "artic')
+
+    checkpoint = Checkpoint(path)
+
+    assert checkpoint.is_done("a")
+    assert not checkpoint.is_done("b")
@@ -0,0 +1,146 @@
+import threading
+import time
+
+import pytest
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+
+from llmops_training.news_reader.scheduler import DagScheduler, Step
+
+
+def sleep_and_return(value, seconds: float = 0.1):
+    def func(_):
+        time.sleep(seconds)
+        return value
+
+    return func
+
+
+def test_run_independent_steps_concurrently():
+    scheduler = DagScheduler()
+    steps = {"a": Step(sleep_and_return(1)), "b": Step(sleep_and_return(2))}
+
+    start = time.monotonic()
+    results = scheduler.run(steps)
+
+    assert results == {"a": 1, "b": 2}
+    assert time.monotonic() - start < 0.18
+
+
+def test_run_passes_dependency_results():
+    scheduler = DagScheduler()
+    steps = {
+        "sum": Step(lambda results: results["a"] + results["b"], depends_on=["a", "b"]),
+        "a": Step(sleep_and_return(1)),
+        "b": Step(sleep_and_return(2, seconds=0.01)),
+    }
+
+    assert scheduler.run(steps)["sum"] == 3
+
+
+def test_run_skips_step_if_condition_fails():
+    scheduler = DagScheduler()
+    calls = []
+    steps = {
+        "flag": Step(sleep_and_return(False)),
+        "expensive": Step(
+            lambda _: calls.append("expensive"),
+            depends_on=["flag"],
+            condition=lambda results: results["flag"],
+        ),
+    }
+
+    assert scheduler.run(steps) == {"flag": False, "expensive": None}
+    assert calls == []
+
+
+@pytest.mark.parametrize("flag", [True, False])
+def test_speculative_step_starts_before_dependency(flag: bool):
+    scheduler = DagScheduler()
+    started = threading.Event()
+
+    def speculative(_):
+        started.set()
+        return "speculated"
+
+    def flag_step(_):
+        assert started.wait(timeout=1), "speculative step did not start early"
+        return flag
+
+    steps = {
+        "flag": Step(flag_step),
+        "speculative": Step(
+            speculative,
+            depends_on=["flag"],
+            condition=lambda results: results["flag"],
+            speculative=True,
+        ),
+    }
+
+    results = scheduler.run(steps)
+
+    assert results["speculative"] == ("speculated" if flag else None)
+    assert scheduler.n_speculative_cancelled == (0 if flag else 1)
+
+
+def test_run_raises_error_of_step():
+    def fail(_):
+        raise RuntimeError("Step failed")
+
+    with pytest.raises(RuntimeError):
+        DagScheduler().run({"a": Step(fail), "b": Step(sleep_and_return(1))})
+
+
+def test_run_raises_on_missing_dependency():
+    with pytest.raises(ValueError):
+        DagScheduler().run({"a": Step(sleep_and_return(1), depends_on=["missing"])})
+
+
+def test_map_preserves_order():
+    scheduler = DagScheduler()
+
+    assert scheduler.map(lambda x: time.sleep(0.01 * (5 - x)) or x * 2, range(5)) == [
+        0,
+        2,
+        4,
+        6,
+        8,
+    ]
+
+
+def test_spans_of_steps_are_nested_under_current_span():
+    exporter = InMemorySpanExporter()
+    provider = TracerProvider()
+    provider.add_span_processor(SimpleSpanProcessor(exporter))
+    tracer = provider.get_tracer(__name__)
+    scheduler = DagScheduler()
+
+    def step(_):
+        with tracer.start_as_current_span("step"):
+            scheduler.map(lambda _: tracer.start_span("fan_out").end(), range(2))
+
+    with tracer.start_as_current_span("article"):
+        scheduler.run({"a": Step(step), "b": Step(step)})
+
+    spans = {span.context.span_id: span for span in exporter.get_finished_spans()}
+    article = next(span for span in spans.values() if span.name == "article")
+    for span in spans.values():
+        if span.name == "step":
+            assert span.parent.span_id == article.context.span_id
+        if span.name == "fan_out":
+            assert spans[span.parent.span_id].name == "step"
+
+
+def test_run_skips_dependents_of_skipped_steps():
+    scheduler = DagScheduler()
+    steps = {
+        "a_last": Step(lambda results: "ran", depends_on=["b_middle"]),
+        "b_middle": Step(
+            lambda _: "ran", depends_on=["c_flag"], condition=lambda results: results["c_flag"]
+        ),
+        "c_flag": Step(sleep_and_return(False, seconds=0)),
+    }
+    steps["a_last"].condition = lambda results: results["b_middle"] is not None
+
+    assert scheduler.run(steps) == {"a_last": None, "b_middle": None, "c_flag": False}
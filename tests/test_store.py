@@ -0,0 +1,140 @@
+import asyncio
+from pathlib import Path
+
+import instructor
+import pytest
+
+from llmops_training.news_reader import classifier, extraction, generation, store
+from llmops_training.news_reader.classifier import (
+    BusinessPreClassifier,
+    HashedBagOfWordsClassifier,
+)
+from llmops_training.news_reader.extraction import (
+    ArticleInfo,
+    extract_article_info,
+    extract_info_from_articles,
+    extract_info_from_articles_async,
+    get_pipeline_version,
+    mock_extract_article_info,
+)
+from llmops_training.news_reader.routing import Deployment, DeploymentRouter
+from llmops_training.news_reader.store import ArticleInfoStore, get_article_hash
+
+TRACE_ID = 2**127 + 1  # Trace IDs are 128-bit
+
+
+@pytest.fixture
+def article_info_store(tmp_path: Path, monkeypatch) -> ArticleInfoStore:
+    article_info_store = ArticleInfoStore(str(tmp_path / "article_infos.sqlite"))
+    monkeypatch.setattr(store, "_store", article_info_store)
+    yield article_info_store
+    article_info_store.close()
+
+
+def test_get_article_hash_ignores_whitespace():
+    assert get_article_hash("Acme shares\n\nrose.  ") == get_article_hash("Acme shares rose.")
+    assert get_article_hash("Acme shares rose.") != get_article_hash("Acme shares fell.")
+
+
+def test_store_put_and_get(article_info_store: ArticleInfoStore):
+    article_info_store.put("a", "v1", '{"title": "A"}', TRACE_ID)
+
+    assert article_info_store.get("a", "v1") == ('{"title": "A"}', TRACE_ID)
+    assert article_info_store.get("a", "v2") is None
+    assert article_info_store.stats() == {"hits": 1, "misses": 1, "hit_rate": 0.5}
+
+
+def test_store_get_many(article_info_store: ArticleInfoStore):
+    article_hashes = [f"hash-{i}" for i in range(10_000)]
+    article_info_store.put_many((h, "v1", h.upper(), i) for i, h in enumerate(article_hashes[::2]))
+
+    stored = article_info_store.get_many(article_hashes, "v1")
+
+    assert len(stored) == 5_000
+    assert stored["hash-2"] == ("HASH-2", 1)
+    assert "hash-1" not in stored
+
+
+def test_store_persists(tmp_path: Path):
+    path = str(tmp_path / "article_infos.sqlite")
+    first = ArticleInfoStore(path)
+    first.put("a", "v1", "A", TRACE_ID)
+    first.close()
+
+    assert ArticleInfoStore(path).get("a", "v1") == ("A", TRACE_ID)
+
+
+def test_pipeline_version_depends_on_what_changes_the_output():
+    assert get_pipeline_version("modular") == get_pipeline_version("modular", concurrent=False)
+    assert get_pipeline_version("modular") != get_pipeline_version("fused")
+    assert get_pipeline_version("modular") != get_pipeline_version("modular", model_name="gpt-4o")
+    assert get_pipeline_version("modular") != get_pipeline_version("modular", batch_businesses=True)
+
+
+def test_pipeline_version_depends_on_deployments_instructor_mode_and_classifier(monkeypatch):
+    version = get_pipeline_version("modular")
+
+    monkeypatch.setattr(generation, "_instructor_mode", instructor.Mode.JSON)
+    assert get_pipeline_version("modular") != version
+    monkeypatch.undo()
+
+    deployment = Deployment(
+        name="o3-mini-eu",
+        model_name="o3-mini",
+        endpoint="https://eu.openai.azure.com",
+        api_version="2024-10-21",
+    )
+    monkeypatch.setattr(generation, "_router", DeploymentRouter([deployment]))
+    assert get_pipeline_version("modular") != version
+    monkeypatch.undo()
+
+    business_classifier = HashedBagOfWordsClassifier(n_features=16)
+    monkeypatch.setattr(classifier, "_pre_classifier", BusinessPreClassifier(business_classifier))
+    with_classifier = get_pipeline_version("modular")
+    business_classifier.weights[3] = 1.0  # Retrained, with the same bias
+    assert get_pipeline_version("modular") != with_classifier
+
+
+def test_extract_article_info_uses_store(article_info_store: ArticleInfoStore, monkeypatch):
+    calls = []
+
+    def fake_extract_fused_article_info(prompt_template, article, **kwargs):
+        calls.append(article)
+        return mock_extract_article_info(article)[0]
+
+    monkeypatch.setattr(extraction, "extract_fused_article_info", fake_extract_fused_article_info)
+
+    first, trace_id = extract_article_info("Acme shares rose.", mode="fused")
+    second, stored_trace_id = extract_article_info("Acme shares  rose.\n", mode="fused")
+    extract_article_info("Acme shares rose.", mode="fused", use_store=False)
+
+    assert second == first
+    assert stored_trace_id == trace_id
+    assert len(calls) == 2
+
+
+@pytest.mark.parametrize("use_async", [False, True])
+def test_batch_extraction_only_extracts_missing_articles(
+    article_info_store: ArticleInfoStore, monkeypatch, use_async: bool
+):
+    extracted = []
+
+    def fake_extract_article_info(article, **kwargs):
+        extracted.append(article)
+        if article == "error":
+            raise ValueError("Extraction failed")
+        return ArticleInfo(title=article, summary="", is_about_business=False, business_info=[]), 1
+
+    monkeypatch.setattr(extraction, "extract_article_info", fake_extract_article_info)
+
+    def extract(articles):
+        if use_async:
+            return asyncio.run(extract_info_from_articles_async(articles))
+        return extract_info_from_articles(articles)
+
+    extract(["a", "b", "error"])
+    extracted.clear()
+    article_infos, _ = extract(["b", "c", "a", "error"])
+
+    assert sorted(extracted) == ["c", "error"]
+    assert [info and info.title for info in article_infos] == ["b", "c", "a", None]
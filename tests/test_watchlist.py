@@ -0,0 +1,95 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from llmops_training.news_reader import extraction, watchlist
+from llmops_training.news_reader.extraction import is_business_we_care_about
+from llmops_training.news_reader.watchlist import (
+    Watchlist,
+    WatchlistEntry,
+    WatchlistIndex,
+    load_watchlist,
+    normalize_name,
+)
+
+
+@pytest.fixture
+def index() -> WatchlistIndex:
+    return WatchlistIndex(
+        Watchlist(
+            version="2025-01",
+            entries=[
+                WatchlistEntry(name="Acme Holdings plc", ticker="ACME", aliases=["Acme Corp"]),
+                WatchlistEntry(name="Marks & Spencer Group plc", ticker="MKS", aliases=["M&S"]),
+                WatchlistEntry(name="Royal Bank of Scotland", aliases=["RBS", "NatWest"]),
+                WatchlistEntry(name="Bank of England"),
+            ],
+        )
+    )
+
+
+def test_normalize_name():
+    assert normalize_name("The Acme Holdings PLC") == ["acme"]
+    assert normalize_name("Marks & Spencer Ltd.") == ["marks", "and", "spencer"]
+    assert normalize_name("Group") == ["group"]
+
+
+@pytest.mark.parametrize(
+    "business, expected",
+    [
+        ("Acme", "Acme Holdings plc"),
+        ("ACME Ltd", "Acme Holdings plc"),
+        ("acme", "Acme Holdings plc"),
+        ("Acme's UK division", "Acme Holdings plc"),
+        ("Acmeco", None),
+        ("Marks and Spencer", "Marks & Spencer Group plc"),
+        ("M&S", "Marks & Spencer Group plc"),
+        ("mks", "Marks & Spencer Group plc"),
+        ("RBS Group", "Royal Bank of Scotland"),
+        ("Royal Bank of Scotland Group plc", "Royal Bank of Scotland"),
+        ("the Bank of England", "Bank of England"),
+        ("Bank of Scotland", None),
+        ("Globex", None),
+    ],
+)
+def test_match(index: WatchlistIndex, business: str, expected: str | None):
+    entry = index.match(business)
+
+    assert (entry.name if entry else None) == expected
+
+
+def test_match_within_longer_name(index: WatchlistIndex):
+    assert index.match("Acme Corp Europe").name == "Acme Holdings plc"
+    assert index.match("NatWest Markets").name == "Royal Bank of Scotland"
+    # Tickers only match on their own
+    assert index.match("MKS Instruments") is None
+
+
+def test_contains_counts_filtered_out(index: WatchlistIndex):
+    results = [index.contains(business) for business in ["Acme", "Globex", "Initech", "RBS"]]
+
+    assert results == [True, False, False, True]
+    assert index.stats() == {"version": "2025-01", "checked": 4, "filtered_out": 2}
+
+
+def test_load_watchlist(tmp_path: Path):
+    path = tmp_path / "watchlist.json"
+    path.write_text(
+        json.dumps({"version": "2025-02", "entries": [{"name": "Acme plc", "ticker": "ACME"}]})
+    )
+
+    index = load_watchlist(path)
+
+    assert index.version == "2025-02"
+    assert index.match("Acme") is not None
+
+
+def test_is_business_we_care_about(index: WatchlistIndex, monkeypatch):
+    monkeypatch.setattr(watchlist, "_watchlist", None)
+    assert is_business_we_care_about("Globex")
+
+    monkeypatch.setattr(watchlist, "_watchlist", index)
+    assert extraction.is_business_we_care_about("Acme")
+    assert not extraction.is_business_we_care_about("Globex")
+    assert watchlist.get_watchlist().stats()["filtered_out"] == 1